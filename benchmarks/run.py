@@ -0,0 +1,260 @@
+"""
+Run the dlfx benchmarks and write the results as JSON.
+
+    python benchmarks/run.py --out results.json
+    python benchmarks/run.py --only metrics,preprocess --compare baseline.json
+
+Each result records the benchmark name, its parameters, every repeat's
+wall time and the median, so runs from different releases can be compared
+with ``--compare``. Benchmarks whose optional dependencies (torch,
+transformers) are missing are reported as skipped.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic  # noqa: E402
+
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def benchmark(name):
+    """Register a benchmark generator ``fn(data, args)`` yielding ``(params, callable, items)``."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, repeat: int) -> list:
+    """Wall time of ``repeat`` calls of ``fn`` after one warm-up call."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+@benchmark("flatten")
+def bench_flatten(data, args):
+    from pydicom import dcmread
+    from dlfx import flatten_dicom_dataset
+
+    datasets = [dcmread(path, stop_before_pixels=True) for path in data["dicom"]]
+    yield {"files": len(datasets)}, lambda: [flatten_dicom_dataset(ds) for ds in datasets], len(datasets)
+    yield ({"files": len(datasets), "include": "ContentSequence[*].CodeValue"},
+           lambda: [flatten_dicom_dataset(ds, include=["ContentSequence[*].CodeValue"]) for ds in datasets],
+           len(datasets))
+
+
+@benchmark("extract_index")
+def bench_extract_index(data, args):
+    from pydicom import dcmread
+    from dlfx import extract_index, flatten_dicom_dataset
+
+    keys = list(flatten_dicom_dataset(dcmread(data["dicom"][0], stop_before_pixels=True)))
+    keys = (keys * (100_000 // len(keys) + 1))[:100_000]
+    yield {"keys": len(keys)}, lambda: [extract_index(key) for key in keys], len(keys)
+
+
+@benchmark("dicom_frames")
+def bench_dicom_frames(data, args):
+    from pydicom import dcmread
+    from dlfx import DicomFrameReader, dicom_to_8bit
+
+    paths = data["dicom_multiframe"]
+
+    def full_volume():
+        for path in paths:
+            ds = dcmread(path)
+            dicom_to_8bit(ds, pixels=ds.pixel_array[len(ds.pixel_array) // 2])
+
+    def mapped_frame():
+        for path in paths:
+            reader = DicomFrameReader(path)
+            dicom_to_8bit(reader.dataset, pixels=reader[len(reader) // 2])
+
+    yield {"method": "dcmread.pixel_array", "files": len(paths)}, full_volume, len(paths)
+    yield {"method": "DicomFrameReader", "files": len(paths)}, mapped_frame, len(paths)
+
+
+@benchmark("preprocess")
+def bench_preprocess(data, args):
+    from PIL import Image
+    from dlfx.MedGemma import preprocess
+
+    functions = [("MedGemma.preprocess", preprocess)]
+    try:
+        from dlfx.MedSigLip.preprocess import convert_to_8bit_3channel
+        functions.append(("MedSigLip.convert_to_8bit_3channel", convert_to_8bit_3channel))
+    except ImportError as e:
+        print(f"MedSigLip.convert_to_8bit_3channel skipped: {e}")
+
+    for kind in ("png8", "png16"):
+        paths = data[kind]
+        for name, fn in functions:
+            for target_size in (None, 448):
+                yield ({"function": name, "input": kind, "target_size": target_size, "files": len(paths)},
+                       lambda fn=fn, paths=paths, target_size=target_size:
+                           [fn(Image.open(path), target_size=target_size) for path in paths],
+                       len(paths))
+
+
+@benchmark("dataset")
+def bench_dataset(data, args):
+    try:
+        from torch.utils.data import DataLoader
+        from dlfx.MedSigLip import MedSigLIPDataset
+    except ImportError as e:
+        raise SkipBenchmark(str(e))
+
+    paths = data["png16"]
+    dataset = MedSigLIPDataset(paths, return_raw=True, target_size=448)
+    for workers in args.workers:
+        loader = DataLoader(dataset, batch_size=8, num_workers=workers, collate_fn=list)
+        yield {"workers": workers, "files": len(paths), "return_raw": True}, lambda loader=loader: list(loader), len(paths)
+
+
+@benchmark("metrics")
+def bench_metrics(data, args):
+    from dlfx.MedGemma import analyze_errors, compute_accuracy
+
+    for n in args.samples:
+        predictions, references = synthetic.make_predictions(n)
+        as_lists = predictions.tolist(), references.tolist()
+        yield {"function": "compute_accuracy", "samples": n}, lambda p=as_lists: compute_accuracy(*p), n
+
+        def quiet(p=as_lists):
+            with contextlib.redirect_stdout(io.StringIO()):
+                analyze_errors(*p)
+        yield {"function": "analyze_errors", "samples": n}, quiet, n
+
+
+@benchmark("plot_images_grid")
+def bench_plot(data, args):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from dlfx import ThumbnailLoader
+    from dlfx.MedGemma import plot_images_grid
+
+    for kind in ("png8", "png16"):
+        paths = data[kind][:16]
+
+        # A fresh loader per call, so every repeat decodes the files instead of hitting the cache
+        def plot(paths=paths):
+            fig, _ = plot_images_grid(paths, loader=ThumbnailLoader())
+            plt.close(fig)
+        yield {"input": kind, "images": len(paths)}, plot, len(paths)
+
+        # Re-plotting the same paths: thumbnails come from the loader's cache
+        def replot(paths=paths, loader=ThumbnailLoader()):
+            fig, _ = plot_images_grid(paths, loader=loader)
+            plt.close(fig)
+        yield {"input": kind, "images": len(paths), "cached": True}, replot, len(paths)
+
+
+def environment() -> dict:
+    """Versions and machine info stored with every run."""
+    import dlfx
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "dlfx": dlfx.__version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def result_key(result) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: list, baseline_path: str):
+    """Print the median time ratio of every result against a baseline run."""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"] if "median_s" in r}
+    print(f"\n{'benchmark':<70} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for result in results:
+        base = baseline.get(result_key(result))
+        if base is None or "median_s" not in result:
+            continue
+        label = result["name"] + " " + json.dumps(result["params"], sort_keys=True)
+        ratio = result["median_s"] / base["median_s"]
+        print(f"{label[:70]:<70} {base['median_s']:>10.4f} {result['median_s']:>10.4f} {ratio:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="benchmark_results.json", help="JSON output file")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "dlfx-bench-data"),
+                        help="Directory for the synthetic data (reused between runs)")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("--files", type=int, default=20, help="Number of synthetic DICOMs and PNGs")
+    parser.add_argument("--image-size", type=int, default=1024, help="Synthetic image size")
+    parser.add_argument("--samples", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6, 10**7],
+                        help="Sample counts for the metric benchmarks")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4],
+                        help="DataLoader worker counts for the dataset benchmark")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    data = synthetic.generate(args.data_dir, num_dicoms=args.files, num_pngs=args.files,
+                              image_size=args.image_size)
+    results = []
+    for name in names:
+        try:
+            for params, fn, items in BENCHMARKS[name](data, args):
+                times = measure(fn, args.repeat)
+                median = statistics.median(times)
+                results.append({
+                    "name": name,
+                    "params": params,
+                    "times_s": times,
+                    "median_s": median,
+                    "items_per_s": items / median if median > 0 else None,
+                })
+                print(f"{name:<18} {json.dumps(params):<90} {median:9.4f} s")
+        except SkipBenchmark as e:
+            results.append({"name": name, "params": {}, "skipped": str(e)})
+            print(f"{name:<18} skipped: {e}")
+
+    with open(args.out, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=1)
+    print(f"\nWrote {len(results)} results to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Synthetic medical data for the benchmarks.
+
+Everything is generated locally from a fixed seed: DICOM files with nested
+sequences (single- and multi-frame, uncompressed), 8- and 16-bit grayscale
+PNGs, and prediction/reference arrays for the metric benchmarks.
+"""
+import os
+
+import numpy as np
+from PIL import Image
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.sequence import Sequence
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+# Enhanced CT; any SOP class works for reading
+SOP_CLASS_UID = "1.2.840.10008.5.1.4.1.1.2.1"
+
+
+def _code_item(value: str, meaning: str) -> Dataset:
+    item = Dataset()
+    item.CodeValue = value
+    item.CodingSchemeDesignator = "DCM"
+    item.CodeMeaning = meaning
+    return item
+
+
+def make_dicom(path: str, rng: np.random.Generator, rows: int = 512, columns: int = 512,
+               frames: int = 1, items: int = 4, depth: int = 3) -> str:
+    """
+    Write a synthetic 16-bit DICOM file with nested sequences.
+
+    Args:
+        path: Output path
+        rng: Random generator
+        rows: Image rows
+        columns: Image columns
+        frames: Number of frames (multi-frame if > 1)
+        items: Items per sequence level
+        depth: Sequence nesting depth
+
+    Returns:
+        str: ``path``
+    """
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = SOP_CLASS_UID
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID = SOP_CLASS_UID
+    ds.SOPInstanceUID = ds.file_meta.MediaStorageSOPInstanceUID
+    ds.StudyInstanceUID = generate_uid()
+    ds.SeriesInstanceUID = generate_uid()
+    ds.PatientID = f"P{rng.integers(10**6):06d}"
+    ds.PatientName = "Synthetic^Patient"
+    ds.StudyDate = "20240101"
+    ds.Modality = "CT"
+    ds.ImageType = ["ORIGINAL", "PRIMARY", "AXIAL"]
+    ds.add_new(0x00091010, "LO", "private value")
+
+    def nested(level):
+        sequence = []
+        for i in range(items):
+            item = _code_item(str(i), f"Level {level} item {i}")
+            item.ReferencedSOPInstanceUID = generate_uid()
+            if level + 1 < depth:
+                item.ContentSequence = Sequence(nested(level + 1))
+            sequence.append(item)
+        return sequence
+
+    ds.ContentSequence = Sequence(nested(0))
+    ds.ReferencedSeriesSequence = Sequence([_code_item(str(i), "Series") for i in range(items)])
+
+    ds.Rows, ds.Columns = rows, columns
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit = 16, 12, 11
+    ds.PixelRepresentation = 0
+    ds.RescaleSlope, ds.RescaleIntercept = 1, -1024
+    ds.WindowCenter, ds.WindowWidth = 40, 400
+    if frames > 1:
+        ds.NumberOfFrames = frames
+    pixels = rng.integers(0, 4096, (frames, rows, columns), dtype=np.uint16)
+    ds.PixelData = pixels.tobytes()
+    ds.save_as(path, enforce_file_format=True)
+    return path
+
+
+def make_png(path: str, rng: np.random.Generator, size: int = 1024, bits: int = 8) -> str:
+    """Write a synthetic grayscale PNG with 8 or 16 bits per pixel."""
+    # Smooth gradient plus noise so PNG compression is realistic
+    y, x = np.mgrid[0:size, 0:size]
+    base = (x + y) / (2 * size)
+    noise = rng.normal(0, 0.05, (size, size))
+    values = np.clip(base + noise, 0, 1)
+    if bits == 16:
+        Image.fromarray((values * 65535).astype(np.uint16)).save(path)
+    else:
+        Image.fromarray((values * 255).astype(np.uint8)).save(path)
+    return path
+
+
+def make_predictions(n: int, num_classes: int = 4, invalid_rate: float = 0.02, accuracy: float = 0.7,
+                     seed: int = 0):
+    """
+    Synthetic predictions and references for the metric benchmarks.
+
+    Returns:
+        tuple: ``(predictions, references)`` int64 arrays; invalid predictions are -1
+    """
+    rng = np.random.default_rng(seed)
+    references = rng.integers(0, num_classes, n)
+    predictions = np.where(rng.random(n) < accuracy, references, rng.integers(0, num_classes, n))
+    predictions[rng.random(n) < invalid_rate] = -1
+    return predictions, references
+
+
+def generate(data_dir: str, num_dicoms: int = 20, num_pngs: int = 20, image_size: int = 1024,
+             seed: int = 0) -> dict:
+    """
+    Generate the benchmark data set in ``data_dir`` (existing files are reused).
+
+    Returns:
+        dict: Lists of paths under ``dicom``, ``dicom_multiframe``, ``png8`` and ``png16``
+    """
+    rng = np.random.default_rng(seed)
+    layout = {"dicom": [], "dicom_multiframe": [], "png8": [], "png16": []}
+    for name in layout:
+        os.makedirs(os.path.join(data_dir, name), exist_ok=True)
+
+    for i in range(num_dicoms):
+        path = os.path.join(data_dir, "dicom", f"{i:05d}.dcm")
+        if not os.path.exists(path):
+            make_dicom(path, rng, rows=image_size // 2, columns=image_size // 2)
+        layout["dicom"].append(path)
+    for i in range(max(num_dicoms // 10, 1)):
+        path = os.path.join(data_dir, "dicom_multiframe", f"{i:05d}.dcm")
+        if not os.path.exists(path):
+            make_dicom(path, rng, rows=image_size // 2, columns=image_size // 2, frames=32)
+        layout["dicom_multiframe"].append(path)
+    for bits in (8, 16):
+        for i in range(num_pngs):
+            path = os.path.join(data_dir, f"png{bits}", f"{i:05d}.png")
+            if not os.path.exists(path):
+                make_png(path, rng, size=image_size, bits=bits)
+            layout[f"png{bits}"].append(path)
+    return layout
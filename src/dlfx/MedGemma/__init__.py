@@ -1,5 +1,19 @@
-from .compute_accuracy import compute_accuracy, analyze_errors
-from .display_prediction import display_prediction
-from .plot_images_grid import plot_images_grid
-from .preprocess import preprocess
-from .print_prompt import print_prompt
\ No newline at end of file
+from .._lazy import attach
+
+# matplotlib and pandas are only imported with the exports that need them
+__getattr__, __dir__, __all__ = attach(__name__, {
+    "compute_accuracy": ".compute_accuracy",
+    "analyze_errors": ".compute_accuracy",
+    "confusion_matrix": ".compute_accuracy",
+    "per_class_metrics": ".compute_accuracy",
+    "MetricAccumulator": ".metric_accumulator",
+    "bootstrap_metrics": ".bootstrap",
+    "run_evaluation": ".evaluate",
+    "AnswerParser": ".evaluate",
+    "build_prompt": ".evaluate",
+    "ResultsStore": ".results_store",
+    "display_prediction": ".display_prediction",
+    "plot_images_grid": ".plot_images_grid",
+    "preprocess": ".preprocess",
+    "print_prompt": ".print_prompt",
+})
@@ -0,0 +1,143 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .compute_accuracy import _encode_labels
+
+OVERALL = "(all)"
+
+
+def _metrics(counts: np.ndarray):
+    """
+    Metrics from cell counts of shape ``(..., K, K + 1)`` (last prediction column: invalid).
+
+    Returns:
+        dict: ``accuracy`` and ``invalid_rate`` of shape ``(...)``, and per-class
+        ``precision``, ``recall`` and ``f1`` of shape ``(..., K)``
+    """
+    matrix = counts[..., :-1]
+    correct_per_class = np.diagonal(matrix, axis1=-2, axis2=-1)
+    correct = correct_per_class.sum(axis=-1)
+    total = counts.sum(axis=(-2, -1))
+    valid = matrix.sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = correct_per_class / matrix.sum(axis=-2)
+        recall = correct_per_class / matrix.sum(axis=-1)
+        f1 = np.where(precision + recall == 0, 0.0, 2 * precision * recall / (precision + recall))
+        return {
+            'accuracy': correct / valid,
+            'invalid_rate': (total - valid) / total,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+        }
+
+
+def bootstrap_metrics(predictions, references, meta=None, by=None, n_boot=1000, ci=0.95, seed=0,
+                      batch_size=None, include_overall=True):
+    """
+    Stratified bootstrap confidence intervals for accuracy and per-class metrics of every subgroup.
+
+    Samples are stratified by the combination of the ``by`` columns of
+    ``meta`` (e.g. site x vendor x pathology). Every metric here is a
+    function of the (subgroup, reference, prediction) cell counts, so a
+    bootstrap resample of a subgroup's rows is drawn directly as a multinomial
+    sample of its cell counts; this is equivalent to resampling index arrays
+    but costs O(cells) instead of O(rows) per replicate. All subgroups and a
+    batch of replicates are drawn in one vectorized call. The overall
+    estimate is the sum of the stratified subgroup resamples.
+
+    Args:
+        predictions: Predicted classes (-1 for invalid predictions)
+        references: True/reference classes
+        meta: Optional DataFrame aligned with the predictions
+        by: Column name or list of ``meta`` columns to slice by (default:
+            'Pathology' if present); None without ``meta`` reports only the overall metrics
+        n_boot: Number of bootstrap replicates
+        ci: Confidence level of the percentile intervals
+        seed: Random seed
+        batch_size: Replicates drawn per vectorized call (default: bounded to ~64 MB of counts)
+        include_overall: Add the metrics over all samples (group values ``"(all)"``)
+
+    Returns:
+        pd.DataFrame: One row per (subgroup, metric, class) with the ``by`` columns,
+        ``metric`` (accuracy, invalid_rate, precision, recall, f1), ``class`` (None for
+        accuracy and invalid_rate), ``n`` (subgroup size), ``estimate``, ``lower`` and ``upper``
+
+    Raises:
+        ValueError: If a reference is missing (NaN or None)
+    """
+    pred_codes, ref_codes, invalid_mask, classes = _encode_labels(predictions, references)
+    k = len(classes)
+
+    if by is None and meta is not None and 'Pathology' in meta.columns:
+        by = ['Pathology']
+    by = [by] if isinstance(by, str) else list(by or [])
+    if by:
+        grouped = meta.reset_index(drop=True).groupby(by, sort=True, dropna=False)
+        group_codes = grouped.ngroup().to_numpy()
+        # Same order as the codes; unlike `grouped.groups`, this also works for missing values
+        group_keys = [key if isinstance(key, tuple) else (key,) for key in grouped.size().index]
+    else:
+        group_codes = np.zeros(len(pred_codes), dtype=np.int64)
+        group_keys = [()]
+    num_groups = len(group_keys)
+
+    # Cell counts per subgroup: reference x (prediction classes + invalid)
+    pred_cells = np.where(invalid_mask, k, pred_codes)
+    known = (ref_codes >= 0) & (pred_cells >= 0)
+    cells = k * (k + 1)
+    flat = (group_codes[known] * k + ref_codes[known]) * (k + 1) + pred_cells[known]
+    counts = np.bincount(flat, minlength=num_groups * cells).reshape(num_groups, cells)
+    sizes = counts.sum(axis=1)
+
+    if batch_size is None:
+        batch_size = max(1, min(n_boot, (64 * 2**20) // (8 * max(num_groups * cells, 1))))
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probabilities = np.where(sizes[:, None] > 0, counts / np.maximum(sizes, 1)[:, None], 0.0)
+    # Empty subgroups get a dummy distribution and zero draws
+    probabilities[sizes == 0, 0] = 1.0
+
+    samples = {name: [] for name in ('accuracy', 'invalid_rate', 'precision', 'recall', 'f1')}
+    for start in range(0, n_boot, batch_size):
+        replicates = min(batch_size, n_boot - start)
+        draws = rng.multinomial(sizes, probabilities, size=(replicates, num_groups))
+        draws = draws.reshape(replicates, num_groups, k, k + 1)
+        if include_overall and by:
+            draws = np.concatenate([draws, draws.sum(axis=1, keepdims=True)], axis=1)
+        for name, values in _metrics(draws).items():
+            samples[name].append(values)
+
+    observed = counts.reshape(num_groups, k, k + 1)
+    keys = list(group_keys)
+    group_sizes = list(sizes)
+    if include_overall and by:
+        observed = np.concatenate([observed, observed.sum(axis=0, keepdims=True)], axis=0)
+        keys.append((OVERALL,) * len(by))
+        group_sizes.append(int(sizes.sum()))
+    estimates = _metrics(observed)
+
+    alpha = (1 - ci) / 2
+    rows = []
+    for name in samples:
+        replicates = np.concatenate(samples[name], axis=0) if samples[name] else np.empty((0,) + estimates[name].shape)
+        with warnings.catch_warnings():
+            # Subgroups without valid predictions of a class have all-NaN replicates
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if len(replicates):
+                lower, upper = np.nanpercentile(replicates, [100 * alpha, 100 * (1 - alpha)], axis=0)
+            else:
+                lower = upper = np.full(estimates[name].shape, np.nan)
+        per_class = estimates[name].ndim == 2
+        for g, key in enumerate(keys):
+            labels = classes if per_class else [None]
+            for c, label in enumerate(labels):
+                index = (g, c) if per_class else g
+                rows.append(key + (name, label, int(group_sizes[g]), estimates[name][index], lower[index], upper[index]))
+
+    df = pd.DataFrame(rows, columns=by + ['metric', 'class', 'n', 'estimate', 'lower', 'upper'])
+    # Keep class labels as given (integers would otherwise be cast to float next to None)
+    df['class'] = pd.Series([row[len(by) + 1] for row in rows], dtype=object)
+    return df
@@ -1,120 +1,298 @@
 import pandas as pd
 import numpy as np
 
-def analyze_errors(predictions, references, all_outputs=None, meta=None, max_mistakes=200, max_invalid_examples=3):
+from .results_store import ResultsStore
+
+INVALID = -1
+
+
+def _invalid_mask(predictions: np.ndarray) -> np.ndarray:
+    """Boolean mask of invalid (-1) predictions for numeric, string or object arrays."""
+    if predictions.dtype.kind in "US":
+        return predictions == str(INVALID)
+    return predictions == INVALID
+
+
+def _check_references(references: np.ndarray):
+    """Raise if any reference label is missing (NaN or None); such samples have no true class."""
+    if references.dtype.kind in "fcO":
+        missing = np.flatnonzero(pd.isna(references))
+        if len(missing):
+            raise ValueError(f"{len(missing)} references are missing (NaN or None), e.g. at positions "
+                             f"{missing[:5].tolist()}; drop or label these samples first")
+
+
+def _encode_labels(predictions, references, classes=None):
+    """
+    Encode labels as positions in ``classes`` (-1 for invalid predictions and unknown labels).
+
+    Returns:
+        tuple: ``(pred_codes, ref_codes, invalid_mask, classes)``
+    """
+    predictions = np.asarray(predictions)
+    references = np.asarray(references)
+    if len(predictions) != len(references):
+        raise ValueError("Number of predictions must match number of references")
+    _check_references(references)
+    invalid_mask = _invalid_mask(predictions)
+
+    valid_predictions = predictions[~invalid_mask]
+    # Integer labels with a small range are encoded through a lookup table instead of sorting
+    int_range = None
+    if references.dtype.kind in "iu" and predictions.dtype.kind in "iu" and len(references):
+        lo = min(references.min(), valid_predictions.min(initial=references.min()))
+        hi = max(references.max(), valid_predictions.max(initial=references.max()))
+        if hi - lo < 1 << 20:
+            int_range = (int(lo), int(hi))
+
+    if classes is None:
+        if int_range is not None:
+            present = np.zeros(int_range[1] - int_range[0] + 1, dtype=bool)
+            present[references - int_range[0]] = True
+            present[valid_predictions - int_range[0]] = True
+            classes = np.flatnonzero(present) + int_range[0]
+        else:
+            classes = np.unique(np.concatenate([references, valid_predictions]))
+    classes = np.asarray(classes)
+    k = len(classes)
+
+    if int_range is not None and classes.dtype.kind in "iu":
+        lo, hi = int_range
+        lut = np.full(hi - lo + 1, -1)
+        inside = (classes >= lo) & (classes <= hi)
+        lut[classes[inside] - lo] = np.flatnonzero(inside)
+
+        def encode(values):
+            return lut[values - lo]
+    else:
+        # Positions in the sorted classes; -1 for labels not in classes
+        order = np.argsort(classes, kind="stable")
+        sorted_classes = classes[order]
+
+        def encode(values):
+            if k == 0:
+                return np.full(len(values), -1)
+            positions = np.searchsorted(sorted_classes, values).clip(0, k - 1)
+            return np.where(sorted_classes[positions] == values, order[positions], -1)
+
+    ref_codes = encode(references)
+    pred_codes = np.full(len(predictions), -1)
+    pred_codes[~invalid_mask] = encode(valid_predictions)
+
+    return pred_codes, ref_codes, invalid_mask, classes
+
+
+def confusion_matrix(predictions, references, classes=None):
+    """
+    Confusion matrix of valid predictions, counted with a single ``bincount``.
+
+    Args:
+        predictions: Predicted classes (-1 for invalid predictions)
+        references: True/reference classes
+        classes: Optional class order (default: sorted union of references and valid predictions)
+
+    Returns:
+        tuple: ``(matrix, invalid, classes)`` where ``matrix[i, j]`` counts samples of
+        reference ``classes[i]`` predicted as ``classes[j]``, ``invalid[i]`` counts
+        invalid predictions for reference ``classes[i]``; labels outside ``classes``
+        are ignored
+
+    Raises:
+        ValueError: If a reference is missing (NaN or None)
+    """
+    pred_codes, ref_codes, invalid_mask, classes = _encode_labels(predictions, references, classes)
+    k = len(classes)
+    valid = (ref_codes >= 0) & (pred_codes >= 0)
+    matrix = np.bincount(ref_codes[valid] * k + pred_codes[valid], minlength=k * k).reshape(k, k)
+    invalid = np.bincount(ref_codes[invalid_mask & (ref_codes >= 0)], minlength=k)
+    return matrix, invalid, classes
+
+
+def per_class_metrics(matrix: np.ndarray, invalid: np.ndarray, classes) -> pd.DataFrame:
+    """
+    Per-class metrics from a confusion matrix.
+
+    Columns: ``support`` (all samples of the class), ``correct``, ``invalid``,
+    ``accuracy`` (correct / support, invalid predictions count as wrong),
+    ``precision``, ``recall`` (over valid predictions), ``f1`` and ``invalid_rate``.
+    Undefined ratios are NaN.
+    """
+    correct = np.diag(matrix)
+    valid_support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    support = valid_support + invalid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = correct / predicted
+        recall = correct / valid_support
+        f1 = 2 * precision * recall / (precision + recall)
+        f1 = np.where((precision + recall) == 0, 0.0, f1)
+        accuracy = correct / support
+        invalid_rate = invalid / support
+    return pd.DataFrame({
+        'support': support,
+        'correct': correct,
+        'invalid': invalid,
+        'accuracy': accuracy,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'invalid_rate': invalid_rate,
+    }, index=pd.Index(classes, name='class'))
+
+
+def _subgroup_accuracy(matrix, invalid, classes) -> pd.Series:
+    """Share of each prediction (including -1) within each reference class, as a (references, predictions) Series."""
+    counts = np.concatenate([matrix, invalid[:, None]], axis=1)
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = counts / totals
+    ref_idx, pred_idx = np.nonzero(counts)
+    pred_labels = np.concatenate([np.asarray(classes, dtype=object), np.array([INVALID], dtype=object)])
+    index = pd.MultiIndex.from_arrays(
+        [np.asarray(classes)[ref_idx], pred_labels[pred_idx]], names=['references', 'predictions']
+    )
+    return pd.Series(shares[ref_idx, pred_idx], index=index, name='proportion')
+
+
+def analyze_errors(predictions, references=None, all_outputs=None, meta=None, max_mistakes=200, max_invalid_examples=3,
+                   verbose=True):
     """
     Analyze prediction errors and display detailed statistics.
-    
+
     Args:
-        predictions: List of predicted classes (-1 for invalid predictions)
+        predictions: List of predicted classes (-1 for invalid predictions), or a
+            ``ResultsStore`` providing predictions, references, outputs and meta
         references: List of true/reference classes
-        all_outputs: Optional list of raw model outputs for invalid prediction examples
+        all_outputs: Optional list of raw model outputs (dicts or pipeline-style one-element
+            lists with 'generated_text') for invalid prediction examples
         meta: Optional DataFrame containing metadata with 'Pathology' column for subgroup analysis
-        max_mistakes: Maximum number of mistakes to analyze for patterns (default: 200)
+        max_mistakes: Number of incorrect predictions, in order, that ``mistake_patterns``
+            is counted over (default: 200); None counts all of them
         max_invalid_examples: Maximum number of invalid prediction examples to show (default: 3)
-    
+        verbose: Print the analysis (default: True)
+
     Returns:
         dict: Dictionary containing analysis results with keys:
-              - correct_predictions: list of correct prediction indices
-              - incorrect_predictions: list of incorrect prediction indices  
-              - invalid_predictions: list of invalid prediction indices
-              - mistake_patterns: dict of mistake patterns and their counts
+              - correct_predictions: array of correct prediction indices
+              - incorrect_predictions: array of incorrect prediction indices
+              - invalid_predictions: array of invalid prediction indices
+              - mistake_patterns: dict of mistake patterns ("true → predicted") and their
+                counts among the first ``max_mistakes`` incorrect predictions
               - prediction_df: DataFrame with predictions and references
-              - subgroup_acc: Series with subgroup accuracies (if meta provided)
+              - subgroup_acc: Series with the share of each prediction per reference class
+              - confusion_matrix: DataFrame of valid prediction counts (rows: references)
+              - per_class: DataFrame of per-class metrics (see ``per_class_metrics``)
+
+    Raises:
+        ValueError: If a reference is missing (NaN or None)
     """
-    correct_predictions = []
-    incorrect_predictions = []
-    invalid_predictions = []
-    
-    for i, (pred, ref) in enumerate(zip(predictions, references)):
-        if pred == -1:
-            invalid_predictions.append(i)
-        elif pred == ref:
-            correct_predictions.append(i)
-        else:
-            incorrect_predictions.append(i)
-    
-    print("🔍 Error Analysis:")
-    print("=" * 30)
-    print(f"Correct predictions: {len(correct_predictions)}")
-    print(f"Incorrect predictions: {len(incorrect_predictions)}")
-    print(f"Invalid predictions: {len(invalid_predictions)}")
-    
-    # Show confusion patterns
-    mistake_count = {}
-    if incorrect_predictions:
-        print("\n❌ Common mistakes:")
-        for idx in incorrect_predictions[:max_mistakes]:
-            true_class = references[idx]
-            pred_class = predictions[idx] if predictions[idx] != -1 else "Invalid"
-            mistake = f"{true_class} → {pred_class}"
-            mistake_count[mistake] = mistake_count.get(mistake, 0) + 1
-        
-        for mistake, count in sorted(mistake_count.items(), key=lambda x: x[1], reverse=True):
-            print(f"  {mistake}: {count} times")
-    
-    # Show examples of invalid predictions
-    if invalid_predictions:
-        print("\n⚠️ Examples of invalid predictions:")
-        for idx in invalid_predictions[:max_invalid_examples]:
-            true_class = references[idx]
-            raw_output = all_outputs[idx]["generated_text"] if all_outputs else "N/A"
-            print(f"  True: {true_class}")
-            print(f"  Raw output: '{raw_output}'")
-    
-    # Subgroup accuracy analysis
+    if isinstance(predictions, ResultsStore):
+        results = predictions.results()
+        predictions, references = results['predictions'], results['references']
+        all_outputs = results['outputs'] if all_outputs is None else all_outputs
+        if meta is None and 'Pathology' in results['meta'].columns:
+            meta = results['meta']
+    # Mixed string labels and -1 become all strings in an array; keep the values as given
     prediction_df = pd.DataFrame({'predictions': predictions, 'references': references})
-    subgroup_acc = prediction_df.groupby('references').predictions.value_counts(normalize=True)
-    
-    print("\n📊 Subgroup Accuracies:")
-    print("=" * 30)
-    if meta is not None:
-        for i in meta.Pathology.unique():
-            try:
-                accuracy = subgroup_acc.loc[i, i]
-                print(f'{i} Accuracy: {accuracy:.2f}')
-            except KeyError:
-                print(f'{i} Accuracy: 0.00 (no correct predictions)')
-    else:
-        # If meta is not provided, use unique values from references
-        for i in pd.Series(references).unique():
-            try:
-                accuracy = subgroup_acc.loc[i, i]
-                print(f'{i} Accuracy: {accuracy:.2f}')
-            except KeyError:
-                print(f'{i} Accuracy: 0.00 (no correct predictions)')
-    
+    predictions = np.asarray(predictions)
+    references = np.asarray(references)
+    matrix, invalid, classes = confusion_matrix(predictions, references)
+
+    invalid_mask = _invalid_mask(predictions)
+    correct_mask = ~invalid_mask & (predictions == references)
+    correct_predictions = np.flatnonzero(correct_mask)
+    incorrect_predictions = np.flatnonzero(~invalid_mask & ~correct_mask)
+    invalid_predictions = np.flatnonzero(invalid_mask)
+
+    # Confusion counts of the first max_mistakes incorrect predictions, most frequent first
+    first = incorrect_predictions[:max_mistakes]
+    patterns = pd.Series(references[first]).astype(str) + " → " + pd.Series(predictions[first]).astype(str)
+    counts = patterns.value_counts(sort=False).sort_values(ascending=False, kind="stable")
+    mistake_count = {mistake: int(count) for mistake, count in counts.items()}
+
+    per_class = per_class_metrics(matrix, invalid, classes)
+    subgroup_acc = _subgroup_accuracy(matrix, invalid, classes)
+
+    if verbose:
+        print("🔍 Error Analysis:")
+        print("=" * 30)
+        print(f"Correct predictions: {len(correct_predictions)}")
+        print(f"Incorrect predictions: {len(incorrect_predictions)}")
+        print(f"Invalid predictions: {len(invalid_predictions)}")
+
+        if len(incorrect_predictions):
+            print("\n❌ Common mistakes:")
+            for mistake, count in mistake_count.items():
+                print(f"  {mistake}: {count} times")
+
+        if len(invalid_predictions):
+            print("\n⚠️ Examples of invalid predictions:")
+            for idx in invalid_predictions[:max_invalid_examples]:
+                output = all_outputs[idx] if all_outputs else None
+                # Pipeline outputs are one-element lists
+                output = output[0] if isinstance(output, list) else output
+                raw_output = output["generated_text"] if output else "N/A"
+                print(f"  True: {references[idx]}")
+                print(f"  Raw output: '{raw_output}'")
+
+        print("\n📊 Subgroup Accuracies:")
+        print("=" * 30)
+        groups = meta.Pathology.unique() if meta is not None else pd.unique(references)
+        accuracy = per_class['accuracy'].reindex(groups)
+        correct = per_class['correct'].reindex(groups).fillna(0)
+        for group, acc, n_correct in zip(groups, accuracy, correct):
+            if n_correct > 0:
+                print(f'{group} Accuracy: {acc:.2f}')
+            else:
+                print(f'{group} Accuracy: 0.00 (no correct predictions)')
+
     return {
         'correct_predictions': correct_predictions,
         'incorrect_predictions': incorrect_predictions,
         'invalid_predictions': invalid_predictions,
         'mistake_patterns': mistake_count,
         'prediction_df': prediction_df,
-        'subgroup_acc': subgroup_acc
+        'subgroup_acc': subgroup_acc,
+        'confusion_matrix': pd.DataFrame(matrix, index=pd.Index(classes, name='references'),
+                                         columns=pd.Index(classes, name='predictions')),
+        'per_class': per_class,
     }
 
-def compute_accuracy(predictions, references):
-    """Compute accuracy and other metrics"""
-    # Filter out invalid predictions
-    valid_indices = [i for i, pred in enumerate(predictions) if pred != -1]
+def compute_accuracy(predictions, references=None, per_class=False):
+    """
+    Compute accuracy and other metrics.
 
-    if not valid_indices:
-        return {
-            'accuracy': 0.0,
-            'valid_predictions': 0,
-            'total_samples': len(predictions),
-            'correct_predictions': 0
-        }
+    Args:
+        predictions: List of predicted classes (-1 for invalid predictions), or a
+            ``ResultsStore`` providing both predictions and references
+        references: List of true/reference classes
+        per_class: Also return the ``confusion_matrix`` array, its ``classes`` and
+            a ``per_class`` metrics DataFrame (see ``per_class_metrics``)
 
-    valid_predictions = [predictions[i] for i in valid_indices]
-    valid_references = [references[i] for i in valid_indices]
+    Returns:
+        dict: accuracy (over valid predictions), valid_predictions, total_samples,
+        correct_predictions and invalid_rate
 
-    correct = sum(1 for p, r in zip(valid_predictions, valid_references) if p == r)
-    accuracy = correct / len(valid_predictions)
+    Raises:
+        ValueError: If a reference is missing (NaN or None)
+    """
+    if isinstance(predictions, ResultsStore):
+        results = predictions.results()
+        predictions, references = results['predictions'], results['references']
+    matrix, invalid, classes = confusion_matrix(predictions, references)
+    total = len(predictions)
+    valid_predictions = int(matrix.sum())
+    correct = int(np.trace(matrix))
 
-    return {
-        'accuracy': accuracy,
-        'valid_predictions': len(valid_predictions),
-        'total_samples': len(predictions),
-        'correct_predictions': correct
-    }
\ No newline at end of file
+    result = {
+        'accuracy': correct / valid_predictions if valid_predictions else 0.0,
+        'valid_predictions': valid_predictions,
+        'total_samples': total,
+        'correct_predictions': correct,
+        'invalid_rate': (total - valid_predictions) / total if total else 0.0,
+    }
+    if per_class:
+        result['confusion_matrix'] = matrix
+        result['classes'] = classes
+        result['per_class'] = per_class_metrics(matrix, invalid, classes)
+    return result
@@ -0,0 +1,202 @@
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from .compute_accuracy import INVALID
+from .preprocess import preprocess
+
+
+def _label_array(labels) -> np.ndarray:
+    """Array of parsed labels; object dtype if any label is a string, so -1 stays an integer."""
+    return np.array(labels, dtype=object if any(isinstance(label, str) for label in labels) else None)
+
+
+class AnswerParser:
+    """
+    Map generated text to class labels with a single precompiled regular expression.
+
+    Every class is matched by its name (or the given aliases) as a whole word.
+    Answers mentioning exactly one class are mapped to it; answers mentioning
+    none or several different classes are invalid (-1), as expected by
+    ``compute_accuracy`` and ``analyze_errors``.
+
+    Example:
+        >>> parser = AnswerParser({'benign': ['benign', 'non-cancerous'], 'malignant': ['malignant', 'cancer']})
+        >>> parser("The lesion is most likely malignant.")
+        'malignant'
+    """
+
+    def __init__(self, classes, case_sensitive: bool = False):
+        """
+        Args:
+            classes: Class labels, or a dict mapping each label to the strings that denote it
+            case_sensitive: Match case-sensitively (default: False)
+        """
+        if not isinstance(classes, dict):
+            classes = {label: [str(label)] for label in classes}
+        self.classes = list(classes)
+        self._labels = {}
+        for label, aliases in classes.items():
+            for alias in ([aliases] if isinstance(aliases, str) else aliases):
+                key = alias if case_sensitive else alias.lower()
+                if self._labels.get(key, label) != label:
+                    raise ValueError(f"Alias {alias!r} is used for more than one class")
+                self._labels[key] = label
+        self.case_sensitive = case_sensitive
+        # Longest aliases first so that e.g. "non-cancerous" wins over "cancerous"
+        alternatives = sorted(self._labels, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(a) for a in alternatives) + r")(?!\w)",
+            0 if case_sensitive else re.IGNORECASE,
+        )
+
+    def __call__(self, text: str):
+        """Label of the class mentioned in ``text``, or -1 if none or several are mentioned."""
+        found = {self._labels[m if self.case_sensitive else m.lower()] for m in self._pattern.findall(text or "")}
+        if len(found) != 1:
+            return INVALID
+        return found.pop()
+
+    def parse(self, texts) -> np.ndarray:
+        """Labels of many generated texts (see ``__call__``)."""
+        return _label_array([self(text) for text in texts])
+
+
+def build_prompt(image, question: str, system_prompt: str = None) -> list:
+    """
+    Chat messages for one image, in the layout the other MedGemma helpers expect.
+
+    The user message is the second message and its last content item is the
+    image, i.e. ``messages[1]['content'][-1]['image']``.
+
+    Args:
+        image: PIL image
+        question: User prompt text
+        system_prompt: Optional system prompt
+
+    Returns:
+        list: ``[system message, user message]``
+    """
+    return [
+        {'role': 'system', 'content': [{'type': 'text', 'text': system_prompt or ''}]},
+        {'role': 'user', 'content': [{'type': 'text', 'text': question}, {'type': 'image', 'image': image}]},
+    ]
+
+
+def _generated_text(output) -> str:
+    """Generated text of one generation result (string, pipeline dict or pipeline list)."""
+    if isinstance(output, list):
+        output = output[0]
+    if isinstance(output, dict):
+        output = output['generated_text']
+    return output if isinstance(output, str) else str(output)
+
+
+def run_evaluation(generate, df, question, parser, image_column='ImagePath', label_column='Pathology',
+                   img_base_path='', system_prompt=None, batch_size=8, num_threads=4, prefetch_batches=2,
+                   target_size=None, keep_images=True, store=None, id_column=None):
+    """
+    Evaluate a generation callable on a DataFrame of images, keeping the model busy.
+
+    Images are loaded, converted with ``preprocess`` and wrapped into prompts
+    on a thread pool while the model works on earlier batches. Generated texts
+    are mapped to labels with ``parser``.
+
+    Args:
+        generate: Callable taking a list of chat message lists (see ``build_prompt``) and
+            returning one result per prompt: a string, ``{'generated_text': ...}`` or a
+            pipeline-style ``[{'generated_text': ...}]``; e.g.
+            ``lambda msgs: pipe(text=msgs, max_new_tokens=20, return_full_text=False)``
+        df: DataFrame with one row per sample
+        question: Prompt text, or a callable mapping a DataFrame row to the prompt text
+        parser: ``AnswerParser`` (or any callable mapping text to a label or -1)
+        image_column: Column with the image paths
+        label_column: Column with the reference labels (None if there are none)
+        img_base_path: Prefix of the image paths
+        system_prompt: Optional system prompt
+        batch_size: Prompts per ``generate`` call
+        num_threads: Threads for loading images and building prompts
+        prefetch_batches: Number of batches prepared ahead of the model
+        target_size: Optional ``target_size`` for ``preprocess``
+        keep_images: Keep the images in ``outputs`` (needed by ``display_prediction``);
+            disable for large runs to bound memory
+        store: Optional ``ResultsStore``; samples whose ids it already holds are skipped
+            and every batch is appended to it as soon as it is parsed
+        id_column: Column with the sample ids for ``store`` (default: the image path)
+
+    Returns:
+        dict: Dictionary with keys:
+              - outputs: per sample ``[{'input_text': messages, 'generated_text': text}]``,
+                as returned by the transformers pipeline
+              - generated_text: list of generated texts
+              - predictions: array of parsed labels (-1 for invalid answers)
+              - references: array of reference labels (None without ``label_column``)
+              - meta: ``df`` with a fresh index, aligned with the predictions (only the
+                samples run now when resuming from a ``store``; see ``ResultsStore.results``)
+              - timing: seconds spent in ``generate`` and waiting for preprocessing
+    """
+    meta = df.reset_index(drop=True)
+    if store is not None:
+        ids = meta[id_column if id_column is not None else image_column]
+        meta = meta[~ids.isin(store.done_ids())].reset_index(drop=True)
+        ids = meta[id_column if id_column is not None else image_column].tolist()
+    paths = (img_base_path + meta[image_column].astype(str)).tolist()
+    rows = meta.to_dict('records') if callable(question) else None
+
+    def prepare(i):
+        with Image.open(paths[i]) as image:
+            image = preprocess(image, target_size=target_size)
+        text = question(rows[i]) if callable(question) else question
+        return build_prompt(image, text, system_prompt)
+
+    batches = [range(start, min(start + batch_size, len(meta))) for start in range(0, len(meta), batch_size)]
+    outputs, texts, labels = [], [], []
+    timing = {'generate_s': 0.0, 'wait_s': 0.0}
+    with ThreadPoolExecutor(num_threads) as pool:
+        pending = deque()
+        for batch in batches[:prefetch_batches + 1]:
+            pending.append([pool.submit(prepare, i) for i in batch])
+        for n in range(len(batches)):
+            start = time.perf_counter()
+            messages = [future.result() for future in pending.popleft()]
+            timing['wait_s'] += time.perf_counter() - start
+            if n + prefetch_batches + 1 < len(batches):
+                pending.append([pool.submit(prepare, i) for i in batches[n + prefetch_batches + 1]])
+
+            start = time.perf_counter()
+            results = generate(messages)
+            timing['generate_s'] += time.perf_counter() - start
+            if len(results) != len(messages):
+                raise ValueError(f"generate returned {len(results)} results for {len(messages)} prompts")
+
+            batch_texts = [_generated_text(result) for result in results]
+            for message, text in zip(messages, batch_texts):
+                if not keep_images:
+                    message[1]['content'][-1]['image'] = None
+                outputs.append([{'input_text': message, 'generated_text': text}])
+            # Each text is parsed once; the labels go to the store and the returned predictions
+            batch_labels = [parser(text) for text in batch_texts]
+            texts.extend(batch_texts)
+            labels.extend(batch_labels)
+
+            if store is not None:
+                batch = batches[n]
+                store.add_many(
+                    ids[batch.start:batch.stop], batch_texts, batch_labels,
+                    None if label_column is None else meta[label_column].iloc[batch.start:batch.stop].tolist(),
+                    meta.iloc[batch.start:batch.stop].to_dict('records'),
+                )
+
+    predictions = _label_array(labels)
+    return {
+        'outputs': outputs,
+        'generated_text': texts,
+        'predictions': predictions,
+        'references': meta[label_column].to_numpy() if label_column is not None else None,
+        'meta': meta,
+        'timing': timing,
+    }
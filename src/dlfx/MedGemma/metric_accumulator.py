@@ -0,0 +1,221 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from .compute_accuracy import _check_references, _invalid_mask, confusion_matrix, per_class_metrics
+
+# Columns of the per-subgroup counts
+_SUBGROUP_FIELDS = ('total', 'valid', 'correct', 'invalid')
+
+
+def _python_value(value):
+    """Convert NumPy scalars to plain Python values for JSON and dict keys."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class MetricAccumulator:
+    """
+    Streaming accumulator of classification counts.
+
+    Feed predictions batch by batch with ``update``; only the confusion
+    matrix, per-class invalid (-1) counts and optional per-subgroup counts are
+    kept, so memory does not grow with the number of samples. Accumulators
+    from different processes or shards are combined with ``merge`` and can be
+    saved with ``to_dict``/``save`` and restored with ``from_dict``/``load``.
+
+    Example:
+        >>> acc = MetricAccumulator()
+        >>> for batch in batches:
+        ...     acc.update(batch.predictions, batch.references, groups={'Pathology': batch.pathology})
+        >>> acc.compute()['accuracy']
+    """
+
+    def __init__(self, classes=None):
+        """
+        Args:
+            classes: Optional initial class labels; labels seen later are appended
+        """
+        self.classes = []
+        self._positions = {}
+        self.matrix = np.zeros((0, 0), dtype=np.int64)
+        self.invalid = np.zeros(0, dtype=np.int64)
+        # {group column: {group value: [total, valid, correct, invalid]}}
+        self.subgroups = {}
+        if classes is not None:
+            self._add_classes(classes)
+
+    def _add_classes(self, labels):
+        new = [label for label in (_python_value(v) for v in labels) if label not in self._positions]
+        if not new:
+            return
+        for label in new:
+            self._positions[label] = len(self.classes)
+            self.classes.append(label)
+        k = len(self.classes)
+        matrix = np.zeros((k, k), dtype=np.int64)
+        old = self.matrix.shape[0]
+        matrix[:old, :old] = self.matrix
+        self.matrix = matrix
+        self.invalid = np.concatenate([self.invalid, np.zeros(k - old, dtype=np.int64)])
+
+    def update(self, predictions, references, groups=None):
+        """
+        Add a batch of predictions.
+
+        Args:
+            predictions: Predicted classes (-1 for invalid predictions)
+            references: True/reference classes
+            groups: Optional mapping (or DataFrame) of subgroup column to one value
+                per sample, e.g. ``{'Pathology': meta.Pathology}``
+
+        Returns:
+            MetricAccumulator: self
+
+        Raises:
+            ValueError: If a reference is missing (NaN or None); nothing is added
+        """
+        predictions = np.asarray(predictions)
+        references = np.asarray(references)
+        _check_references(references)
+        invalid_mask = _invalid_mask(predictions)
+        self._add_classes(pd.unique(np.concatenate([references, predictions[~invalid_mask]])))
+
+        matrix, invalid, _ = confusion_matrix(predictions, references, classes=self._classes_array())
+        self.matrix += matrix
+        self.invalid += invalid
+
+        if groups is not None:
+            correct = ~invalid_mask & (predictions == references)
+            columns = groups.items() if isinstance(groups, dict) else ((c, groups[c]) for c in groups.columns)
+            for column, values in columns:
+                values, codes = np.unique(np.asarray(values), return_inverse=True)
+                codes = codes.reshape(-1)
+                k = len(values)
+                counts = np.stack([
+                    np.bincount(codes, minlength=k),
+                    np.bincount(codes, weights=~invalid_mask, minlength=k),
+                    np.bincount(codes, weights=correct, minlength=k),
+                    np.bincount(codes, weights=invalid_mask, minlength=k),
+                ], axis=1).astype(np.int64)
+                column_counts = self.subgroups.setdefault(column, {})
+                for value, row in zip(values, counts):
+                    value = _python_value(value)
+                    column_counts[value] = np.add(column_counts.get(value, 0), row)
+        return self
+
+    def _classes_array(self):
+        return pd.Index(self.classes).to_numpy() if self.classes else np.array([])
+
+    def _sorted_counts(self):
+        """Matrix, invalid counts and classes in sorted class order (first-seen order if unsortable)."""
+        classes = self._classes_array()
+        try:
+            order = np.argsort(classes, kind="stable")
+        except TypeError:
+            order = np.arange(len(classes))
+        return self.matrix[np.ix_(order, order)], self.invalid[order], classes[order]
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """Add the counts of ``other`` (e.g. from another worker or shard) to this accumulator."""
+        self._add_classes(other.classes)
+        positions = np.array([self._positions[label] for label in other.classes], dtype=np.int64)
+        if len(positions):
+            self.matrix[np.ix_(positions, positions)] += other.matrix
+            np.add.at(self.invalid, positions, other.invalid)
+        for column, values in other.subgroups.items():
+            column_counts = self.subgroups.setdefault(column, {})
+            for value, row in values.items():
+                column_counts[value] = np.add(column_counts.get(value, 0), row)
+        return self
+
+    @property
+    def total(self) -> int:
+        """Number of samples seen."""
+        return int(self.matrix.sum() + self.invalid.sum())
+
+    @property
+    def accuracy(self) -> float:
+        """Running accuracy over valid predictions."""
+        valid = self.matrix.sum()
+        return float(np.trace(self.matrix) / valid) if valid else 0.0
+
+    def compute(self) -> dict:
+        """
+        Metrics in the format of ``compute_accuracy(..., per_class=True)``.
+
+        Returns:
+            dict: accuracy, valid_predictions, total_samples, correct_predictions,
+            invalid_rate, confusion_matrix, classes and per_class
+        """
+        matrix, invalid, classes = self._sorted_counts()
+        valid = int(matrix.sum())
+        total = self.total
+        correct = int(np.trace(matrix))
+        return {
+            'accuracy': correct / valid if valid else 0.0,
+            'valid_predictions': valid,
+            'total_samples': total,
+            'correct_predictions': correct,
+            'invalid_rate': (total - valid) / total if total else 0.0,
+            'confusion_matrix': matrix,
+            'classes': classes,
+            'per_class': per_class_metrics(matrix, invalid, classes),
+        }
+
+    def subgroup_metrics(self) -> pd.DataFrame:
+        """
+        Per-subgroup counts and accuracy (correct / total, invalid predictions count as wrong).
+
+        Returns:
+            pd.DataFrame: Indexed by (group, value) with total, valid, correct, invalid,
+            accuracy and invalid_rate columns
+        """
+        rows, index = [], []
+        for column, values in self.subgroups.items():
+            for value, row in values.items():
+                index.append((column, value))
+                rows.append(row)
+        df = pd.DataFrame(np.array(rows, dtype=np.int64).reshape(-1, len(_SUBGROUP_FIELDS)),
+                          columns=list(_SUBGROUP_FIELDS),
+                          index=pd.MultiIndex.from_tuples(index, names=['group', 'value']) if index else None)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df['accuracy'] = df['correct'] / df['total']
+            df['invalid_rate'] = df['invalid'] / df['total']
+        return df
+
+    def to_dict(self) -> dict:
+        """JSON-serializable state."""
+        return {
+            'classes': list(self.classes),
+            'matrix': self.matrix.tolist(),
+            'invalid': self.invalid.tolist(),
+            'subgroups': {
+                column: [[value, np.asarray(row).tolist()] for value, row in values.items()]
+                for column, values in self.subgroups.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "MetricAccumulator":
+        """Restore an accumulator saved with ``to_dict``."""
+        accumulator = cls(state['classes'])
+        k = len(accumulator.classes)
+        accumulator.matrix = np.array(state['matrix'], dtype=np.int64).reshape(k, k)
+        accumulator.invalid = np.array(state['invalid'], dtype=np.int64)
+        accumulator.subgroups = {
+            column: {value: np.array(row, dtype=np.int64) for value, row in values}
+            for column, values in state['subgroups'].items()
+        }
+        return accumulator
+
+    def save(self, path: str):
+        """Write the state to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "MetricAccumulator":
+        """Read an accumulator written by ``save``."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -1,16 +1,23 @@
 import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
 import numpy as np
 from math import ceil, sqrt
 import os
-from PIL import Image
 
-def plot_images_grid(image_paths, titles=None, cols=None, figsize=None, 
-                    cmap='gray', title_fontsize=10, suptitle=None, 
-                    use_filename_as_title=False):
+from ..mosaic import build_mosaic, show_mosaic, write_mosaic
+from ..thumbnails import default_thumbnail_loader
+
+def plot_images_grid(image_paths, titles=None, cols=None, figsize=None,
+                    cmap='gray', title_fontsize=10, suptitle=None,
+                    use_filename_as_title=False, max_size=512, to_8bit=False,
+                    loader=None, mosaic=False, tile_size=256, mosaic_path=None):
     """
     Plot multiple images in a grid layout using matplotlib from file paths.
-    
+
+    Images are loaded in parallel and decoded straight to thumbnail size
+    (files PIL cannot read fall back to ``matplotlib.image.imread``).
+    Thumbnails are kept in an in-memory LRU cache, so plotting the same paths
+    again is instant.
+
     Parameters:
     -----------
     image_paths : list of str
@@ -30,57 +37,71 @@ def plot_images_grid(image_paths, titles=None, cols=None, figsize=None,
         Main title for the entire figure.
     use_filename_as_title : bool, optional
         If True and titles is None, use filenames as titles. Default is False.
-    
+    max_size : int, optional
+        Bound on the longer side of each displayed image. Default is 512, so
+        larger images are now shown downsampled; pass None to display them at
+        full resolution as before.
+    to_8bit : bool, optional
+        Convert images to 8-bit RGB with per-image min-max scaling (as in
+        ``preprocess``). Default is False.
+    loader : ThumbnailLoader, optional
+        Loader (and cache) to use. Default is the shared process-wide loader.
+    mosaic : bool, optional
+        Paste all images into one canvas drawn with a single ``imshow``, with
+        titles rendered into the canvas (see ``dlfx.mosaic``). Much faster than
+        one subplot per image for hundreds of images. Default is False.
+    tile_size : int, optional
+        Tile size in pixels in mosaic mode. Default is 256.
+    mosaic_path : str, optional
+        In mosaic mode, also write the canvas to this PNG file and the titles
+        and tile positions to a sidecar CSV next to it.
+
     Returns:
     --------
-    fig, axes : matplotlib figure and axes objects
+    fig, axes : matplotlib figure and axes objects (a single axes in mosaic mode)
     """
-    
+
     if len(image_paths) == 0:
         raise ValueError("No image paths provided")
-    
-    # Load images from file paths
-    images = []
-    for path in image_paths:
-        if not os.path.exists(path):
-            print(f"Warning: File not found: {path}")
-            continue
-            
-        try:
-            # Try to load with PIL first (more robust)
-            img = Image.open(path)
-            img_array = np.array(img)
-            images.append(img_array)
-        except Exception as e:
-            try:
-                # Fallback to matplotlib
-                img = mpimg.imread(path)
-                images.append(img)
-            except Exception as e2:
-                print(f"Error loading {path}: {e2}")
-                continue
-    
+
+    # Load thumbnails in parallel; files that cannot be loaded are reported and skipped
+    loader = loader or default_thumbnail_loader()
+    if mosaic and (max_size is None or max_size > tile_size):
+        max_size = tile_size
+    loaded = loader.load_many(image_paths, max_size=max_size, to_8bit=to_8bit)
+    kept = [i for i, img in enumerate(loaded) if img is not None]
+    images = [loaded[i] for i in kept]
+
     if len(images) == 0:
         raise ValueError("No valid images could be loaded")
-    
+
     n_images = len(images)
-    
+
     # Generate titles from filenames if requested
     if titles is None and use_filename_as_title:
-        titles = [os.path.basename(path) for path in image_paths[:n_images]]
-    
+        titles = [os.path.basename(image_paths[i]) for i in kept]
+    elif titles is not None and len(titles) == len(image_paths):
+        # Keep titles aligned with the images that were loaded
+        titles = [titles[i] for i in kept]
+
+    if mosaic:
+        canvas, layout = build_mosaic(images, titles=titles, tile_size=tile_size, cols=cols)
+        if mosaic_path is not None:
+            write_mosaic(canvas, layout, mosaic_path)
+        return show_mosaic(canvas, figsize=figsize, suptitle=suptitle)
+
     # Calculate grid dimensions
     if cols is None:
         cols = ceil(sqrt(n_images))
     rows = ceil(n_images / cols)
-    
+
     # Calculate figure size if not provided
     if figsize is None:
         figsize = (cols * 3, rows * 3)
-    
+
     # Create figure and subplots
     fig, axes = plt.subplots(rows, cols, figsize=figsize)
-    
+
     # Handle single subplot case
     if n_images == 1:
         axes = [axes]
@@ -88,11 +109,11 @@ def plot_images_grid(image_paths, titles=None, cols=None, figsize=None,
         axes = axes.flatten()
     else:
         axes = axes.flatten()
-    
+
     # Plot each image
     for i in range(n_images):
         img = images[i]
-        
+
         # Determine if image is grayscale or color
         if len(img.shape) == 2 or (len(img.shape) == 3 and img.shape[2] == 1):
             # Grayscale image
@@ -100,22 +121,22 @@ def plot_images_grid(image_paths, titles=None, cols=None, figsize=None,
         else:
             # Color image
             axes[i].imshow(img)
-        
+
         # Add title if provided
         if titles is not None and i < len(titles):
             axes[i].set_title(titles[i], fontsize=title_fontsize)
-        
+
         # Remove axis ticks
         axes[i].set_xticks([])
         axes[i].set_yticks([])
-    
+
     # Hide unused subplots
     for i in range(n_images, len(axes)):
         axes[i].axis('off')
-    
+
     # Add main title if provided
     if suptitle:
         fig.suptitle(suptitle, fontsize=16)
-    
+
     plt.tight_layout()
-    return fig, axes
\ No newline at end of file
+    return fig, axes
@@ -0,0 +1,219 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import socket
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+SEGMENT_PATTERN = "results-*.jsonl"
+
+
+def config_hash(config) -> str:
+    """Stable short hash of a prompt/model configuration (any JSON-serializable value)."""
+    if not isinstance(config, str):
+        config = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(config.encode()).hexdigest()[:16]
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+class ResultsStore:
+    """
+    Append-only, crash-safe store of evaluation results.
+
+    Every record is keyed by a sample id and the hash of the configuration
+    (prompt, model, parser, ...) that produced it. Each writer appends
+    line-buffered JSON lines to its own segment file, so parallel shards can
+    write to the same directory without locking and a crash loses at most
+    the line being written (truncated lines are ignored on reading). Rerunning
+    an evaluation skips the ids already stored for its configuration.
+
+    ``compute_accuracy`` and ``analyze_errors`` accept a store in place of
+    ``predictions``.
+
+    Example:
+        >>> store = ResultsStore("results/", config={"prompt": question, "model": model_id})
+        >>> run_evaluation(generate, df, question, parser, store=store)  # resumes after a crash
+        >>> compute_accuracy(store)
+    """
+
+    def __init__(self, directory: str, config=None, fsync: bool = False):
+        """
+        Args:
+            directory: Store directory (created if needed)
+            config: Configuration the results belong to; results of other configurations
+                in the same directory are kept but ignored
+            fsync: Call ``os.fsync`` after every write (survives power loss, slower)
+        """
+        self.directory = directory
+        self.config = config_hash(config if config is not None else "")
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+
+    def _segment(self):
+        """This writer's segment file, opened on first write."""
+        if self._file is None:
+            name = f"results-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+            self._file = open(os.path.join(self.directory, name), "a", buffering=1)
+        return self._file
+
+    def __getstate__(self):
+        # Each process writes its own segment
+        state = self.__dict__.copy()
+        state['_file'] = None
+        return state
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, sample_id, generated_text, prediction, reference=None, meta=None):
+        """
+        Append one result.
+
+        Args:
+            sample_id: Sample identifier, a string or integer (e.g. image path or accession number)
+            generated_text: Raw model output
+            prediction: Parsed label (-1 for invalid)
+            reference: Optional reference label
+            meta: Optional dict of metadata (e.g. the DataFrame row)
+        """
+        self.add_many([sample_id], [generated_text], [prediction],
+                      None if reference is None else [reference], None if meta is None else [meta])
+
+    def add_many(self, sample_ids, generated_texts, predictions, references=None, metas=None):
+        """Append a batch of results with a single write (see ``add``)."""
+        now = time.time()
+        lines = []
+        for i, sample_id in enumerate(sample_ids):
+            record = {
+                'id': sample_id,
+                'config': self.config,
+                'generated_text': generated_texts[i],
+                'prediction': predictions[i],
+                'reference': None if references is None else references[i],
+                'meta': None if metas is None else metas[i],
+                'time': now,
+            }
+            lines.append(json.dumps(record, default=_json_default) + "\n")
+        f = self._segment()
+        f.write("".join(lines))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def segments(self) -> list:
+        """Segment files in the store."""
+        return sorted(glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)))
+
+    def records(self, all_configs: bool = False):
+        """
+        Iterate over the stored records (of this configuration unless ``all_configs``).
+
+        Lines that cannot be parsed (a write interrupted by a crash) are skipped.
+        """
+        for path in self.segments():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if all_configs or record.get('config') == self.config:
+                        yield record
+
+    def done_ids(self) -> set:
+        """Ids that already have a result for this configuration."""
+        return {record['id'] for record in self.records()}
+
+    def load(self) -> pd.DataFrame:
+        """
+        Results of this configuration, one row per id (the latest if an id was stored twice).
+
+        Returns:
+            pd.DataFrame: id, generated_text, prediction, reference, meta and time columns,
+            ordered by write time
+        """
+        columns = ['id', 'generated_text', 'prediction', 'reference', 'meta', 'time']
+        df = pd.DataFrame(list(self.records()), columns=columns + ['config'])[columns]
+        return df.sort_values('time', kind='stable').drop_duplicates('id', keep='last').reset_index(drop=True)
+
+    def results(self) -> dict:
+        """
+        Stored results in the format of ``run_evaluation``.
+
+        Returns:
+            dict: ``outputs`` (pipeline-style, without images), ``generated_text``,
+            ``predictions``, ``references`` and ``meta`` (the stored metadata with an
+            ``id`` column)
+        """
+        df = self.load()
+        meta = pd.DataFrame([m or {} for m in df['meta']])
+        meta.insert(0, 'id', df['id'].to_numpy())
+        predictions = df['prediction'].tolist()
+        return {
+            'outputs': [[{'generated_text': text}] for text in df['generated_text']],
+            'generated_text': df['generated_text'].tolist(),
+            'predictions': np.array(predictions, dtype=object if any(isinstance(p, str) for p in predictions) else None),
+            'references': df['reference'].to_numpy(),
+            'meta': meta,
+        }
+
+    def merge(self, other_directory: str) -> int:
+        """
+        Copy the segments of another store (e.g. a shard written on another machine) into this one.
+
+        Segments are copied if they are missing here or have grown since they were
+        last copied, so merging repeatedly from a running shard is safe.
+
+        Returns:
+            int: Number of segment files copied
+        """
+        copied = 0
+        for path in glob.glob(os.path.join(other_directory, SEGMENT_PATTERN)):
+            target = os.path.join(self.directory, os.path.basename(path))
+            if not os.path.exists(target) or os.path.getsize(target) < os.path.getsize(path):
+                shutil.copyfile(path, target + ".tmp")
+                os.replace(target + ".tmp", target)
+                copied += 1
+        return copied
+
+    def compact(self):
+        """
+        Rewrite all segments into one, keeping the latest record per (config, id).
+
+        Only call this while no other process is writing to the store.
+        """
+        self.close()
+        latest = {}
+        for record in self.records(all_configs=True):
+            key = (record.get('config'), json.dumps(record['id'], default=_json_default))
+            if key not in latest or record['time'] >= latest[key]['time']:
+                latest[key] = record
+        old = self.segments()
+        f = self._segment()
+        f.writelines(json.dumps(record, default=_json_default) + "\n" for record in latest.values())
+        f.flush()
+        os.fsync(f.fileno())
+        self.close()
+        for path in old:
+            os.remove(path)
@@ -1,88 +1,246 @@
+import io
+from contextlib import nullcontext
+import numpy as np
 import torch
 from torch.utils.data import Dataset
 from typing import List, Optional, Union
-from utils.preprocess import convert_to_8bit_3channel
+from .cache import PixelValuesCache, processor_config
+from .collate import image_processor_params, resize_to_uint8
+from .preprocess import convert_to_8bit_3channel
+from ..image import draft_to_target
 from transformers import AutoProcessor
 from PIL import Image
 
+def process_image(processor, image, max_length=None):
+    """Run a SigLIP processor on one image and drop the batch dimension."""
+    # Prepare processor arguments for image preprocessing
+    processor_kwargs = {
+        "images": image,
+        "padding": "max_length",  # Ensure consistent tensor sizes
+        "return_tensors": "pt"    # Return PyTorch tensors
+    }
+
+    # Add max_length if specified (for text processing compatibility)
+    if max_length is not None:
+        processor_kwargs["max_length"] = max_length
+
+    # Process the image through SigLIP processor
+    inputs = processor(**processor_kwargs)
+
+    # Remove batch dimension added by processor (DataLoader will add it back)
+    return {
+        key: tensor.squeeze(0) for key, tensor in inputs.items()
+    }
+
+
+def label_tensor(label):
+    """Convert a label to a tensor with at least one dimension."""
+    lbl = torch.tensor(label)
+    if lbl.dim()==0:
+        return torch.unsqueeze(lbl, -1)
+    return lbl
+
+
 class MedSigLIPDataset(Dataset):
     """
     PyTorch Dataset for SigLIP model preprocessing.
     Handles image loading and preprocessing using the SigLIP processor.
     """
-    
+
     def __init__(
-        self, 
-        image_paths: List[str], 
+        self,
+        image_paths: List[str],
         labels: Optional[List] = None,
         processor_name: str = "google/medsiglip-448",
-        max_length: Optional[int] = None
+        max_length: Optional[int] = None,
+        target_size: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
+        cache_dtype: str = "float16",
+        processor=None,
+        return_raw: bool = False,
+        return_uint8: bool = False,
+        readahead=None,
+        profiler=None
     ):
         """
         Initialize the dataset with image paths and optional labels.
-        
+
         Args:
             image_paths: List of paths to medical image files
             labels: Optional list of labels corresponding to images
             processor_name: HuggingFace model identifier for the processor
             max_length: Maximum sequence length for padding (if needed)
+            target_size: Optional size (e.g. 448) to downsample images towards
+                before 8-bit conversion, so only the small image is normalized
+            cache_dir: Optional directory to cache processed pixel values in.
+                Later epochs read them memory-mapped instead of decoding again.
+            cache_max_bytes: Optional size bound for the cache (LRU eviction)
+            cache_dtype: Floating point storage dtype for cached pixel values (ignored
+                with ``return_raw``/``return_uint8``, which always cache uint8)
+            processor: Optional already loaded processor, shared instead of loading
+                ``processor_name`` again
+            return_raw: If True, ``__getitem__`` returns the 8-bit RGB image as a
+                uint8 array under ``'image'`` and no processor is loaded; use
+                ``SigLIPCollator`` to process whole batches at once
+            return_uint8: If True, ``'pixel_values'`` is the image resized to the
+                processor's input size as a uint8 ``(3, H, W)`` tensor; normalize
+                whole batches in the main process with ``BatchNormalizer``
+            readahead: Optional ``Readahead`` that prefetches upcoming files in the
+                background (use with ``ReadaheadSampler``); images are then
+                decoded from memory
+            profiler: Optional ``PipelineProfiler`` recording per-stage timings
+                (read, decode, to_8bit, process, cache_read) and bytes read
         """
         self.image_paths = image_paths
         self.labels = labels
-        self.processor = AutoProcessor.from_pretrained(processor_name)
+        self.return_raw = return_raw
+        if processor is None and not return_raw:
+            processor = AutoProcessor.from_pretrained(processor_name)
+        self.processor = None if return_raw else processor
         self.max_length = max_length
-        
+        self.target_size = target_size
+        self.readahead = readahead
+        self.profiler = profiler
+        self.return_uint8 = return_uint8 and not return_raw
+        self._uint8_params = image_processor_params(self.processor) if self.return_uint8 else None
+
+        self.cache = None
+        if cache_dir is not None:
+            if return_raw:
+                # Raw images only depend on how they were decoded and reduced
+                config = processor_config(None, target_size=target_size, **self._decode_settings())
+                cache_dtype = "uint8"
+            elif self.return_uint8:
+                # Resized uint8 images only depend on the processor's input size and filter
+                config = processor_config(self.processor, target_size=target_size, return_uint8=True,
+                                          **self._decode_settings())
+                cache_dtype = "uint8"
+            else:
+                if np.dtype(cache_dtype).kind not in "fc":
+                    # Normalized pixel values lie in [-1, 1] and do not survive an integer cast
+                    raise ValueError(
+                        f"cache_dtype must be a floating point dtype for normalized pixel values, got "
+                        f"{cache_dtype!r}; use return_raw or return_uint8 to cache 8-bit images"
+                    )
+                config = processor_config(
+                    self.processor,
+                    processor_name=processor_name,
+                    max_length=max_length,
+                    target_size=target_size,
+                    **self._decode_settings(),
+                )
+            self.cache = PixelValuesCache(cache_dir, config=config, max_bytes=cache_max_bytes, dtype=cache_dtype)
+
         # Validate that paths and labels match if labels provided
         if labels is not None and len(image_paths) != len(labels):
             raise ValueError("Number of image paths must match number of labels")
-    
+
     def __len__(self):
         """Return the total number of images in the dataset."""
         return len(self.image_paths)
-    
+
+    def _load_image(self, idx):
+        """Load the image at ``idx`` as an 8-bit RGB PIL image."""
+        image_path = self.image_paths[idx]
+        try:
+            if self.readahead is not None or self.profiler is not None:
+                # Read the whole file up front so I/O and decoding are timed separately
+                with self._stage("read") as record:
+                    if self.readahead is not None:
+                        data = self.readahead.get(idx, self.image_paths)
+                    else:
+                        with open(image_path, "rb") as f:
+                            data = f.read()
+                    record['bytes'] = len(data)
+                with self._stage("decode"):
+                    image = Image.open(io.BytesIO(data))
+                    if self.target_size is not None:
+                        # draft only takes effect before the pixels are loaded
+                        image = draft_to_target(image, self.target_size, reduce=False)
+                    image.load()
+            else:
+                image = Image.open(image_path)
+            # Convert grayscale medical images to RGB format for model compatibility
+            with self._stage("to_8bit"):
+                return convert_to_8bit_3channel(image, target_size=self.target_size)
+        except Exception as e:
+            raise RuntimeError(f"Error loading image {image_path}: {e}")
+
+    def _stage(self, name):
+        """Time a pipeline stage if a profiler is set."""
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext({})
+
+    def _process(self, image):
+        """Run the SigLIP processor on one image and drop the batch dimension."""
+        with self._stage("process"):
+            if self.return_uint8:
+                params = self._uint8_params
+                return {'pixel_values': resize_to_uint8(image, params['size'], params['resample'])}
+            return process_image(self.processor, image, self.max_length)
+
+    def _pixel_tensor(self, array):
+        pixel_values = torch.from_numpy(array)
+        return pixel_values if self.return_uint8 else pixel_values.float()
+
+    def _decode_settings(self) -> dict:
+        """Settings of ``_load_image`` that affect the cached arrays, for subclasses that decode differently."""
+        return {}
+
+    def _cache_key(self, idx) -> str:
+        """Extra cache key for ``idx``, for datasets with several samples per file."""
+        return ""
+
+    def _load_raw(self, idx):
+        """Return the 8-bit RGB image at ``idx`` as a uint8 array, using the cache if enabled."""
+        image_path = self.image_paths[idx]
+        if self.cache is not None:
+            with self._stage("cache_read"):
+                image = self.cache.get(image_path, self._cache_key(idx))
+            if image is not None:
+                return image
+
+        image = np.asarray(self._load_image(idx))
+        if self.cache is not None:
+            self.cache.put(image_path, image, self._cache_key(idx))
+        return image
+
+    def _process_cached(self, idx):
+        """Return processed tensors for ``idx``, reading and filling the cache if enabled."""
+        if self.return_raw:
+            return {'image': self._load_raw(idx)}
+
+        image_path = self.image_paths[idx]
+        if self.cache is not None:
+            with self._stage("cache_read"):
+                pixel_values = self.cache.get(image_path, self._cache_key(idx))
+            if pixel_values is not None:
+                return {'pixel_values': self._pixel_tensor(pixel_values)}
+
+        processed_data = self._process(self._load_image(idx))
+
+        if self.cache is not None:
+            stored = self.cache.put(image_path, processed_data['pixel_values'].numpy(), self._cache_key(idx))
+            if stored is not None:
+                # Return what later epochs will read so every epoch sees the same values
+                processed_data['pixel_values'] = self._pixel_tensor(stored)
+        return processed_data
+
     def __getitem__(self, idx):
         """
         Load and preprocess a single medical image.
-        
+
         Returns:
-            Dict containing processed tensors, optional label, and file path
+            Dict containing processed tensors (or the raw uint8 ``'image'`` with
+            ``return_raw=True``), optional label, and file path
         """
-        # Load the medical image at the specified index
         image_path = self.image_paths[idx]
-        try:
-            image = Image.open(image_path)
-            # Convert grayscale medical images to RGB format for model compatibility
-            image = convert_to_8bit_3channel(image)
-        except Exception as e:
-            raise RuntimeError(f"Error loading image {image_path}: {e}")
-        
-        # Prepare processor arguments for image preprocessing
-        processor_kwargs = {
-            "images": image,
-            "padding": "max_length",  # Ensure consistent tensor sizes
-            "return_tensors": "pt"    # Return PyTorch tensors
-        }
-        
-        # Add max_length if specified (for text processing compatibility)
-        if self.max_length is not None:
-            processor_kwargs["max_length"] = self.max_length
-            
-        # Process the image through SigLIP processor
-        inputs = self.processor(**processor_kwargs)
-        
-        # Remove batch dimension added by processor (DataLoader will add it back)
-        processed_data = {
-            key: tensor.squeeze(0) for key, tensor in inputs.items()
-        }
-        
+        processed_data = self._process_cached(idx)
+
         # Include label if available (for supervised learning tasks)
         if self.labels is not None:
-            lbl = torch.tensor(self.labels[idx])
-            if lbl.dim()==0:
-                processed_data['label'] = torch.unsqueeze(lbl, -1)
-            else:
-                processed_data['label'] = lbl
+            processed_data['label'] = label_tensor(self.labels[idx])
         # Include file path for tracking and debugging
         processed_data['path'] = image_path
-        
-        return processed_data
\ No newline at end of file
+
+        return processed_data
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from typing import List, Optional
+from PIL import Image
+from ..dicom import flatten_dicom_dataset
+from ..dicom_bulk import _column_value
+from ..dicom_frames import DicomFrameReader, frame_counts
+from ..dicom_pixels import dicom_to_8bit
+from .MedSigLIPDataset import MedSigLIPDataset
+
+
+def per_frame_samples(image_paths: List[str], labels: Optional[List] = None):
+    """
+    Expand DICOM files into one sample per frame.
+
+    Only the headers are read to count frames.
+
+    Args:
+        image_paths: List of paths to (multi-frame) DICOM files
+        labels: Optional list of labels, repeated for every frame of a file
+
+    Returns:
+        tuple: ``(image_paths, labels, frames)`` to pass to ``MedSigLIPDicomDataset``
+    """
+    paths, frame_labels, frames = [], [] if labels is not None else None, []
+    for i, (path, count) in enumerate(zip(image_paths, frame_counts(image_paths))):
+        paths.extend([path] * count)
+        frames.extend(range(count))
+        if labels is not None:
+            frame_labels.extend([labels[i]] * count)
+    return paths, frame_labels, frames
+
+
+class MedSigLIPDicomDataset(MedSigLIPDataset):
+    """
+    MedSigLIPDataset that reads pixel data directly from DICOM files.
+
+    Rescale Slope/Intercept, the VOI window (or VOI LUT) and MONOCHROME1
+    inversion are applied with vectorized NumPy (see ``dlfx.dicom_to_8bit``)
+    before the usual SigLIP processing, so no PNG/JPEG export is needed.
+    Selected header fields can be returned alongside the tensors.
+
+    Files are opened with ``DicomFrameReader``, so with ``frames`` each sample
+    is a single frame of a multi-frame file; for uncompressed files only that
+    frame is read from the memory-mapped file. Use ``per_frame_samples`` to
+    build one sample per frame.
+    """
+
+    def __init__(
+        self,
+        image_paths: List[str],
+        labels: Optional[List] = None,
+        header_fields: Optional[List[str]] = None,
+        voi: bool = True,
+        window_index: int = 0,
+        frames: Optional[List[int]] = None,
+        max_open_files: int = 8,
+        **kwargs
+    ):
+        """
+        Args:
+            image_paths: List of paths to DICOM files
+            labels: Optional list of labels corresponding to images
+            header_fields: Optional list of flattened header keys to return under
+                ``'header'`` as strings ('' when missing). Fields may also be tags or
+                key patterns (see ``flatten_dicom_dataset``), e.g.
+                ``"ReferencedSeriesSequence[*].SeriesInstanceUID"``; the values of all
+                matching keys are then joined with ``\\`` in dataset order, like a
+                multi-valued element
+            voi: Apply the VOI window / VOI LUT if present; otherwise min-max scale
+            window_index: Which window to use when several are given
+            frames: Optional frame index per sample (default: the first frame)
+            max_open_files: Number of recently used files kept open (memory-mapped) per worker
+            **kwargs: Forwarded to ``MedSigLIPDataset`` (processor, target_size, cache_dir, ...)
+        """
+        # Set before the base class builds the cache config from _decode_settings
+        self.voi = voi
+        self.window_index = window_index
+        super().__init__(image_paths, labels=labels, **kwargs)
+        if frames is not None and len(frames) != len(image_paths):
+            raise ValueError("Number of image paths must match number of frames")
+        self.frames = frames
+        self.max_open_files = max_open_files
+        self._readers = OrderedDict()
+        self.header_fields = list(header_fields) if header_fields is not None else None
+        # Header of the dataset read by the last _load_image call, reused by __getitem__
+        self._last_header = None
+
+    def __getstate__(self):
+        # Open readers hold memory maps; each worker opens its own
+        state = self.__dict__.copy()
+        state['_readers'] = OrderedDict()
+        return state
+
+    def _reader(self, path):
+        reader = self._readers.pop(path, None)
+        if reader is None:
+            reader = DicomFrameReader(path)
+            while len(self._readers) >= self.max_open_files:
+                self._readers.popitem(last=False)
+        self._readers[path] = reader
+        return reader
+
+    def _frame(self, idx):
+        return self.frames[idx] if self.frames is not None else 0
+
+    def _decode_settings(self):
+        # The 8-bit image also depends on the VOI settings
+        return {'voi': self.voi, 'window_index': self.window_index}
+
+    def _cache_key(self, idx):
+        return f"frame={self.frames[idx]}" if self.frames is not None else ""
+
+    def _header(self, ds):
+        flat = flatten_dicom_dataset(ds, include=self.header_fields)
+        header = {}
+        for field in self.header_fields:
+            if field in flat:
+                values = [flat[field]]
+            else:
+                # Tags and key patterns: every matching key, in dataset order
+                values = flatten_dicom_dataset(ds, include=[field]).values()
+            values = [_column_value(value, as_str=True) for value in values]
+            header[field] = "\\".join(value for value in values if value is not None)
+        return header
+
+    def _load_image(self, idx):
+        """Read the DICOM frame at ``idx`` and convert it to an 8-bit RGB PIL image."""
+        image_path = self.image_paths[idx]
+        try:
+            with self._stage("read"):
+                reader = self._reader(image_path)
+                ds = reader.dataset
+                pixels = reader[self._frame(idx)]
+            with self._stage("to_8bit"):
+                image = dicom_to_8bit(ds, pixels=pixels, voi=self.voi,
+                                      window_index=self.window_index, target_size=self.target_size)
+        except Exception as e:
+            raise RuntimeError(f"Error loading DICOM {image_path}: {e}")
+        if self.header_fields is not None:
+            self._last_header = (idx, self._header(ds))
+        if image.ndim == 2:
+            return Image.fromarray(image, mode='L').convert('RGB')
+        return Image.fromarray(image, mode='RGB')
+
+    def __getitem__(self, idx):
+        """
+        Load and preprocess a single DICOM image (frame).
+
+        Returns:
+            Dict containing processed tensors, optional label, file path, the
+            ``'frame'`` index if ``frames`` is set and, if ``header_fields`` is
+            set, a ``'header'`` dict of strings
+        """
+        self._last_header = None
+        processed_data = super().__getitem__(idx)
+        if self.header_fields is not None:
+            if self._last_header is not None and self._last_header[0] == idx:
+                header = self._last_header[1]
+            else:
+                # Pixels came from the cache: read just the header
+                header = self._header(self._reader(self.image_paths[idx]).dataset)
+            processed_data['header'] = header
+        if self.frames is not None:
+            processed_data['frame'] = self.frames[idx]
+        return processed_data
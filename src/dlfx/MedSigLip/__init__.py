@@ -1,4 +1,23 @@
-from .get_dataloaders import get_dataloader
-from .MedSigLIPDataset import MedSigLIPDataset
-from .plot_images import plot_images_grid
-from .preprocess import convert_to_8bit_3channel
\ No newline at end of file
+from .._lazy import attach
+
+# torch and transformers are only imported with the exports that need them
+__getattr__, __dir__, __all__ = attach(__name__, {
+    "get_dataloader": ".get_dataloaders",
+    "MedSigLIPDataset": ".MedSigLIPDataset",
+    "plot_images_grid": ".plot_images",
+    "convert_to_8bit_3channel": ".preprocess",
+    "PixelValuesCache": ".cache",
+    "SigLIPCollator": ".collate",
+    "BatchNormalizer": ".collate",
+    "write_shards": ".shards",
+    "ShardedMedSigLIPDataset": ".shards",
+    "MedSigLIPDicomDataset": ".MedSigLIPDicomDataset",
+    "per_frame_samples": ".MedSigLIPDicomDataset",
+    "ShardedSampler": ".samplers",
+    "class_balanced_weights": ".samplers",
+    "Readahead": ".readahead",
+    "ReadaheadSampler": ".readahead",
+    "PipelineProfiler": ".profiling",
+    "EmbeddingStore": ".embeddings",
+    "LabelLookup": ".embeddings",
+})
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Optional
+
+import numpy as np
+
+
+class PixelValuesCache:
+    """
+    On-disk cache of processed image arrays, shared between DataLoader workers.
+
+    Each entry is a ``.npy`` file named by a hash of the source path, its mtime
+    and size, and a config string (e.g. the processor settings), so changing
+    either the image or the preprocessing invalidates it. Entries are read back
+    with ``np.load(mmap_mode="c")``, i.e. zero-copy from the page cache.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    concurrent workers never see partial entries; if two workers process the
+    same image, the last rename wins with identical content. When ``max_bytes``
+    is set, the least recently used entries are evicted once the cache grows
+    past it. Temporary files count towards the size, and those left behind by
+    crashed writers are removed on eviction.
+    """
+
+    SUFFIX = ".npy"
+    TMP_SUFFIX = ".tmp"
+    # Temporary files older than this belong to writers that died mid-write
+    STALE_TMP_SECONDS = 3600
+
+    def __init__(self, cache_dir: str, config: str = "", max_bytes: Optional[int] = None, dtype="float16"):
+        """
+        Args:
+            cache_dir: Directory for cache entries (created if needed)
+            config: String describing everything that affects the cached arrays
+            max_bytes: Optional size bound for the whole cache directory
+            dtype: Storage dtype (e.g. ``"float16"`` for normalized pixel values,
+                ``"uint8"`` for raw 8-bit images)
+        """
+        self.cache_dir = cache_dir
+        self.config = config
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Bytes written by this process since the directory size was last checked
+        self._written = 0
+
+    def _entry_path(self, path: str, key: str = "") -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        source = os.path.abspath(path)
+        if key:
+            source = f"{source}\0{key}"
+        entry_key = f"{source}\0{st.st_mtime_ns}\0{st.st_size}\0{self.config}\0{self.dtype.str}"
+        digest = hashlib.sha1(entry_key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + self.SUFFIX)
+
+    def get(self, path: str, key: str = "") -> Optional[np.ndarray]:
+        """
+        Return the cached array for ``path`` as a copy-on-write memmap, or None on a miss.
+
+        ``key`` distinguishes several entries for the same file (e.g. frames).
+        """
+        entry = self._entry_path(path, key)
+        if entry is None:
+            return None
+        try:
+            arr = np.load(entry, mmap_mode="c")
+        except (OSError, ValueError):
+            return None
+        try:
+            # Bump mtime so eviction is least-recently-used rather than oldest-written
+            os.utime(entry)
+        except OSError:
+            pass
+        return arr
+
+    def put(self, path: str, array: np.ndarray, key: str = "") -> Optional[np.ndarray]:
+        """
+        Store ``array`` for ``path`` (and ``key``) and return it converted to the cache dtype.
+
+        The returned array is the in-memory array that was written (also when
+        writing fails), not a memmap of the entry; later ``get`` calls return
+        the entry itself.
+
+        Returns:
+            np.ndarray: The array in the cache dtype, or None if ``path`` cannot be stat'ed
+
+        Raises:
+            ValueError: If the cache dtype is an integer type and ``array`` does not
+                convert to it exactly (e.g. normalized floats in a uint8 cache)
+        """
+        entry = self._entry_path(path, key)
+        if entry is None:
+            return None
+        source = np.asarray(array)
+        array = np.ascontiguousarray(source, dtype=self.dtype)
+        if self.dtype.kind in "iub" and source.dtype != self.dtype and not np.array_equal(array, source):
+            raise ValueError(f"Array of dtype {source.dtype} cannot be stored exactly in a {self.dtype} cache")
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.{uuid.uuid4().hex}{self.TMP_SUFFIX}"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, entry)
+        except OSError:
+            # A full or read-only disk should not break training
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return array
+
+        if self.max_bytes is not None:
+            self._written += array.nbytes
+            # Only rescan the directory after writing ~5% of the budget
+            if self._written >= self.max_bytes // 20:
+                self._written = 0
+                self.evict()
+        return array
+
+    def _entries(self, suffix: str = SUFFIX):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(suffix):
+                    continue
+                full = os.path.join(root, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, full
+
+    def size(self) -> int:
+        """Total size of the cache entries and temporary files in bytes."""
+        return sum(size for suffix in (self.SUFFIX, self.TMP_SUFFIX) for _, size, _ in self._entries(suffix))
+
+    def _sweep_tmp(self) -> int:
+        """Remove stale temporary files and return the size of the remaining (in-flight) ones."""
+        cutoff = time.time() - self.STALE_TMP_SECONDS
+        in_flight = 0
+        for mtime, size, full in self._entries(self.TMP_SUFFIX):
+            if mtime >= cutoff:
+                in_flight += size
+                continue
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass
+        return in_flight
+
+    def evict(self, max_bytes: Optional[int] = None):
+        """
+        Remove least recently used entries until the cache is below 90% of ``max_bytes``.
+
+        Temporary files older than ``STALE_TMP_SECONDS`` are removed first;
+        newer ones belong to running writers and count towards the size.
+        Safe to call from several processes: entries removed by another process
+        are skipped, and readers that already mapped an entry keep their data.
+        """
+        in_flight = self._sweep_tmp()
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = in_flight + sum(size for _, size, _ in entries)
+        target = int(max_bytes * 0.9)
+        for _, size, full in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove every cache entry."""
+        self.evict(max_bytes=0)
+
+
+def processor_config(processor, **extra) -> str:
+    """
+    Build a cache config string from a HuggingFace processor and extra settings.
+
+    Args:
+        processor: Processor whose image settings determine the cached output, or None
+        **extra: Further settings that affect the output (e.g. ``target_size``)
+
+    Returns:
+        str: Stable JSON description of the preprocessing
+    """
+    settings = {}
+    if processor is not None:
+        image_processor = getattr(processor, "image_processor", processor)
+        try:
+            settings = image_processor.to_dict()
+        except AttributeError:
+            settings = {"repr": repr(image_processor)}
+    settings.update(extra)
+    return json.dumps(settings, sort_keys=True, default=str)
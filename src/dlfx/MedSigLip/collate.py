@@ -0,0 +1,139 @@
+import numpy as np
+import torch
+from typing import Optional
+from PIL import Image
+
+
+class SigLIPCollator:
+    """
+    Collate function that runs the SigLIP processor once per batch.
+
+    Use with ``MedSigLIPDataset(..., return_raw=True)``: items carry the raw
+    uint8 ``'image'`` array, and the whole batch is resized and normalized by a
+    single processor call instead of one call per image. The collator runs in
+    the DataLoader workers, so each worker holds one processor.
+    """
+
+    def __init__(self, processor, max_length: Optional[int] = None):
+        """
+        Args:
+            processor: Loaded HuggingFace processor (e.g. ``AutoProcessor.from_pretrained(...)``)
+            max_length: Maximum sequence length for padding (if needed)
+        """
+        self.processor = processor
+        self.max_length = max_length
+
+    def __call__(self, batch):
+        """
+        Process a list of dataset items into a batch.
+
+        Returns:
+            Dict with batched processor outputs (e.g. ``pixel_values``), stacked
+            ``label`` if present, and the list of ``path`` values
+        """
+        processor_kwargs = {
+            "images": [item['image'] for item in batch],
+            "padding": "max_length",
+            "return_tensors": "pt"
+        }
+        if self.max_length is not None:
+            processor_kwargs["max_length"] = self.max_length
+
+        collated = dict(self.processor(**processor_kwargs))
+
+        if 'label' in batch[0]:
+            collated['label'] = torch.stack([item['label'] for item in batch])
+        collated['path'] = [item['path'] for item in batch]
+        return collated
+
+
+def image_processor_params(processor) -> dict:
+    """
+    Read the resize and normalization settings of a HuggingFace image processor.
+
+    Args:
+        processor: Loaded processor (or its ``image_processor``)
+
+    Returns:
+        dict: ``size`` as ``(height, width)``, PIL ``resample`` filter,
+        ``rescale_factor``, ``image_mean`` and ``image_std``
+    """
+    image_processor = getattr(processor, "image_processor", processor)
+    size = image_processor.size
+    if "height" in size:
+        size = (size["height"], size["width"])
+    else:
+        size = (size["shortest_edge"], size["shortest_edge"])
+    return {
+        "size": size,
+        "resample": Image.Resampling(int(image_processor.resample)),
+        "rescale_factor": image_processor.rescale_factor if image_processor.do_rescale else 1.0,
+        "image_mean": list(image_processor.image_mean) if image_processor.do_normalize else [0.0, 0.0, 0.0],
+        "image_std": list(image_processor.image_std) if image_processor.do_normalize else [1.0, 1.0, 1.0],
+    }
+
+
+def resize_to_uint8(image: Image.Image, size, resample=Image.Resampling.BICUBIC) -> torch.Tensor:
+    """
+    Resize an 8-bit RGB image to the model input size as a uint8 ``(3, H, W)`` tensor.
+
+    Args:
+        image: 8-bit RGB PIL image
+        size: ``(height, width)`` of the model input
+        resample: PIL resampling filter (the processor's)
+
+    Returns:
+        torch.Tensor: uint8 tensor in channels-first layout
+    """
+    height, width = size
+    if image.size != (width, height):
+        image = image.resize((width, height), resample=resample)
+    return torch.from_numpy(np.asarray(image).transpose(2, 0, 1).copy())
+
+
+class BatchNormalizer:
+    """
+    Rescale and normalize a batch of uint8 images in one vectorized op.
+
+    Pairs with ``MedSigLIPDataset(..., return_uint8=True)``: workers hand over
+    uint8 ``pixel_values`` (4x smaller than float32 through shared memory and
+    pinned-memory copies) and the main process turns the whole batch into the
+    processor's float input, ideally after moving it to the device:
+
+        >>> normalize = BatchNormalizer.from_processor(processor)
+        >>> pixel_values = normalize(batch['pixel_values'], device='cuda')
+    """
+
+    def __init__(self, image_mean, image_std, rescale_factor: float = 1 / 255):
+        """
+        Args:
+            image_mean: Per-channel mean (after rescaling)
+            image_std: Per-channel standard deviation (after rescaling)
+            rescale_factor: Factor mapping uint8 values to ``[0, 1]``
+        """
+        std = torch.tensor(image_std, dtype=torch.float32).view(-1, 1, 1)
+        mean = torch.tensor(image_mean, dtype=torch.float32).view(-1, 1, 1)
+        # (x * rescale - mean) / std == x * scale + shift
+        self.scale = rescale_factor / std
+        self.shift = -mean / std
+
+    @classmethod
+    def from_processor(cls, processor):
+        """Build a normalizer with the settings of a HuggingFace image processor."""
+        params = image_processor_params(processor)
+        return cls(params["image_mean"], params["image_std"], params["rescale_factor"])
+
+    def __call__(self, pixel_values: torch.Tensor, device=None, dtype=torch.float32) -> torch.Tensor:
+        """
+        Args:
+            pixel_values: uint8 tensor of shape ``(N, C, H, W)``
+            device: Optional device to move the batch to before converting
+            dtype: Output floating point dtype
+
+        Returns:
+            torch.Tensor: Normalized pixel values of ``dtype``
+        """
+        pixel_values = pixel_values.to(device, non_blocking=True)
+        scale = self.scale.to(pixel_values.device, dtype)
+        shift = self.shift.to(pixel_values.device, dtype)
+        return torch.addcmul(shift, pixel_values.to(dtype), scale)
@@ -0,0 +1,280 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+STORE_FILE = "store.json"
+IMAGE_FILE = "images.bin"
+IMAGE_IDS_FILE = "images.txt"
+TEXT_FILE = "texts.bin"
+TEXTS_FILE = "texts.json"
+
+
+def _to_numpy(embeddings) -> np.ndarray:
+    """Array from a NumPy array or a (possibly CUDA, half precision) torch tensor."""
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().float().cpu().numpy()
+    return np.asarray(embeddings)
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = embeddings.astype(np.float32, copy=True)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+    return embeddings
+
+
+def topk_ascending(scores: np.ndarray, k: int):
+    """
+    Top ``k`` columns of every row of ``scores`` with ``argpartition``, without a full sort.
+
+    Returns:
+        tuple: ``(indices, values)`` of shape ``(rows, k)``, ordered by ascending score
+        so that the best match is last (the ``rankings`` convention of ``plot_images_grid``)
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        indices = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        indices = np.broadcast_to(np.arange(k), scores.shape).copy()
+    values = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(values, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class LabelLookup:
+    """
+    Cached mapping from image paths to labels.
+
+    Built once from a labels DataFrame (instead of ``set_index(...).to_dict()``
+    on every call) and vectorized over paths, so it can feed
+    ``plot_images_grid`` and the metric functions (as ``references``) directly.
+    Paths are matched by file name without extension.
+    """
+
+    def __init__(self, labels: pd.DataFrame, key: str = "AccessionNumber_anon", value: str = "pathology"):
+        """
+        Args:
+            labels: DataFrame with one row per image; for duplicate identifiers
+                the last row wins, as with ``set_index(...).to_dict()``
+            key: Column with the image identifier (file name without extension)
+            value: Column with the label
+        """
+        keys = labels[key].astype(str)
+        last = ~keys.duplicated(keep="last").to_numpy()
+        self.mapping = pd.Series(labels[value].to_numpy()[last], index=keys.to_numpy()[last])
+
+    @staticmethod
+    def identifiers(paths) -> pd.Index:
+        """File names without extension of ``paths``."""
+        return pd.Index([os.path.splitext(os.path.basename(str(p)))[0] for p in paths])
+
+    def __getitem__(self, identifier: str):
+        return self.mapping[identifier]
+
+    def __call__(self, paths) -> np.ndarray:
+        """Labels of ``paths`` (NaN for unknown identifiers)."""
+        return self.mapping.reindex(self.identifiers(paths)).to_numpy()
+
+
+class EmbeddingStore:
+    """
+    Image and text embeddings in memory-mapped files, with chunked top-k ranking.
+
+    Embeddings are L2-normalized when added (so dot products are cosine
+    similarities) and appended to raw ``float16`` or ``float32`` files in
+    ``directory``; image ids (e.g. paths) are kept next to them. Similarities
+    are computed by chunks of ``chunk_size`` images, and only the ``k`` best
+    matches of each chunk are kept with ``argpartition``, so zero-shot
+    classification and retrieval over millions of images need a fixed amount
+    of memory.
+
+    Example:
+        >>> store = EmbeddingStore("embeddings/")
+        >>> store.add_images(outputs.image_embeds, paths)
+        >>> store.set_texts(text_embeds, texts)
+        >>> rankings, scores = store.rank(k=3)
+        >>> plot_images_grid(inputs, paths, store.texts, rankings, LabelLookup(labels))
+    """
+
+    def __init__(self, directory: str, dtype: str = "float16", chunk_size: int = 65536):
+        """
+        Args:
+            directory: Store directory (created if needed; an existing store is opened)
+            dtype: Storage dtype of new stores, ``"float16"`` or ``"float32"``
+            chunk_size: Images per similarity chunk
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, STORE_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.dtype = np.dtype(meta["dtype"])
+            self.dim = meta["dim"]
+        else:
+            self.dtype = np.dtype(dtype)
+            self.dim = None
+        if self.dtype not in (np.float16, np.float32):
+            raise ValueError(f"dtype must be float16 or float32, got {self.dtype}")
+        self._ids = None
+        self._texts = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _write_meta(self):
+        with open(self._path(STORE_FILE), "w") as f:
+            json.dump({"dtype": self.dtype.name, "dim": self.dim}, f)
+
+    def _check_dim(self, embeddings: np.ndarray):
+        if embeddings.ndim != 2:
+            raise ValueError(f"Embeddings must be 2D (samples, dim), got shape {embeddings.shape}")
+        if self.dim is None:
+            self.dim = int(embeddings.shape[1])
+            self._write_meta()
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match the store ({self.dim})")
+
+    def _memmap(self, name: str) -> np.ndarray:
+        path = self._path(name)
+        if self.dim is None or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode="r").reshape(-1, self.dim)
+
+    def add_images(self, embeddings, ids):
+        """
+        Append a batch of image embeddings.
+
+        Args:
+            embeddings: Array or tensor of shape ``(N, dim)``
+            ids: N identifiers (e.g. image paths)
+        """
+        embeddings = _to_numpy(embeddings)
+        ids = [str(i) for i in ids]
+        if len(ids) != len(embeddings):
+            raise ValueError("Number of ids must match number of embeddings")
+        if any("\n" in i for i in ids):
+            raise ValueError("Image ids must not contain newlines")
+        self._check_dim(embeddings)
+        with open(self._path(IMAGE_FILE), "ab") as f:
+            f.write(_normalize(embeddings).astype(self.dtype).tobytes())
+        with open(self._path(IMAGE_IDS_FILE), "a") as f:
+            f.writelines(i + "\n" for i in ids)
+        self._ids = None
+
+    def set_texts(self, embeddings, texts):
+        """
+        Store the text (class prompt) embeddings, replacing previous ones.
+
+        Args:
+            embeddings: Array or tensor of shape ``(T, dim)``
+            texts: T texts
+        """
+        embeddings = _to_numpy(embeddings)
+        texts = list(texts)
+        if len(texts) != len(embeddings):
+            raise ValueError("Number of texts must match number of embeddings")
+        self._check_dim(embeddings)
+        with open(self._path(TEXT_FILE), "wb") as f:
+            f.write(_normalize(embeddings).astype(self.dtype).tobytes())
+        with open(self._path(TEXTS_FILE), "w") as f:
+            json.dump(texts, f)
+        self._texts = texts
+
+    @property
+    def image_embeddings(self) -> np.ndarray:
+        """Read-only memmap of shape ``(num_images, dim)``."""
+        return self._memmap(IMAGE_FILE)
+
+    @property
+    def text_embeddings(self) -> np.ndarray:
+        """Read-only memmap of shape ``(num_texts, dim)``."""
+        return self._memmap(TEXT_FILE)
+
+    @property
+    def ids(self) -> list:
+        """Image ids in insertion order."""
+        if self._ids is None:
+            path = self._path(IMAGE_IDS_FILE)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._ids = f.read().splitlines()
+            else:
+                self._ids = []
+        return self._ids
+
+    @property
+    def texts(self) -> list:
+        """Texts of the text embeddings."""
+        if self._texts is None:
+            path = self._path(TEXTS_FILE)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._texts = json.load(f)
+            else:
+                self._texts = []
+        return self._texts
+
+    def __len__(self):
+        return len(self.image_embeddings)
+
+    def rank(self, k: int = 3, start: int = 0, stop=None):
+        """
+        Top-``k`` texts for every image (zero-shot classification), chunk by chunk.
+
+        Args:
+            k: Number of texts per image
+            start: First image
+            stop: End of the image range (default: all images)
+
+        Returns:
+            tuple: ``(rankings, scores)`` of shape ``(images, k)``; text indices are ordered
+            by ascending similarity (best last), as expected by ``plot_images_grid``
+        """
+        images = self.image_embeddings[start:stop]
+        texts = np.asarray(self.text_embeddings, dtype=np.float32)
+        k = min(k, len(texts))
+        rankings = np.empty((len(images), k), dtype=np.int64)
+        scores = np.empty((len(images), k), dtype=np.float32)
+        for begin in range(0, len(images), self.chunk_size):
+            end = min(begin + self.chunk_size, len(images))
+            similarity = np.asarray(images[begin:end], dtype=np.float32) @ texts.T
+            rankings[begin:end], scores[begin:end] = topk_ascending(similarity, k)
+        return rankings, scores
+
+    def predict(self, start: int = 0, stop=None) -> np.ndarray:
+        """Best matching text of every image, e.g. as ``predictions`` for ``compute_accuracy``."""
+        rankings, _ = self.rank(k=1, start=start, stop=stop)
+        return np.asarray(self.texts, dtype=object)[rankings[:, -1]]
+
+    def search(self, queries, k: int = 10):
+        """
+        Top-``k`` images for each query embedding (retrieval), chunk by chunk.
+
+        Only the ``k`` best candidates per query are carried between chunks.
+
+        Args:
+            queries: Array or tensor of shape ``(Q, dim)`` (normalized here)
+            k: Number of images per query
+
+        Returns:
+            tuple: ``(indices, scores)`` of shape ``(Q, k)``, best match last; map indices
+            to ids with ``store.ids``
+        """
+        queries = _normalize(_to_numpy(queries))
+        images = self.image_embeddings
+        k = min(k, len(images))
+        best_indices = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for begin in range(0, len(images), self.chunk_size):
+            end = min(begin + self.chunk_size, len(images))
+            similarity = queries @ np.asarray(images[begin:end], dtype=np.float32).T
+            indices, scores = topk_ascending(similarity, k)
+            candidates = np.concatenate([best_indices, indices + begin], axis=1)
+            candidate_scores = np.concatenate([best_scores, scores], axis=1)
+            keep, best_scores = topk_ascending(candidate_scores, k)
+            best_indices = np.take_along_axis(candidates, keep, axis=1)
+        return best_indices, best_scores
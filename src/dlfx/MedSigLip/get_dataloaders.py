@@ -1,5 +1,23 @@
-from torch.utils.data import DataLoader
-from utils.MedSigLIPDataset import MedSigLIPDataset
+from torch.utils.data import DataLoader, RandomSampler, SequentialSampler, default_collate
+from transformers import AutoProcessor
+from .collate import SigLIPCollator
+from .MedSigLIPDataset import MedSigLIPDataset
+from .profiling import PipelineProfiler
+from .readahead import Readahead, ReadaheadSampler
+from .samplers import ShardedSampler, class_balanced_weights
+
+def _split_data(input_df, config):
+    """Split ``input_df`` by its Split column in a single pass into (paths, labels) per split."""
+    groups = dict(tuple(input_df.groupby('Split', sort=False)))
+    splits = {}
+    for split in ('Train', 'Valid', 'Test'):
+        split_df = groups.get(split, input_df.iloc[0:0])
+        splits[split] = (
+            (config.img_base_path + split_df.ImagePath).tolist(),
+            list(split_df[config.labels].values)
+        )
+    return splits
+
 
 def get_dataloader(input_df, config):
     """
@@ -7,55 +25,99 @@ def get_dataloader(input_df, config):
     
     Args:
         input_df: DataFrame containing image paths, labels, and split information
-        config: Configuration object containing img_base_path, labels, and batch_size
+        config: Configuration object containing img_base_path, labels, batch_size and
+            num_workers. Optional attributes:
+
+            - processor_name (default "google/medsiglip-448")
+            - batch_processing (default False): run the processor once per batch in
+              the collate function instead of once per image
+            - uint8_transport (default False): workers return resized uint8
+              ``pixel_values``; normalize each batch with
+              ``BatchNormalizer.from_processor(train_dataloader.dataset.processor)``
+            - persistent_workers (default False): keep workers alive between epochs
+            - prefetch_factor (default: PyTorch's): batches prefetched per worker
+            - distributed (default False): shard every split across ranks with
+              ``ShardedSampler``; world_size and rank default to torch.distributed's
+            - class_balanced (default False): draw training samples with
+              class-balanced weights
+            - seed (default 0): seed of the sampler order
+            - readahead (default 0): number of upcoming files each worker reads in
+              the background; readahead_bytes (default 256 MiB) bounds the
+              prefetched bytes per worker
+            - profile_dir (default None): record per-stage timings of every worker
+              with a ``PipelineProfiler`` in this directory (available as
+              ``train_dataloader.dataset.profiler``; iterate through
+              ``profiler.iterate(loader)`` to also record loader stalls)
     
     Returns:
-        tuple: (train_dataloader, valid_dataloader, test_dataloader)
+        tuple: (train_dataloader, valid_dataloader, test_dataloader). With
+        distributed or class_balanced sampling, call
+        ``train_dataloader.sampler.set_epoch(epoch)`` at the start of every epoch.
     """
-    # Prepare training data
-    train_df = input_df[input_df.Split == 'Train'].reset_index(drop=True)#.iloc[0:1000]
-    train_img_path = list(config.img_base_path + train_df.ImagePath)
-    train_img_label = list(train_df[config.labels].values)
-    
-    # Prepare validation data
-    valid_df = input_df[input_df.Split == 'Valid'].reset_index(drop=True)#.iloc[0:100]
-    valid_img_path = list(config.img_base_path + valid_df.ImagePath)
-    valid_img_label = list(valid_df[config.labels].values)
-    
-    # Prepare test data
-    test_df = input_df[input_df.Split == 'Test'].reset_index(drop=True)
-    test_img_path = list(config.img_base_path + test_df.ImagePath)
-    test_img_label = list(test_df[config.labels].values)
-    
-    # Create datasets
-    train_dataset = MedSigLIPDataset(image_paths=train_img_path, labels=train_img_label)
-    valid_dataset = MedSigLIPDataset(image_paths=valid_img_path, labels=valid_img_label)
-    test_dataset = MedSigLIPDataset(image_paths=test_img_path, labels=test_img_label)
-    
-    # Create DataLoaders
-    train_dataloader = DataLoader(
-        train_dataset, 
-        batch_size=config.batch_size, 
-        shuffle=True, 
-        pin_memory=True, 
-        num_workers=config.num_workers
-    )
-    valid_dataloader = DataLoader(
-        valid_dataset, 
-        batch_size=config.batch_size, 
-        shuffle=False, 
-        pin_memory=True, 
-        num_workers=config.num_workers
-    )
-    test_dataloader = DataLoader(
-        test_dataset, 
-        batch_size=config.batch_size, 
-        shuffle=False, 
-        pin_memory=True, 
-        num_workers=config.num_workers
-    )
-    
-    return train_dataloader, valid_dataloader, test_dataloader
+    splits = _split_data(input_df, config)
+
+    # Load the processor once and share it between the splits
+    processor = AutoProcessor.from_pretrained(getattr(config, 'processor_name', "google/medsiglip-448"))
+    batch_processing = getattr(config, 'batch_processing', False)
+    collate_fn = SigLIPCollator(processor) if batch_processing else None
+    uint8_transport = getattr(config, 'uint8_transport', False)
+
+    distributed = getattr(config, 'distributed', False)
+    class_balanced = getattr(config, 'class_balanced', False)
+    seed = getattr(config, 'seed', 0)
+    readahead_files = getattr(config, 'readahead', 0)
+    profile_dir = getattr(config, 'profile_dir', None)
+    profiler = PipelineProfiler(profile_dir) if profile_dir is not None else None
+    if profiler is not None:
+        collate_fn = profiler.wrap_collate(collate_fn or default_collate)
+
+    loader_kwargs = {
+        'batch_size': config.batch_size,
+        'pin_memory': True,
+        'num_workers': config.num_workers,
+        'collate_fn': collate_fn,
+    }
+    if config.num_workers > 0:
+        loader_kwargs['persistent_workers'] = getattr(config, 'persistent_workers', False)
+        prefetch_factor = getattr(config, 'prefetch_factor', None)
+        if prefetch_factor is not None:
+            loader_kwargs['prefetch_factor'] = prefetch_factor
+
+    dataloaders = []
+    for split in ('Train', 'Valid', 'Test'):
+        image_paths, labels = splits[split]
+        readahead = None
+        if readahead_files:
+            readahead = Readahead(num_files=readahead_files,
+                                  max_bytes=getattr(config, 'readahead_bytes', 256 * 2**20))
+        dataset = MedSigLIPDataset(image_paths=image_paths, labels=labels, processor=processor,
+                                   return_raw=batch_processing, return_uint8=uint8_transport,
+                                   readahead=readahead, profiler=profiler)
+        train = split == 'Train'
+        weights = class_balanced_weights(labels) if train and class_balanced and labels else None
+
+        sampler = None
+        if distributed or weights is not None:
+            sampler = ShardedSampler(
+                len(dataset),
+                weights=weights,
+                num_replicas=getattr(config, 'world_size', None) if distributed else 1,
+                rank=getattr(config, 'rank', None) if distributed else 0,
+                shuffle=train,
+                seed=seed,
+            )
+        if readahead is not None:
+            if sampler is None:
+                sampler = RandomSampler(dataset) if train else SequentialSampler(dataset)
+            sampler = ReadaheadSampler(sampler, readahead, batch_size=config.batch_size)
+        dataloaders.append(DataLoader(
+            dataset,
+            shuffle=train if sampler is None else False,
+            sampler=sampler,
+            **loader_kwargs
+        ))
+
+    return tuple(dataloaders)
 
 # Usage:
 #train_dataloader, valid_dataloader, test_dataloader = get_dataloader(input_df, config)
\ No newline at end of file
@@ -1,9 +1,13 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from ..mosaic import build_mosaic, show_mosaic, write_mosaic
+from .embeddings import LabelLookup
+
  
 
-def plot_images_grid(inputs, img_paths, texts, rankings, labels, n_cols=3, figsize_per_row=5):
+def plot_images_grid(inputs, img_paths, texts, rankings, labels, n_cols=3, figsize_per_row=5,
+                     mosaic=False, tile_size=224, mosaic_path=None):
     """
     Plot images in a grid layout with predictions and ground truth labels.
     
@@ -17,13 +21,26 @@ def plot_images_grid(inputs, img_paths, texts, rankings, labels, n_cols=3, figsi
         List of text predictions
     bests : list
         List of indices for best predictions
-    labels_dict : dict
-        Dictionary mapping image identifiers to ground truth labels
+    labels : pd.DataFrame or LabelLookup
+        Ground truth labels: a DataFrame with 'AccessionNumber_anon' and 'pathology'
+        columns, or a prebuilt ``LabelLookup`` (avoids rebuilding the mapping per call)
     n_cols : int, default=3
         Number of columns in the grid
     figsize_per_row : int, default=3
         Height multiplier for each row in the figure
+    mosaic : bool, default=False
+        Paste all images into one canvas drawn with a single ``imshow``, with
+        the predictions rendered into the canvas (see ``dlfx.mosaic``); much
+        faster for hundreds of images
+    tile_size : int, default=224
+        Tile size in pixels in mosaic mode
+    mosaic_path : str, optional
+        In mosaic mode, also write the canvas to this PNG file and the titles
+        and tile positions to a sidecar CSV next to it
     """
+    if mosaic:
+        return _plot_mosaic(inputs, img_paths, texts, rankings, labels, n_cols, tile_size, mosaic_path)
+
     # Calculate the number of rows needed
     n_imgs = len(img_paths)
     n_rows = (n_imgs + n_cols - 1) // n_cols
@@ -39,7 +56,7 @@ def plot_images_grid(inputs, img_paths, texts, rankings, labels, n_cols=3, figsi
     elif n_cols == 1:
         axes = axes.reshape(-1, 1)
     
-    labels_dict = labels.set_index('AccessionNumber_anon').to_dict()['pathology']
+    labels_dict = labels if isinstance(labels, LabelLookup) else LabelLookup(labels)
     
     # Plot each image
     for i, p in enumerate(img_paths):
@@ -69,4 +86,26 @@ def plot_images_grid(inputs, img_paths, texts, rankings, labels, n_cols=3, figsi
     plt.tight_layout()
     plt.show()
     
-    return fig, axes
\ No newline at end of file
+    return fig, axes
+
+
+def _plot_mosaic(inputs, img_paths, texts, rankings, labels, n_cols, tile_size, mosaic_path):
+    """Mosaic mode of ``plot_images_grid``."""
+    labels_dict = labels if isinstance(labels, LabelLookup) else LabelLookup(labels)
+    pixel_values = inputs['pixel_values'][:len(img_paths)]
+    pixel_values = pixel_values.numpy() if hasattr(pixel_values, 'numpy') else np.asarray(pixel_values)
+    # [-1, 1] -> uint8 for the whole batch at once
+    images = np.round(255 * (np.transpose(pixel_values, (0, 2, 3, 1)) + 1) / 2.0).clip(0, 255).astype(np.uint8)
+
+    titles = []
+    for i, p in enumerate(img_paths):
+        acc_anon = p.split('/')[-1][:-4]
+        top = [texts[j] for j in rankings[i, :][-3:][::-1]]
+        titles.append(f'Top1: {top[0]}\nTop2: {top[1]}\nTop3: {top[2]}\nLabel: {labels_dict[acc_anon]}')
+
+    canvas, layout = build_mosaic(images, titles=titles, tile_size=tile_size, cols=n_cols)
+    if mosaic_path is not None:
+        write_mosaic(canvas, layout, mosaic_path)
+    fig, ax = show_mosaic(canvas)
+    plt.show()
+    return fig, ax
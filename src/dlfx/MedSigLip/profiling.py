@@ -0,0 +1,163 @@
+import glob
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+EVENTS_PATTERN = "events-*.jsonl"
+STALL_STAGE = "loader_stall"
+
+
+class PipelineProfiler:
+    """
+    Opt-in per-stage timing of the data pipeline across DataLoader workers.
+
+    Every process (main and each worker) appends one JSON line per timed stage
+    to its own ``events-<pid>.jsonl`` file in ``log_dir``, so no
+    synchronization between workers is needed. ``summary`` aggregates the
+    files into p50/p95 latencies and byte counts per stage, including
+    ``loader_stall`` (time the training loop waited for a batch, recorded by
+    ``iterate``), and ``write_chrome_trace`` converts them for
+    ``chrome://tracing`` / Perfetto.
+
+    Example:
+        >>> profiler = PipelineProfiler("profile/")
+        >>> dataset = MedSigLIPDataset(paths, labels, profiler=profiler)
+        >>> for batch in profiler.iterate(DataLoader(dataset, ...)):
+        ...     ...
+        >>> profiler.summary()
+    """
+
+    def __init__(self, log_dir: str):
+        """
+        Args:
+            log_dir: Directory for the per-process event files (created if needed)
+        """
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        self._file = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Open files stay in their process; workers open their own
+        state = self.__dict__.copy()
+        state.update(_file=None, _pid=None)
+        return state
+
+    def _log(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # Line-buffered so events survive workers being terminated
+            self._file = open(os.path.join(self.log_dir, f"events-{pid}.jsonl"), "a", buffering=1)
+            self._pid = pid
+        return self._file
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a pipeline stage.
+
+        Yields a dict; set ``record['bytes']`` inside the block to attach a byte count.
+        """
+        record = {}
+        start_ns = time.time_ns()
+        start = time.perf_counter_ns()
+        try:
+            yield record
+        finally:
+            event = {
+                "name": name,
+                "ts": start_ns // 1000,
+                "dur": (time.perf_counter_ns() - start) / 1000,
+                "pid": os.getpid(),
+            }
+            if "bytes" in record:
+                event["bytes"] = int(record["bytes"])
+            self._log().write(json.dumps(event) + "\n")
+
+    def iterate(self, loader):
+        """Yield the batches of ``loader``, recording the wait for each one as ``loader_stall``."""
+        iterator = iter(loader)
+        while True:
+            with self.stage(STALL_STAGE):
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    return
+            yield batch
+
+    def wrap_collate(self, collate_fn):
+        """Return ``collate_fn`` timed as the ``collate`` stage."""
+        return _TimedCollate(collate_fn, self)
+
+    def events(self) -> list:
+        """Read the events recorded so far by every process."""
+        events = []
+        for path in sorted(glob.glob(os.path.join(self.log_dir, EVENTS_PATTERN))):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass  # Line still being written
+        return events
+
+    def summary(self, path: str = None) -> dict:
+        """
+        Aggregate recorded events per stage.
+
+        Args:
+            path: Optional JSON file to write the summary to
+
+        Returns:
+            dict: ``{stage: {count, total_s, mean_ms, p50_ms, p95_ms, bytes, processes}}``
+        """
+        by_stage = {}
+        for event in self.events():
+            by_stage.setdefault(event["name"], []).append(event)
+
+        summary = {}
+        for name, events in sorted(by_stage.items()):
+            durations = np.array([event["dur"] for event in events]) / 1000
+            p50, p95 = np.percentile(durations, [50, 95])
+            summary[name] = {
+                "count": len(events),
+                "total_s": float(durations.sum() / 1000),
+                "mean_ms": float(durations.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "bytes": sum(event.get("bytes", 0) for event in events),
+                "processes": len({event["pid"] for event in events}),
+            }
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=1)
+        return summary
+
+    def write_chrome_trace(self, path: str):
+        """Write all events as a Chrome trace (one track per process)."""
+        trace = [
+            {"name": event["name"], "ph": "X", "ts": event["ts"], "dur": event["dur"],
+             "pid": event["pid"], "tid": event["pid"], "args": {"bytes": event["bytes"]} if "bytes" in event else {}}
+            for event in self.events()
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace}, f)
+
+    def clear(self):
+        """Delete the recorded events."""
+        for path in glob.glob(os.path.join(self.log_dir, EVENTS_PATTERN)):
+            os.remove(path)
+
+
+class _TimedCollate:
+    def __init__(self, collate_fn, profiler):
+        self.collate_fn = collate_fn
+        self.profiler = profiler
+
+    def __call__(self, batch):
+        with self.profiler.stage("collate"):
+            return self.collate_fn(batch)
+
@@ -0,0 +1,177 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler, get_worker_info
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class Readahead:
+    """
+    Prefetch the bytes of upcoming files on a small thread pool.
+
+    The epoch order is published by ``ReadaheadSampler`` into a shared-memory
+    buffer that DataLoader workers can see. When a worker is asked for a
+    sample, it finds the sample's position in that order and starts reading
+    the files of the next ``num_files`` positions it will be asked for
+    (DataLoader hands batches to workers round-robin), so I/O latency overlaps
+    with decoding. Prefetched data is held in memory up to ``max_bytes``.
+
+    Each process (main or worker) starts its own thread pool on first use.
+    """
+
+    def __init__(self, num_files: int = 16, max_bytes: int = 256 * 2**20, num_threads: int = 4):
+        """
+        Args:
+            num_files: Number of upcoming files to read ahead
+            max_bytes: Bound on prefetched bytes held in memory per process
+            num_threads: Reader threads per process
+        """
+        self.num_files = num_files
+        self.max_bytes = max_bytes
+        self.num_threads = num_threads
+        self.batch_size = 1
+        # [generation, order...] in shared memory, set by ReadaheadSampler
+        self._order = None
+        self._reset_process_state()
+
+    def _reset_process_state(self):
+        self._pid = os.getpid()
+        self._pool = None
+        self._generation = None
+        self._position = 0
+        # position -> (index, future), in scheduling order
+        self._pending = OrderedDict()
+
+    def __getstate__(self):
+        # Thread pools and futures stay in the process that created them
+        state = self.__dict__.copy()
+        state.update(_pool=None, _pending=OrderedDict(), _generation=None, _position=0)
+        return state
+
+    def attach(self, capacity: int, batch_size: int = 1):
+        """Allocate the shared order buffer; called by ``ReadaheadSampler`` before workers start."""
+        self._order = torch.full((capacity + 1,), -1, dtype=torch.int64).share_memory_()
+        self._order[0] = 0
+        self.batch_size = batch_size
+
+    def publish(self, order):
+        """Publish the index order of a new epoch (main process)."""
+        order = torch.as_tensor(order, dtype=torch.int64)
+        self._order[1:1 + len(order)] = order
+        self._order[1 + len(order):] = -1
+        self._order[0] += 1
+
+    def _upcoming(self, order, position):
+        """Positions after ``position`` that go to the same worker, in the order they will be requested."""
+        worker_info = get_worker_info()
+        num_workers = worker_info.num_workers if worker_info is not None else 1
+        batch = position // self.batch_size
+
+        positions = []
+        start = position + 1
+        while len(positions) < self.num_files and start < len(order):
+            end = min((batch + 1) * self.batch_size, len(order))
+            positions.extend(range(start, end))
+            batch += num_workers
+            start = batch * self.batch_size
+        return [p for p in positions[:self.num_files] if order[p] >= 0]
+
+    def _locate(self, order, index):
+        """Find the position of ``index`` at or after the last one served, or None."""
+        # Usually just ahead of the last position; scan a small window before the whole order
+        near = order[self._position:self._position + 1024]
+        for start, values in ((self._position, near), (0, order)):
+            hits = np.flatnonzero(values == index)
+            if len(hits):
+                return start + int(hits[0])
+        return None
+
+    def _buffered_bytes(self):
+        # Completed reads only; reads in flight are bounded by num_files
+        return sum(
+            len(future.result()) for _, future in self._pending.values()
+            if future.done() and future.exception() is None
+        )
+
+    def get(self, index: int, paths) -> bytes:
+        """
+        Return the bytes of ``paths[index]``, prefetched if possible, and schedule upcoming reads.
+
+        Args:
+            index: Dataset index being loaded
+            paths: Sequence of file paths of the dataset
+        """
+        if self._order is None:
+            return _read_file(paths[index])
+        if os.getpid() != self._pid:
+            self._reset_process_state()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.num_threads)
+
+        order = self._order.numpy()
+        generation, order = int(order[0]), order[1:]
+        if generation != self._generation:
+            self._generation = generation
+            self._position = 0
+            self._pending.clear()
+
+        position = self._locate(order, index)
+        future = None
+        if position is not None:
+            self._position = position + 1
+            # Drop reads for positions that were skipped, then take ours
+            while self._pending and next(iter(self._pending)) < position:
+                self._pending.popitem(last=False)
+            pending = self._pending.pop(position, None)
+            if pending is not None and pending[0] == index:
+                future = pending[1]
+
+            if self._buffered_bytes() < self.max_bytes:
+                for upcoming in self._upcoming(order, position):
+                    if upcoming not in self._pending:
+                        upcoming_index = int(order[upcoming])
+                        self._pending[upcoming] = (upcoming_index, self._pool.submit(_read_file, paths[upcoming_index]))
+
+        if future is None:
+            return _read_file(paths[index])
+        return future.result()
+
+
+class ReadaheadSampler(Sampler):
+    """
+    Sampler wrapper that publishes each epoch's index order to a ``Readahead``.
+
+    The wrapped sampler's order is materialized at the start of every epoch,
+    so ``Readahead`` in the dataset (and its workers) knows which files come next.
+    """
+
+    def __init__(self, sampler, readahead: Readahead, batch_size: int = 1):
+        """
+        Args:
+            sampler: Sampler (or any sized iterable of indices) to wrap
+            readahead: The ``Readahead`` used by the dataset
+            batch_size: DataLoader batch size, used to predict which worker loads which sample
+        """
+        self.sampler = sampler
+        self.readahead = readahead
+        readahead.attach(len(sampler), batch_size)
+
+    def set_epoch(self, epoch: int):
+        """Forward the epoch to the wrapped sampler if it supports it."""
+        if hasattr(self.sampler, 'set_epoch'):
+            self.sampler.set_epoch(epoch)
+
+    def __iter__(self):
+        order = list(self.sampler)
+        self.readahead.publish(order)
+        return iter(order)
+
+    def __len__(self):
+        return len(self.sampler)
@@ -0,0 +1,117 @@
+import math
+from typing import Optional
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import Sampler
+
+
+def class_balanced_weights(labels) -> np.ndarray:
+    """
+    Per-sample weights inversely proportional to the frequency of each sample's label.
+
+    Args:
+        labels: Sequence of labels, one per sample. Vector labels (e.g. one-hot or
+            multi-label rows) are compared as whole rows.
+
+    Returns:
+        np.ndarray: float64 weights, so each distinct label has the same total weight
+    """
+    labels = np.asarray(labels)
+    if labels.ndim > 1:
+        labels = labels.reshape(len(labels), -1)
+        _, inverse, counts = np.unique(labels, axis=0, return_inverse=True, return_counts=True)
+    else:
+        _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    return 1.0 / counts[inverse.reshape(-1)]
+
+
+def _distributed_defaults(num_replicas, rank):
+    if num_replicas is None:
+        num_replicas = dist.get_world_size() if dist.is_available() and dist.is_initialized() else 1
+    if rank is None:
+        rank = dist.get_rank() if dist.is_available() and dist.is_initialized() else 0
+    if not 0 <= rank < num_replicas:
+        raise ValueError(f"Invalid rank {rank} for {num_replicas} replicas")
+    return num_replicas, rank
+
+
+class ShardedSampler(Sampler):
+    """
+    Deterministic per-rank sampler, optionally drawing samples by weight.
+
+    Every rank builds the same global order from ``seed`` and the epoch and
+    takes every ``num_replicas``-th index starting at its rank, like
+    ``torch.utils.data.DistributedSampler``, so ranks see disjoint shards of
+    equal length. With ``weights`` (e.g. from ``class_balanced_weights``) the
+    global order is instead drawn from the precomputed weights.
+
+    Call ``set_epoch`` at the start of every epoch to get a new order.
+    """
+
+    def __init__(
+        self,
+        num_samples: int,
+        weights=None,
+        num_replicas: Optional[int] = None,
+        rank: Optional[int] = None,
+        shuffle: bool = True,
+        seed: int = 0,
+        drop_last: bool = False,
+        replacement: bool = True
+    ):
+        """
+        Args:
+            num_samples: Size of the dataset
+            weights: Optional per-sample weights for weighted sampling
+            num_replicas: Number of ranks (default: the torch.distributed world size, or 1)
+            rank: Rank of this process (default: the torch.distributed rank, or 0)
+            shuffle: Shuffle the order (ignored with ``weights``, which is always random)
+            seed: Random seed, identical on every rank
+            drop_last: Drop the tail instead of padding so every rank gets the same count
+            replacement: Draw weighted samples with replacement
+        """
+        self.dataset_size = num_samples
+        self.num_replicas, self.rank = _distributed_defaults(num_replicas, rank)
+        self.weights = None
+        if weights is not None:
+            if len(weights) != num_samples:
+                raise ValueError("Number of weights must match number of samples")
+            self.weights = torch.as_tensor(np.asarray(weights), dtype=torch.double)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.replacement = replacement
+        self.epoch = 0
+
+        if drop_last:
+            self.num_samples = num_samples // self.num_replicas
+        else:
+            self.num_samples = math.ceil(num_samples / self.num_replicas)
+        self.total_size = self.num_samples * self.num_replicas
+
+    def set_epoch(self, epoch: int):
+        """Set the epoch so every epoch uses a different (but reproducible) order."""
+        self.epoch = epoch
+
+    def _global_order(self) -> torch.Tensor:
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        if self.weights is not None:
+            return torch.multinomial(self.weights, self.dataset_size, self.replacement, generator=generator)
+        if self.shuffle:
+            return torch.randperm(self.dataset_size, generator=generator)
+        return torch.arange(self.dataset_size)
+
+    def __iter__(self):
+        indices = self._global_order()
+        if self.total_size > len(indices):
+            # Pad by repeating the start of the order
+            repeats = math.ceil(self.total_size / max(len(indices), 1))
+            indices = indices.repeat(repeats)
+        indices = indices[:self.total_size]
+        return iter(indices[self.rank::self.num_replicas].tolist())
+
+    def __len__(self):
+        return self.num_samples
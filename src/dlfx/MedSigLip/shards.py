@@ -0,0 +1,245 @@
+import io
+import json
+import os
+import random
+import tarfile
+from bisect import bisect_right
+from itertools import islice
+from typing import Optional
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+from transformers import AutoProcessor
+from PIL import Image
+
+from .MedSigLIPDataset import label_tensor, process_image
+from .preprocess import convert_to_8bit_3channel
+
+INDEX_FILE = "index.json"
+
+
+def _add_member(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_shards(input_df, config, output_dir: str, samples_per_shard: int = 1000, splits=None) -> dict:
+    """
+    Pack the images of a dataloader DataFrame into tar shards for sequential reading.
+
+    Each sample is stored as two consecutive tar members: the original encoded
+    image bytes (``{n:08d}.{ext}``, not re-encoded) and a JSON record with its
+    source path and label (``{n:08d}.json``). Shards are written per split and
+    listed with their sample counts in ``index.json``.
+
+    Args:
+        input_df: DataFrame with ImagePath, label and Split columns (as used by ``get_dataloader``)
+        config: Configuration object containing img_base_path and labels
+        output_dir: Directory for the shards and index (created if needed)
+        samples_per_shard: Number of samples per shard
+        splits: Optional list of splits to pack (default: every value of ``Split``)
+
+    Returns:
+        dict: The index that was written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    index = {"labels": config.labels, "splits": {}}
+
+    for split, split_df in input_df.groupby('Split', sort=False):
+        if splits is not None and split not in splits:
+            continue
+        paths = (config.img_base_path + split_df.ImagePath).tolist()
+        label_values = split_df[config.labels].values.tolist()
+
+        shards = []
+        for start in range(0, len(paths), samples_per_shard):
+            name = f"{split}-{len(shards):05d}.tar"
+            with tarfile.open(os.path.join(output_dir, name), "w") as tar:
+                for n in range(start, min(start + samples_per_shard, len(paths))):
+                    path = paths[n]
+                    ext = os.path.splitext(path)[1].lstrip(".").lower() or "img"
+                    with open(path, "rb") as f:
+                        _add_member(tar, f"{n:08d}.{ext}", f.read())
+                    record = {"path": path, "label": label_values[n]}
+                    _add_member(tar, f"{n:08d}.json", json.dumps(record).encode())
+            shards.append({"file": name, "count": min(samples_per_shard, len(paths) - start)})
+        index["splits"][split] = shards
+
+    with open(os.path.join(output_dir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+def read_shard(path: str):
+    """
+    Stream ``(image_bytes, record)`` pairs from a shard written by ``write_shards``.
+
+    The tar file is read strictly sequentially, so it works well on network storage.
+    """
+    with tarfile.open(path, mode="r|") as tar:
+        image_bytes = None
+        for member in tar:
+            data = tar.extractfile(member).read()
+            if member.name.endswith(".json"):
+                yield image_bytes, json.loads(data)
+                image_bytes = None
+            else:
+                image_bytes = data
+
+
+class ShardedMedSigLIPDataset(IterableDataset):
+    """
+    Streaming dataset over tar shards written by ``write_shards``.
+
+    The (shuffled) shards are read as one sample stream that is split into
+    contiguous, equally long ranges per distributed rank and DataLoader worker,
+    so every rank yields exactly ``len(dataset)`` samples per epoch regardless
+    of shard sizes. As with ``DistributedSampler``, the stream is padded by
+    repeating samples from its start, or truncated with ``drop_last=True``.
+    Shards are read sequentially (a reader whose range starts inside a shard
+    skips to it), and samples are shuffled within a bounded buffer. Items
+    have the same layout as ``MedSigLIPDataset``.
+    """
+
+    def __init__(
+        self,
+        shard_dir: str,
+        split: str = 'Train',
+        processor_name: str = "google/medsiglip-448",
+        max_length: Optional[int] = None,
+        target_size: Optional[int] = None,
+        processor=None,
+        return_raw: bool = False,
+        shuffle: bool = True,
+        shuffle_buffer: int = 1000,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+        drop_last: bool = False
+    ):
+        """
+        Args:
+            shard_dir: Directory containing the shards and ``index.json``
+            split: Split to read (e.g. 'Train', 'Valid', 'Test')
+            processor_name: HuggingFace model identifier for the processor
+            max_length: Maximum sequence length for padding (if needed)
+            target_size: Optional size to downsample images towards before 8-bit conversion
+            processor: Optional already loaded processor
+            return_raw: If True, yield the raw uint8 ``'image'`` (see ``SigLIPCollator``)
+            shuffle: Shuffle shard order and samples within the buffer
+            shuffle_buffer: Number of samples held for shuffling
+            seed: Base random seed; combined with the epoch set by ``set_epoch``
+            rank: Rank of this process for distributed training
+            world_size: Number of distributed processes
+            drop_last: Truncate the stream to a multiple of ``world_size`` instead
+                of padding it with repeated samples
+        """
+        with open(os.path.join(shard_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.shards = [os.path.join(shard_dir, shard["file"]) for shard in index["splits"][split]]
+        self.shard_counts = [shard["count"] for shard in index["splits"][split]]
+        self.num_samples = sum(self.shard_counts)
+
+        self.return_raw = return_raw
+        if processor is None and not return_raw:
+            processor = AutoProcessor.from_pretrained(processor_name)
+        self.processor = None if return_raw else processor
+        self.max_length = max_length
+        self.target_size = target_size
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.drop_last = drop_last
+        # In shared memory so persistent DataLoader workers see set_epoch calls
+        self._epoch = torch.zeros((), dtype=torch.int64).share_memory_()
+
+    @property
+    def epoch(self) -> int:
+        return int(self._epoch)
+
+    def set_epoch(self, epoch: int):
+        """
+        Set the epoch so every epoch uses a different (but reproducible) order.
+
+        Also takes effect in running workers with ``persistent_workers=True``.
+        """
+        self._epoch.fill_(epoch)
+
+    def __len__(self):
+        """Number of samples yielded by this rank per epoch (the same on every rank)."""
+        if self.drop_last:
+            return self.num_samples // self.world_size
+        return -(-self.num_samples // self.world_size)
+
+    def _worker_segments(self):
+        """
+        ``(shard, skip, count)`` reads that make up this worker's range of the epoch's sample stream.
+        """
+        worker_info = get_worker_info()
+        num_workers = worker_info.num_workers if worker_info is not None else 1
+        worker_id = worker_info.id if worker_info is not None else 0
+
+        order = list(range(len(self.shards)))
+        if self.shuffle:
+            # Same permutation on every rank and worker, so the split below is disjoint
+            random.Random(self.seed + self.epoch).shuffle(order)
+        starts = np.cumsum([0] + [self.shard_counts[i] for i in order]).tolist()
+
+        # Split this rank's range as evenly as possible over the workers
+        per_rank = len(self)
+        begin = self.rank * per_rank + worker_id * per_rank // num_workers
+        end = self.rank * per_rank + (worker_id + 1) * per_rank // num_workers
+
+        # Positions past the end of the stream wrap around to its start (padding)
+        segments = []
+        position = begin
+        while position < end:
+            offset = position % self.num_samples
+            n = bisect_right(starts, offset) - 1
+            skip = offset - starts[n]
+            count = min(starts[n + 1] - offset, end - position)
+            segments.append((self.shards[order[n]], skip, count))
+            position += count
+        return segments
+
+    def _samples(self):
+        for shard, skip, count in self._worker_segments():
+            yield from islice(read_shard(shard), skip, skip + count)
+
+    def _make_item(self, image_bytes, record):
+        image = convert_to_8bit_3channel(Image.open(io.BytesIO(image_bytes)), target_size=self.target_size)
+        if self.return_raw:
+            item = {'image': np.asarray(image)}
+        else:
+            item = process_image(self.processor, image, self.max_length)
+        item['label'] = label_tensor(record["label"])
+        item['path'] = record["path"]
+        return item
+
+    def __iter__(self):
+        samples = self._samples()
+        if not self.shuffle or self.shuffle_buffer <= 1:
+            for image_bytes, record in samples:
+                yield self._make_item(image_bytes, record)
+            return
+
+        worker_info = get_worker_info()
+        worker_id = worker_info.id if worker_info is not None else 0
+        rng = random.Random((self.seed + self.epoch) * 1_000_003 + self.rank * 1009 + worker_id)
+
+        # Keep raw bytes in the buffer; decode only when a sample is emitted
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(sample)
+                continue
+            i = rng.randrange(len(buffer))
+            buffer[i], sample = sample, buffer[i]
+            yield self._make_item(*sample)
+        rng.shuffle(buffer)
+        for sample in buffer:
+            yield self._make_item(*sample)
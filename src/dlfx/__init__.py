@@ -1,7 +1,31 @@
 from importlib.metadata import version, PackageNotFoundError
 
-from .dicom import flatten_dicom_dataset, extract_index
-from .utils import stamp_notebook
+from ._lazy import attach
+
+# Exports are imported on first use, so `import dlfx` does not load pydicom, PIL or matplotlib
+__getattr__, __dir__, __all__ = attach(__name__, {
+    "flatten_dicom_dataset": ".dicom",
+    "extract_index": ".dicom",
+    "parse_flattened_keys": ".dicom",
+    "unflatten_dicom_dict": ".dicom",
+    "flattened_to_long": ".dicom",
+    "flatten_dicom_files": ".dicom_bulk",
+    "write_flattened_parquet": ".dicom_bulk",
+    "read_flattened_parquet": ".dicom_bulk",
+    "DicomFrameReader": ".dicom_frames",
+    "DicomIndex": ".dicom_index",
+    "dicom_to_8bit": ".dicom_pixels",
+    "apply_window": ".dicom_pixels",
+    "to_8bit_rgb": ".image",
+    "to_8bit_rgb_image": ".image",
+    "ThumbnailLoader": ".thumbnails",
+    "read_thumbnail": ".thumbnails",
+    "build_mosaic": ".mosaic",
+    "save_mosaic": ".mosaic",
+    "show_mosaic": ".mosaic",
+    "write_mosaic": ".mosaic",
+    "stamp_notebook": ".utils",
+}, submodules=("MedGemma", "MedSigLip"))
 
 try:
     __version__ = version(__name__)
@@ -0,0 +1,51 @@
+import importlib
+import sys
+import types
+
+
+class _LazyPackage(types.ModuleType):
+    """
+    Package module whose lazy exports take precedence over same-named submodules.
+
+    Importing a submodule binds it as an attribute of its package, so e.g.
+    importing ``MedGemma.compute_accuracy`` (the module) would otherwise hide
+    the ``compute_accuracy`` function exported by the package.
+    """
+
+    def __setattr__(self, name, value):
+        exports = self.__dict__.get("_lazy_exports", {})
+        if isinstance(value, types.ModuleType) and exports.get(name) == "." + name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+def attach(package_name: str, exports: dict, submodules=()):
+    """
+    Load the exports of a package on first attribute access (PEP 562).
+
+    Args:
+        package_name: ``__name__`` of the package
+        exports: Mapping of exported name to the relative module that defines it
+        submodules: Subpackage names that are imported on attribute access
+
+    Returns:
+        tuple: ``(__getattr__, __dir__, __all__)`` for the package namespace
+    """
+    package = sys.modules[package_name]
+    package.__class__ = _LazyPackage
+    package._lazy_exports = exports
+
+    def __getattr__(name):
+        if name in exports:
+            value = getattr(importlib.import_module(exports[name], package_name), name)
+        elif name in submodules:
+            value = importlib.import_module("." + name, package_name)
+        else:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        setattr(package, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(package.__dict__) | set(exports) | set(submodules))
+
+    return __getattr__, __dir__, sorted(exports)
@@ -1,43 +1,211 @@
 import re
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+import numpy as np
+from pydicom.datadict import DicomDictionary
 from pydicom.tag import Tag
 from pydicom.dataset import Dataset
 
+PIXEL_DATA_TAG = Tag("PixelData")
+
+# "(0010,0020)" or "0010,0020"
+_TAG_STRING = re.compile(r"^\(?([0-9A-Fa-f]{4}),\s*([0-9A-Fa-f]{4})\)?$")
+# "Name", "Name[3]" or "Name[*]"
+_PATTERN_COMPONENT = re.compile(r"^(.+?)(?:\[(\d+|\*)\])?$")
+# Digits inside square brackets
+_INDEX = re.compile(r"\[(\d+)\]")
+# Split a key at its last sequence index: "A[0].B[3].C" -> ("A[0].B", "3", "C")
+_KEY_SPLIT = re.compile(r"^(?:(.*)\[(\d+)\]\.)?(.*)$")
+
+
+def _element_name(tag) -> str:
+    """Return the keyword of a tag, or its ``(gggg,eeee)`` form if it has none."""
+    entry = DicomDictionary.get(tag)
+    # Some retired entries, e.g. (0018,0061), have a blank keyword
+    return (entry is not None and entry[4]) or str(Tag(tag))
+
+
+def _is_tag_pair(value) -> bool:
+    """True for a ``(group, element)`` tuple, as opposed to a tuple of two int tags."""
+    return (isinstance(value, tuple) and len(value) == 2
+            and all(isinstance(v, int) and 0 <= v <= 0xFFFF for v in value))
+
+
+def _pattern_key(patterns):
+    """
+    Normalize include/exclude entries to a hashable tuple for ``_compile_patterns``.
+
+    A single keyword, pattern or tag (including a bare ``(group, element)``
+    tuple) becomes a one-entry tuple; tags are converted to plain ints so every
+    spelling of a tag shares one cache entry.
+    """
+    if isinstance(patterns, (str, int)) or _is_tag_pair(patterns):
+        patterns = [patterns]
+    return tuple(pattern if isinstance(pattern, str) else int(Tag(pattern)) for pattern in patterns)
+
+
+@lru_cache(maxsize=128)
+def _compile_patterns(patterns):
+    """
+    Compile include/exclude entries to tuples of ``(name, is_glob, index)`` components.
+
+    Entries may be keywords, tags (int, ``Tag``, ``(group, element)`` or
+    ``"(gggg,eeee)"``) or key patterns such as ``"ReferencedSeriesSequence[*].SeriesInstanceUID"``.
+    ``index`` is None (any item), ``"*"`` or an int.
+    """
+    compiled = []
+    for pattern in patterns:
+        if not isinstance(pattern, str):
+            compiled.append(((_element_name(Tag(pattern)), False, None),))
+            continue
+
+        components = []
+        for part in pattern.split("."):
+            tag_match = _TAG_STRING.match(part)
+            if tag_match:
+                tag = Tag(int(tag_match.group(1), 16), int(tag_match.group(2), 16))
+                components.append((_element_name(tag), False, None))
+                continue
+            match = _PATTERN_COMPONENT.match(part)
+            if match is None:
+                raise ValueError(f"Invalid key pattern: {pattern!r}")
+            name, index = match.groups()
+            if index is not None and index != "*":
+                index = int(index)
+            components.append((name, any(c in name for c in "*?"), index))
+        compiled.append(tuple(components))
+    return tuple(compiled)
+
+
+def _match_patterns(active, name):
+    """
+    Advance the active patterns past an element called ``name``.
+
+    Returns:
+        tuple: (full, pending) where ``full`` is True if a pattern ends at this
+        element for every item, and ``pending`` lists ``(components, next_pos, index)``
+        for patterns that continue into the element's sequence items.
+    """
+    pending = []
+    for components, pos in active:
+        comp_name, is_glob, index = components[pos]
+        if not (fnmatchcase(name, comp_name) if is_glob else name == comp_name):
+            continue
+        if pos + 1 == len(components) and index in (None, "*"):
+            return True, None
+        pending.append((components, pos + 1, index))
+    return False, pending
+
+
+def _item_state(pending, i):
+    """
+    Resolve pending patterns for sequence item ``i``.
+
+    Returns:
+        None if a pattern ends at this item (the whole item matches), otherwise
+        the list of ``(components, pos)`` still active inside the item.
+    """
+    active = []
+    for components, pos, index in pending:
+        if index is not None and index != "*" and index != i:
+            continue
+        if pos == len(components):
+            return None
+        active.append((components, pos))
+    return active
+
+
+def flatten_dicom_dataset(dataset: Dataset, include=None, exclude=None, max_depth=None) -> dict:
+    """
+    Flatten a DICOM dataset into a single-level dict, skipping pixel data.
+
+    Nested sequence items are expanded into keys like ``"Sequence[0].Keyword"``.
+    Elements without a keyword are keyed by their tag, e.g. ``"(0009,1010)"``.
+    The dataset is walked with an explicit stack, and with ``include``,
+    ``exclude`` or ``max_depth`` whole subtrees are pruned before their elements
+    are decoded.
+
+    Args:
+        dataset: pydicom Dataset to flatten
+        include: Optional keyword, tag or key pattern, or a list of them, to keep. Patterns
+            are matched against the whole key path, e.g.
+            ``"ReferencedSeriesSequence[*].SeriesInstanceUID"``; ``*``/``?`` glob
+            within a name, ``[n]`` selects one item and ``[*]`` (or no index) any
+            item. A pattern naming a sequence keeps its whole subtree.
+        exclude: Optional keyword, tag or key pattern, or a list of them, to drop,
+            with the same syntax. Exclusion wins over inclusion. A single tag may
+            be given as a bare ``(group, element)`` tuple.
+        max_depth: Maximum number of nested sequence levels to expand. ``0``
+            keeps top-level elements only; None (default) expands everything.
+
+    Returns:
+        dict: Mapping of flattened keys to element values
+    """
+    # None means "everything included" / "nothing excluded" below this point
+    include_state = None if include is None else [(p, 0) for p in _compile_patterns(_pattern_key(include))]
+    exclude_state = None if exclude is None else [(p, 0) for p in _compile_patterns(_pattern_key(exclude))] or None
 
-def flatten_dicom_dataset(dataset: Dataset) -> dict:
     flattened = {}
+    # Each frame is (dataset, sorted tags iterator, key prefix, depth, include state, exclude state)
+    stack = [(dataset, None, "", 0, include_state, exclude_state)]
+    while stack:
+        ds, tags, prefix, depth, inc, exc = stack[-1]
+        if tags is None:
+            tags = iter(sorted(ds.keys()))
+            stack[-1] = (ds, tags, prefix, depth, inc, exc)
+
+        tag = next(tags, None)
+        if tag is None:
+            stack.pop()
+            continue
+
+        # Skip pixel data which is typically very large
+        if tag == PIXEL_DATA_TAG:
+            continue
+
+        name = _element_name(tag)
 
-    # Define a recursive function to handle nested sequences
-    def _flatten_element(ds, prefix=""):
-        for elem in ds:
-            # Skip pixel data which is typically very large
-            if elem.tag == Tag("PixelData"):
+        inc_pending = None
+        if inc is not None:
+            full, inc_pending = _match_patterns(inc, name)
+            if full:
+                inc_pending = None
+            elif not inc_pending:
                 continue
 
-            # Create a readable tag name
-            if elem.keyword:
-                key = f"{prefix}{elem.keyword}"
-            else:
-                key = f"{prefix}{elem.tag}"
-
-            # Handle sequences (nested datasets)
-            if elem.VR == "SQ":
-                # For each item in the sequence
-                for i, item in enumerate(elem.value):
-                    _flatten_element(item, prefix=f"{key}[{i}].")
-            else:
-                # Regular element, just add it
-                flattened[key] = elem.value
-
-    _flatten_element(dataset)
+        exc_pending = None
+        if exc is not None:
+            full, exc_pending = _match_patterns(exc, name)
+            if full:
+                continue
+
+        elem = ds[tag]
+        key = prefix + name
+
+        # Handle sequences (nested datasets)
+        if elem.VR == "SQ":
+            if max_depth is not None and depth >= max_depth:
+                continue
+            # Push items in reverse so item 0 is visited first
+            for i in range(len(elem.value) - 1, -1, -1):
+                child_inc = None if inc_pending is None else _item_state(inc_pending, i)
+                if child_inc is not None and not child_inc:
+                    continue
+                child_exc = None if not exc_pending else _item_state(exc_pending, i)
+                if child_exc is None and exc_pending:
+                    continue
+                stack.append((elem.value[i], None, f"{key}[{i}].", depth + 1, child_inc, child_exc or None))
+        elif inc_pending is None:
+            # Regular element, just add it (unless an include pattern expects it to be a sequence)
+            flattened[key] = elem.value
+
     return flattened
 
 
 def extract_index(string):
-    # Pattern to match digits inside square brackets
-    pattern = r"\[(\d+)\]"
-
-    # Search for the pattern in the string
-    match = re.search(pattern, string)
+    # Search for the first pattern of digits inside square brackets
+    match = _INDEX.search(string)
 
     # If found, return the digit as an integer
     if match:
@@ -45,3 +213,150 @@ def extract_index(string):
 
     # Return None or raise an exception if no match is found
     return None
+
+
+def _as_key_list(keys):
+    if isinstance(keys, str):
+        return [keys]
+    if hasattr(keys, "tolist"):  # pandas Index/Series, numpy array
+        keys = keys.tolist()
+    return [str(k) for k in keys]
+
+
+def parse_flattened_keys(keys) -> np.ndarray:
+    """
+    Split flattened keys into their path components in one vectorized pass.
+
+    ``"A[0].B[3].C"`` yields three components: ``("A", 0)``, ``("B", 3)`` and
+    ``("C", -1)``. All keys are joined into one buffer and separators, brackets
+    and indices are located with NumPy, so there is no per-key regex call.
+
+    Args:
+        keys: A key, or a list / numpy array / pandas Index or Series of keys
+
+    Returns:
+        np.ndarray: Structured array with one row per component and fields
+        ``key`` (position of the key in the input), ``level`` (depth of the
+        component in the key), ``name`` and ``index`` (-1 if not indexed)
+    """
+    keys = _as_key_list(keys)
+    if not keys:
+        return np.empty(0, dtype=[("key", np.intp), ("level", np.int32), ("name", "U1"), ("index", np.int64)])
+    if "" in keys:
+        raise ValueError("Cannot parse an empty key")
+
+    text = "\n".join(keys)
+    buf = np.frombuffer((text + "\n").encode(), dtype=np.uint8)
+
+    # Every component ends at a "." or at the "\n" that ends its key
+    ends = np.flatnonzero((buf == ord(".")) | (buf == ord("\n")))
+    is_last = buf[ends] == ord("\n")
+    n = len(ends)
+
+    # Indexed components look like "Name[123]"
+    opens = np.flatnonzero(buf == ord("["))
+    indexed = np.searchsorted(ends, opens)
+    closes = ends[indexed] - 1
+    n_digits = closes - opens - 1
+    if (np.any(buf[closes] != ord("]")) or np.any(n_digits < 1)
+            or np.count_nonzero(buf == ord("]")) != len(opens)):
+        raise ValueError("Malformed index in flattened key")
+    # Every byte between "[" and "]" must be a digit
+    inside = np.zeros(len(buf) + 1, dtype=np.int64)
+    np.add.at(inside, opens + 1, 1)
+    np.add.at(inside, closes, -1)
+    inside = np.cumsum(inside[:-1]) > 0
+    if np.any((buf[inside] < ord("0")) | (buf[inside] > ord("9"))):
+        raise ValueError("Malformed index in flattened key")
+    values = np.zeros(len(opens), dtype=np.int64)
+    for k in range(int(n_digits.max()) if len(opens) else 0):
+        more = k < n_digits
+        values[more] = values[more] * 10 + (buf[opens[more] + 1 + k].astype(np.int64) - ord("0"))
+
+    key = np.zeros(n, dtype=np.intp)
+    key[1:] = np.cumsum(is_last[:-1])
+    first = np.flatnonzero(np.concatenate(([True], is_last[:-1])))
+
+    # Dropping the indices leaves the names separated by "." and "\n"
+    names = np.array(_INDEX.sub("", text).replace("\n", ".").split("."))
+
+    parsed = np.empty(n, dtype=[("key", np.intp), ("level", np.int32), ("name", names.dtype), ("index", np.int64)])
+    parsed["key"] = key
+    parsed["level"] = np.arange(n) - first[key]
+    parsed["name"] = names
+    parsed["index"] = -1
+    parsed["index"][indexed] = values
+    return parsed
+
+
+def unflatten_dicom_dict(flattened: dict) -> dict:
+    """
+    Rebuild a nested dict from the output of ``flatten_dicom_dataset``.
+
+    Sequences become lists of dicts, e.g. ``{"A[1].B": 5}`` becomes
+    ``{"A": [{}, {"B": 5}]}``. Items that had no flattened elements are
+    restored as empty dicts.
+
+    Args:
+        flattened: Mapping of flattened keys to values
+
+    Returns:
+        dict: Nested representation of the dataset
+    """
+    keys = list(flattened)
+    parsed = parse_flattened_keys(keys)
+    # Component rows are grouped by key, so split at each key boundary
+    bounds = np.flatnonzero(parsed["level"] == 0)[1:]
+    names = np.split(parsed["name"], bounds)
+    indices = np.split(parsed["index"], bounds)
+
+    nested = {}
+    for key, key_names, key_indices in zip(keys, names, indices):
+        key_names = key_names.tolist()
+        node = nested
+        for name, index in zip(key_names[:-1], key_indices[:-1].tolist()):
+            items = node.setdefault(name, [])
+            if index >= len(items):
+                items.extend({} for _ in range(index + 1 - len(items)))
+            node = items[index]
+        node[key_names[-1]] = flattened[key]
+    return nested
+
+
+def flattened_to_long(rows):
+    """
+    Convert flattened rows to a long-format table for pivoting sequence items.
+
+    Each non-null cell becomes one row. Keys are split at their last sequence
+    index, so ``"A[0].B[3].C"`` gives ``sequence="A[0].B"``, ``item=3`` and
+    ``attribute="C"``; keys outside a sequence have ``sequence=""`` and
+    ``item=-1``. Pivoting with ``index=["row", "sequence", "item"]`` and
+    ``columns="attribute"`` gives one row per sequence item.
+
+    Args:
+        rows: A flattened dict, a list of flattened dicts or a wide DataFrame
+            (one row per dataset, one column per flattened key)
+
+    Returns:
+        pd.DataFrame: Columns ``row``, ``key``, ``sequence``, ``item``,
+        ``attribute`` and ``value``
+    """
+    import pandas as pd
+
+    if isinstance(rows, dict):
+        rows = [rows]
+    wide = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+
+    # Parse each column once, then broadcast to the cells
+    parts = pd.Series(_as_key_list(wide.columns)).str.extract(_KEY_SPLIT)
+    columns = pd.DataFrame({
+        "key": list(wide.columns),
+        "sequence": parts[0].fillna("").to_numpy(),
+        "item": parts[1].fillna(-1).astype(np.int64).to_numpy(),
+        "attribute": parts[2].to_numpy(),
+    })
+
+    long = wide.rename_axis(index="row").melt(ignore_index=False, var_name="key").reset_index()
+    long = long[long["value"].notna()]
+    long = long.merge(columns, on="key", how="left", sort=False)
+    return long[["row", "key", "sequence", "item", "attribute", "value"]]
@@ -0,0 +1,321 @@
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import sys
+from typing import Iterable, Iterator, List, Optional, Union
+
+from pydicom import dcmread
+from pydicom.multival import MultiValue
+
+from .dicom import flatten_dicom_dataset
+
+logger = logging.getLogger(__name__)
+
+PATH_COLUMN = "FilePath"
+PART_PATTERN = "part-*.parquet"
+
+
+def iter_dicom_paths(source: Union[str, Iterable[str]], suffixes=None) -> Iterator[str]:
+    """
+    Yield file paths from a directory, a glob pattern or an iterable of paths.
+
+    Args:
+        source: Directory (walked recursively), glob pattern (``**`` supported)
+            or an iterable of file paths
+        suffixes: Optional iterable of file suffixes to keep (e.g. ``[".dcm"]``).
+            DICOM files often have no extension, so by default every file is kept.
+
+    Yields:
+        str: Path to each candidate file
+    """
+    if suffixes is not None:
+        suffixes = tuple(s.lower() for s in suffixes)
+
+    def _keep(path):
+        return suffixes is None or path.lower().endswith(suffixes)
+
+    if not isinstance(source, (str, os.PathLike)):
+        for path in source:
+            if _keep(str(path)):
+                yield str(path)
+        return
+
+    source = os.fspath(source)
+    if os.path.isdir(source):
+        stack = [source]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and _keep(entry.name):
+                        yield entry.path
+    elif glob.has_magic(source):
+        for path in glob.iglob(source, recursive=True):
+            if os.path.isfile(path) and _keep(path):
+                yield path
+    elif os.path.isfile(source):
+        yield source
+    else:
+        raise FileNotFoundError(f"No such file, directory or glob match: {source}")
+
+
+def _column_value(value, as_str=False):
+    """Convert a pydicom element value to a plain Python value for a table cell."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, MultiValue):
+        if as_str:
+            return "\\".join(str(v) for v in value)
+        return [_column_value(v) for v in value]
+    if isinstance(value, bytes):
+        return value.hex() if as_str else value
+    if isinstance(value, str):
+        return str(value)
+    if as_str:
+        return str(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return str(value)
+
+
+def read_flattened_header(path: str, force: bool = False, as_str: bool = False, **flatten_kwargs):
+    """
+    Read a single DICOM file without pixel data and flatten its header.
+
+    Args:
+        path: Path to the DICOM file
+        force: Passed to ``pydicom.dcmread`` to read files without a preamble
+        as_str: If True, every value is converted to ``str`` (columnar output)
+        **flatten_kwargs: Forwarded to ``flatten_dicom_dataset``
+
+    Returns:
+        dict: Flattened header with plain Python values and the file path
+    """
+    ds = dcmread(path, stop_before_pixels=True, force=force)
+    row = {key: _column_value(value, as_str) for key, value in flatten_dicom_dataset(ds, **flatten_kwargs).items()}
+    row[PATH_COLUMN] = path
+    return row
+
+
+def _worker(args):
+    # Top-level so it can be pickled by the process pool
+    path, force, as_str, flatten_kwargs = args
+    try:
+        return path, read_flattened_header(path, force=force, as_str=as_str, **flatten_kwargs), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def iter_flattened_chunks(
+    source,
+    chunk_size: int = 1000,
+    max_workers: Optional[int] = None,
+    force: bool = False,
+    as_str: bool = False,
+    suffixes=None,
+    **flatten_kwargs,
+) -> Iterator[List[dict]]:
+    """
+    Read and flatten DICOM headers in a process pool, yielding rows in chunks.
+
+    Files are read with ``stop_before_pixels=True``. Unreadable files are logged
+    and skipped. Rows are yielded in completion order, not input order; every row
+    carries its source path in the ``FilePath`` column.
+
+    Args:
+        source: Directory, glob pattern or iterable of paths (see ``iter_dicom_paths``)
+        chunk_size: Number of rows per yielded chunk
+        max_workers: Number of worker processes (default: ``os.cpu_count()``).
+            ``max_workers=1`` reads in the calling process.
+        force: Passed to ``pydicom.dcmread``
+        as_str: If True, every value is converted to ``str`` (needed for Parquet)
+        suffixes: Optional file suffix filter (see ``iter_dicom_paths``)
+        **flatten_kwargs: Forwarded to ``flatten_dicom_dataset``
+
+    Yields:
+        list of dict: Up to ``chunk_size`` flattened rows
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = ((path, force, as_str, flatten_kwargs) for path in iter_dicom_paths(source, suffixes))
+
+    if max_workers == 1:
+        pool = None
+        results = map(_worker, tasks)
+    else:
+        pool = multiprocessing.Pool(max_workers)
+        # Small chunks keep every core busy while amortising IPC per file
+        results = pool.imap_unordered(_worker, tasks, chunksize=16)
+
+    n_failed = 0
+    try:
+        chunk = []
+        for path, row, error in results:
+            if row is None:
+                n_failed += 1
+                logger.warning("Skipping unreadable file %s (%s)", path, error)
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if n_failed:
+            logger.warning("Skipped %d unreadable files", n_failed)
+
+
+def _chunk_to_arrow(chunk):
+    """Build a string ``pyarrow.Table`` from rows that may have different keys."""
+    import pyarrow as pa
+
+    # from_pylist would infer the columns from the first row only
+    names = dict.fromkeys(key for row in chunk for key in row)
+    return pa.table({name: pa.array([row.get(name) for row in chunk], pa.string()) for name in names})
+
+
+def flatten_dicom_files(source, **kwargs):
+    """
+    Flatten the headers of many DICOM files into a pandas DataFrame.
+
+    Args:
+        source: Directory, glob pattern or iterable of paths
+        **kwargs: Forwarded to ``iter_flattened_chunks``
+
+    Returns:
+        pd.DataFrame: One row per readable file, one column per flattened key
+    """
+    import pandas as pd
+
+    frames = [pd.DataFrame.from_records(chunk) for chunk in iter_flattened_chunks(source, **kwargs)]
+    if not frames:
+        return pd.DataFrame(columns=[PATH_COLUMN])
+    return pd.concat(frames, ignore_index=True, sort=False)
+
+
+def flatten_dicom_files_to_arrow(source, **kwargs):
+    """
+    Flatten the headers of many DICOM files into a ``pyarrow.Table`` of strings.
+
+    Args:
+        source: Directory, glob pattern or iterable of paths
+        **kwargs: Forwarded to ``iter_flattened_chunks``
+
+    Returns:
+        pyarrow.Table: One row per readable file; keys missing from a file are null
+    """
+    import pyarrow as pa
+
+    kwargs["as_str"] = True
+    tables = [_chunk_to_arrow(chunk) for chunk in iter_flattened_chunks(source, **kwargs)]
+    if not tables:
+        return pa.table({PATH_COLUMN: pa.array([], pa.string())})
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def write_flattened_parquet(source, output_dir: str, **kwargs) -> int:
+    """
+    Stream flattened DICOM headers to a directory of Parquet part files.
+
+    Every chunk is written as soon as it is complete, so memory stays bounded by
+    ``chunk_size``. All values are stored as strings. Because files differ in
+    which keys they contain, the union schema is written to ``_common_metadata``;
+    read the result back with ``read_flattened_parquet``. Part files and
+    metadata of a previous run in ``output_dir`` are deleted first; other files
+    are left alone.
+
+    Args:
+        source: Directory, glob pattern or iterable of paths
+        output_dir: Output directory (created if needed)
+        **kwargs: Forwarded to ``iter_flattened_chunks``
+
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Metadata first, so an interrupted cleanup never leaves it describing stale parts
+    stale = [os.path.join(output_dir, "_common_metadata")] + glob.glob(os.path.join(output_dir, PART_PATTERN))
+    for path in stale:
+        if os.path.exists(path):
+            os.remove(path)
+
+    kwargs["as_str"] = True
+    columns = {}
+    n_rows = 0
+    for i, chunk in enumerate(iter_flattened_chunks(source, **kwargs)):
+        table = _chunk_to_arrow(chunk)
+        pq.write_table(table, os.path.join(output_dir, f"part-{i:05d}.parquet"))
+        columns.update(dict.fromkeys(table.column_names))
+        n_rows += table.num_rows
+
+    schema = pa.schema([(name, pa.string()) for name in columns])
+    pq.write_metadata(schema, os.path.join(output_dir, "_common_metadata"))
+    return n_rows
+
+
+def read_flattened_parquet(output_dir: str, columns=None):
+    """
+    Read a directory written by ``write_flattened_parquet`` into a DataFrame.
+
+    Args:
+        output_dir: Directory containing the part files and ``_common_metadata``
+        columns: Optional list of columns to read
+
+    Returns:
+        pd.DataFrame: Flattened headers with the union of all columns
+    """
+    import pyarrow.dataset as pds
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(os.path.join(output_dir, "_common_metadata"))
+    parts = sorted(glob.glob(os.path.join(output_dir, PART_PATTERN)))
+    dataset = pds.dataset(parts, schema=schema, format="parquet")
+    return dataset.to_table(columns=columns).to_pandas()
+
+
+def main(argv=None):
+    """Command line entry point: ``dlfx-flatten SOURCE OUTPUT``."""
+    parser = argparse.ArgumentParser(
+        prog="dlfx-flatten",
+        description="Flatten DICOM headers from a directory or glob into a Parquet dataset.",
+    )
+    parser.add_argument("source", help="Directory (recursive) or glob pattern of DICOM files")
+    parser.add_argument("output", help="Output Parquet directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per output chunk")
+    parser.add_argument("--suffix", action="append", dest="suffixes", help="Only read files with this suffix")
+    parser.add_argument("--force", action="store_true", help="Read files without a DICOM preamble")
+    parser.add_argument("--include", action="append", help="Keyword, tag or key pattern to keep (repeatable)")
+    parser.add_argument("--exclude", action="append", help="Keyword, tag or key pattern to drop (repeatable)")
+    parser.add_argument("--max-depth", type=int, default=None, help="Maximum nested sequence depth")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    kwargs = dict(
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        force=args.force,
+        suffixes=args.suffixes,
+        include=args.include,
+        exclude=args.exclude,
+        max_depth=args.max_depth,
+    )
+
+    n_rows = write_flattened_parquet(args.source, args.output, **kwargs)
+    logger.info("Wrote %d rows to %s", n_rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
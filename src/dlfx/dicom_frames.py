@@ -0,0 +1,198 @@
+import struct
+
+import numpy as np
+from pydicom import dcmread
+from pydicom.uid import UID, ImplicitVRLittleEndian
+
+try:
+    from pydicom.pixels import pixel_array as _decode_pixel_array
+except ImportError:  # pydicom < 3
+    _decode_pixel_array = None
+
+PIXEL_DATA_TAG = (0x7FE0, 0x0010)
+# Explicit VRs with a 2-byte reserved field and a 4-byte length
+_LONG_VRS = {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"SQ", b"UC", b"UN", b"UR", b"UT"}
+_UNDEFINED_LENGTH = 0xFFFFFFFF
+
+
+def _pixel_data_location(fp, implicit_vr: bool, little_endian: bool):
+    """Parse the PixelData element header at the current position of ``fp``.
+
+    Returns:
+        tuple: ``(offset, length)`` of the value, or None if it is not there or
+        has undefined length (encapsulated)
+    """
+    endian = "<" if little_endian else ">"
+    header = fp.read(8)
+    if len(header) < 8:
+        return None
+    group, element = struct.unpack(endian + "HH", header[:4])
+    if (group, element) != PIXEL_DATA_TAG:
+        return None
+    if implicit_vr:
+        length = struct.unpack(endian + "L", header[4:])[0]
+    elif header[4:6] in _LONG_VRS:
+        length = struct.unpack(endian + "L", fp.read(4))[0]
+    else:
+        length = struct.unpack(endian + "H", header[6:])[0]
+    if length == _UNDEFINED_LENGTH:
+        return None
+    return fp.tell(), length
+
+
+class DicomFrameReader:
+    """
+    Random access to the frames of a (multi-frame) DICOM file.
+
+    For uncompressed transfer syntaxes the PixelData value is located in the
+    file and memory-mapped, so ``reader[i]`` is a zero-copy NumPy view and
+    only the pages of the requested frames are ever read. Other files
+    (compressed or deflated transfer syntaxes, 1-bit or YBR data) fall back to
+    decoding one frame per access.
+
+    Frames have shape ``(Rows, Columns)``, or ``(Rows, Columns, SamplesPerPixel)``
+    for color, and contain stored values: pass them to ``dicom_to_8bit`` together
+    with ``reader.dataset`` for rescale and windowing.
+
+    Example:
+        >>> with DicomFrameReader("volume.dcm") as reader:
+        ...     middle = dicom_to_8bit(reader.dataset, pixels=reader[len(reader) // 2])
+    """
+
+    def __init__(self, path: str, force: bool = False):
+        """
+        Args:
+            path: Path to the DICOM file
+            force: Read files without a DICOM preamble / file meta header
+        """
+        self.path = path
+        self.force = force
+        with open(path, "rb") as fp:
+            self.dataset = dcmread(fp, stop_before_pixels=True, force=force)
+            ds = self.dataset
+            self.num_frames = int(ds.get("NumberOfFrames", 1) or 1)
+            self.samples_per_pixel = int(ds.get("SamplesPerPixel", 1))
+            self._frames = None
+            self._sign_shift = 0
+
+            file_meta = getattr(ds, "file_meta", None)
+            transfer_syntax = UID(file_meta.get("TransferSyntaxUID", ImplicitVRLittleEndian)
+                                  if file_meta is not None else ImplicitVRLittleEndian)
+            if (
+                transfer_syntax.is_encapsulated
+                or transfer_syntax.is_deflated
+                or int(ds.get("BitsAllocated", 0)) not in (8, 16, 32, 64)
+                or str(ds.get("PhotometricInterpretation", "")).upper().startswith("YBR")
+            ):
+                return
+            location = _pixel_data_location(fp, transfer_syntax.is_implicit_VR, transfer_syntax.is_little_endian)
+            if location is None:
+                return
+        self._map(*location, little_endian=transfer_syntax.is_little_endian)
+
+    def _map(self, offset: int, length: int, little_endian: bool):
+        ds = self.dataset
+        bits_allocated = int(ds.BitsAllocated)
+        signed = int(ds.get("PixelRepresentation", 0)) == 1
+        dtype = np.dtype(f"{'<' if little_endian else '>'}{'i' if signed else 'u'}{bits_allocated // 8}")
+
+        rows, columns = int(ds.Rows), int(ds.Columns)
+        samples = self.samples_per_pixel
+        frame_items = rows * columns * samples
+        if length < self.num_frames * frame_items * dtype.itemsize:
+            return  # Truncated or inconsistent header: let the decoder report it
+
+        mapped = np.memmap(self.path, dtype=dtype, mode="r", offset=offset,
+                           shape=(self.num_frames * frame_items,))
+        if samples == 1:
+            self._frames = mapped.reshape(self.num_frames, rows, columns)
+        elif int(ds.get("PlanarConfiguration", 0)) == 1:
+            # Color-by-plane: expose the same (rows, columns, samples) layout as a strided view
+            self._frames = mapped.reshape(self.num_frames, samples, rows, columns).transpose(0, 2, 3, 1)
+        else:
+            self._frames = mapped.reshape(self.num_frames, rows, columns, samples)
+
+        bits_stored = int(ds.get("BitsStored", bits_allocated))
+        if signed and bits_stored < bits_allocated:
+            self._sign_shift = bits_allocated - bits_stored
+
+    @property
+    def is_mapped(self) -> bool:
+        """True if frames are zero-copy views of the memory-mapped file."""
+        return self._frames is not None
+
+    def __len__(self):
+        return self.num_frames
+
+    def frame(self, index: int) -> np.ndarray:
+        """
+        Return the stored values of frame ``index`` (negative indices count from the end).
+
+        Memory-mapped frames are returned as views; data that needs sign
+        extension or a byte swap is copied.
+        """
+        if not -self.num_frames <= index < self.num_frames:
+            raise IndexError(f"Frame {index} out of range for {self.num_frames} frames")
+        index %= self.num_frames
+        if self._frames is None:
+            return self._decode(index)
+
+        frame = self._frames[index]
+        if not frame.dtype.isnative:
+            frame = frame.astype(frame.dtype.newbyteorder("="))
+        if self._sign_shift:
+            frame = (frame << self._sign_shift) >> self._sign_shift
+        return frame
+
+    def _decode(self, index: int) -> np.ndarray:
+        if _decode_pixel_array is not None:
+            return _decode_pixel_array(self.path, index=index)
+        arr = dcmread(self.path).pixel_array
+        return arr[index] if self.num_frames > 1 else arr
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.frame(index)
+
+    def __iter__(self):
+        for index in range(self.num_frames):
+            yield self.frame(index)
+
+    def close(self):
+        """Release the memory map (views already returned stay valid)."""
+        self._frames = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        # Memory maps would be pickled as full copies; re-map in the receiving process
+        state = self.__dict__.copy()
+        state["_frames"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        reader = DicomFrameReader(self.path, force=self.force)
+        self._frames, self._sign_shift = reader._frames, reader._sign_shift
+
+
+def frame_counts(paths, force: bool = False) -> list:
+    """
+    Read ``NumberOfFrames`` (1 if absent) of each DICOM file without loading pixel data.
+
+    Args:
+        paths: Iterable of DICOM file paths
+        force: Read files without a DICOM preamble / file meta header
+
+    Returns:
+        list: Number of frames per file
+    """
+    counts = []
+    for path in paths:
+        ds = dcmread(path, stop_before_pixels=True, force=force,
+                     specific_tags=["NumberOfFrames"])
+        counts.append(int(ds.get("NumberOfFrames", 1) or 1))
+    return counts
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import sqlite3
+
+from .dicom_bulk import PATH_COLUMN, _column_value, iter_dicom_paths, iter_flattened_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEXED_KEYS = (
+    "PatientID",
+    "AccessionNumber",
+    "StudyInstanceUID",
+    "SeriesInstanceUID",
+    "SOPInstanceUID",
+    "Modality",
+    "StudyDate",
+    "SeriesDate",
+)
+
+
+def _json_path(key):
+    return '$."' + key.replace('"', '\\"') + '"'
+
+
+def _filter_value(value):
+    """A filter value in the stored string form (see ``DicomIndex.query``)."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return "\\".join(str(v) for v in value)
+    return _column_value(value, as_str=True)
+
+
+class DicomIndex:
+    """
+    Persistent SQLite index of flattened DICOM headers.
+
+    Each file is stored with its path, size, mtime and flattened header (as JSON).
+    A configurable set of keys is also stored in indexed columns so that cohort
+    queries on e.g. Modality or SeriesInstanceUID do not touch the JSON at all.
+    Rescans only read files that are new or whose size or mtime changed.
+
+    Values are stored as strings in both places, as in the Parquet output of
+    ``write_flattened_parquet``: multi-valued elements are joined with ``"\\"``
+    and binary values are hex encoded.
+
+    Example:
+        index = DicomIndex("headers.sqlite")
+        index.update("/data/archive")
+        mg = index.query(Modality="MG", StudyDate=("20200101", "20201231"))
+    """
+
+    def __init__(self, db_path: str, indexed_keys=DEFAULT_INDEXED_KEYS):
+        """
+        Open (or create) an index.
+
+        Args:
+            db_path: Path to the SQLite database file
+            indexed_keys: Flattened keys stored in their own indexed columns.
+                Only used when the database is created; an existing index keeps
+                the keys it was created with.
+        """
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'indexed_keys'").fetchone()
+        if row is not None:
+            self.indexed_keys = tuple(json.loads(row[0]))
+        else:
+            self.indexed_keys = tuple(indexed_keys)
+            self._create_tables()
+
+    def _create_tables(self):
+        columns = "".join(f', "{key}" TEXT' for key in self.indexed_keys)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, header TEXT" + columns + ")"
+            )
+            for i, key in enumerate(self.indexed_keys):
+                self.conn.execute(f'CREATE INDEX idx_files_{i} ON files ("{key}")')
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('indexed_keys', ?)", (json.dumps(self.indexed_keys),)
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files WHERE header IS NOT NULL").fetchone()[0]
+
+    def update(self, source, remove_missing: bool = False, suffixes=None, **kwargs) -> dict:
+        """
+        Scan ``source`` and (re)index files that are new or changed.
+
+        A file is considered unchanged if its size and mtime match the index.
+        Unreadable files are recorded without a header so they are not retried
+        until they change.
+
+        Args:
+            source: Directory, glob pattern or iterable of paths
+            remove_missing: If True, drop index entries for files not seen in this scan
+            suffixes: Optional file suffix filter (see ``iter_dicom_paths``)
+            **kwargs: Forwarded to ``iter_flattened_chunks`` (e.g. ``max_workers``,
+                ``chunk_size``, ``include``, ``exclude``)
+
+        Returns:
+            dict: Counts of ``scanned``, ``updated``, ``unreadable`` and ``removed`` files
+        """
+        kwargs["as_str"] = True
+        known = {path: (size, mtime) for path, size, mtime in self.conn.execute("SELECT path, size, mtime FROM files")}
+
+        stats = {}
+        seen = set()
+        for path in iter_dicom_paths(source, suffixes):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            if known.get(path) != (st.st_size, st.st_mtime):
+                stats[path] = (st.st_size, st.st_mtime)
+
+        columns = ", ".join(["path", "size", "mtime", "header"] + [f'"{key}"' for key in self.indexed_keys])
+        placeholders = ", ".join("?" * (4 + len(self.indexed_keys)))
+        insert = f"INSERT OR REPLACE INTO files ({columns}) VALUES ({placeholders})"
+
+        pending = set(stats)
+        n_updated = 0
+        chunks = iter_flattened_chunks(list(stats), **kwargs) if stats else ()
+        for chunk in chunks:
+            rows = []
+            for header in chunk:
+                path = header.pop(PATH_COLUMN)
+                pending.discard(path)
+                rows.append((path, *stats[path], json.dumps(header), *(header.get(key) for key in self.indexed_keys)))
+            with self.conn:
+                self.conn.executemany(insert, rows)
+            n_updated += len(rows)
+
+        # Whatever was not returned could not be read
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime) VALUES (?, ?, ?)",
+                [(path, *stats[path]) for path in pending],
+            )
+
+        n_removed = 0
+        if remove_missing:
+            missing = [(path,) for path in known if path not in seen]
+            with self.conn:
+                self.conn.executemany("DELETE FROM files WHERE path = ?", missing)
+            n_removed = len(missing)
+
+        result = {"scanned": len(seen), "updated": n_updated, "unreadable": len(pending), "removed": n_removed}
+        logger.info("Index update: %s", result)
+        return result
+
+    def _column_sql(self, key):
+        if key in self.indexed_keys:
+            return f'"{key}"'
+        return "json_extract(header, '" + _json_path(key).replace("'", "''") + "')"
+
+    def _bound_clause(self, column, op, bound, params):
+        if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+            # Numeric bounds compare numerically, not as strings
+            column = f"CAST({column} AS REAL)"
+        else:
+            bound = _filter_value(bound)
+        params.append(bound)
+        return f"{column} {op} ?"
+
+    def query(self, columns=None, **filters):
+        """
+        Return indexed headers matching all filters as a DataFrame.
+
+        Filters are given as ``key=value`` on flattened keys and compare against
+        the stored strings, so ``SliceThickness=1.5`` matches ``"1.5"`` and a
+        multi-valued element matches its ``"\\"``-joined values (e.g.
+        ``ImageType="ORIGINAL\\PRIMARY"``). A list or set matches any of its
+        values, and a 2-tuple ``(low, high)`` is an inclusive range where either
+        bound may be None; string bounds compare as strings (which is correct
+        for DICOM dates) and numeric bounds compare numerically. Keys that are
+        not valid identifiers can be passed with ``**{"Sequence[0].Keyword": value}``.
+
+        Args:
+            columns: Optional list of flattened keys to return. Selecting columns
+                avoids decoding the stored JSON for every row.
+            **filters: Header filters
+
+        Returns:
+            pd.DataFrame: One row per matching file, with string values and a ``FilePath`` column
+        """
+        import pandas as pd
+
+        clauses = ["header IS NOT NULL"]
+        params = []
+        for key, value in filters.items():
+            column = self._column_sql(key)
+            if isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    clauses.append(self._bound_clause(column, ">=", low, params))
+                if high is not None:
+                    clauses.append(self._bound_clause(column, "<=", high, params))
+            elif isinstance(value, (list, set, frozenset)):
+                value = [_filter_value(v) for v in value]
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            elif value is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(_filter_value(value))
+        where = " AND ".join(clauses)
+
+        if columns is not None:
+            select = ", ".join(["path"] + [self._column_sql(key) for key in columns])
+            cursor = self.conn.execute(f"SELECT {select} FROM files WHERE {where}", params)
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=[PATH_COLUMN] + list(columns))
+
+        cursor = self.conn.execute(f"SELECT path, header FROM files WHERE {where}", params)
+        records = []
+        for path, header in cursor:
+            record = json.loads(header)
+            record[PATH_COLUMN] = path
+            records.append(record)
+        if not records:
+            return pd.DataFrame(columns=[PATH_COLUMN])
+        return pd.DataFrame.from_records(records)
@@ -0,0 +1,142 @@
+import numpy as np
+from pydicom.dataset import Dataset
+
+try:
+    from pydicom.pixels import apply_modality_lut, apply_voi_lut
+except ImportError:  # pydicom < 3
+    from pydicom.pixel_data_handlers.util import apply_modality_lut, apply_voi_lut
+
+from .image import downsample_array, to_8bit_rgb
+
+
+def _window_params(ds: Dataset, index: int = 0):
+    """Return ``(center, width, function)`` of the ``index``-th VOI window, or None."""
+    if "WindowCenter" not in ds or "WindowWidth" not in ds:
+        return None
+    centers, widths = ds.WindowCenter, ds.WindowWidth
+    if not isinstance(centers, (int, float)):
+        centers, widths = centers[index], widths[index]
+    function = str(ds.get("VOILUTFunction", "LINEAR") or "LINEAR").upper()
+    return float(centers), float(widths), function
+
+
+def _rescale_params(ds: Dataset):
+    slope = float(ds.get("RescaleSlope", 1) or 1)
+    intercept = float(ds.get("RescaleIntercept", 0) or 0)
+    return slope, intercept
+
+
+def apply_window(values: np.ndarray, center: float, width: float, function: str = "LINEAR") -> np.ndarray:
+    """
+    Apply a DICOM VOI window (PS3.3 C.11.2.1.2) and map the result to ``[0, 255]``.
+
+    Args:
+        values: Array of modality values (after rescale)
+        center: Window Center
+        width: Window Width
+        function: VOI LUT Function: ``"LINEAR"``, ``"LINEAR_EXACT"`` or ``"SIGMOID"``
+
+    Returns:
+        np.ndarray: float32 array in ``[0, 255]``
+    """
+    out = np.asarray(values, dtype=np.float32).copy()
+    if function == "SIGMOID":
+        out -= center
+        out *= -4.0 / width
+        np.exp(out, out=out)
+        out += 1.0
+        np.divide(255.0, out, out=out)
+        return out
+
+    if function == "LINEAR_EXACT":
+        low, span = center - width / 2, width
+    else:
+        # LINEAR: values below c - 0.5 - (w - 1) / 2 map to 0, above c - 0.5 + (w - 1) / 2 to 255
+        width = max(width, 1.0)
+        low, span = center - 0.5 - (width - 1) / 2, width - 1
+    if span <= 0:
+        return np.where(out > center, 255.0, 0.0).astype(np.float32)
+    out -= low
+    out *= 255.0 / span
+    np.clip(out, 0, 255, out=out)
+    return out
+
+
+def _to_8bit(mapped: np.ndarray, lo, hi, windowed: bool, invert: bool) -> np.ndarray:
+    """Map modality/VOI output to uint8, min-max scaling over ``[lo, hi]`` unless windowed."""
+    if windowed:
+        out = mapped
+    else:
+        span = hi - lo
+        out = np.zeros(mapped.shape, dtype=np.float32)
+        if span > 0:
+            out = (mapped.astype(np.float32) - np.float32(lo)) * np.float32(255.0 / span)
+            np.clip(out, 0, 255, out=out)
+    if invert:
+        out = 255 - out
+    return out.astype(np.uint8)
+
+
+def dicom_to_8bit(ds: Dataset, pixels: np.ndarray = None, voi: bool = True, window_index: int = 0,
+                  target_size=None) -> np.ndarray:
+    """
+    Convert DICOM pixel data to an 8-bit image for display or model input.
+
+    For grayscale images the Modality LUT (Rescale Slope/Intercept or Modality
+    LUT Sequence) and, with ``voi=True``, the VOI window or VOI LUT Sequence
+    are applied, and MONOCHROME1 images are inverted. Without a VOI transform
+    the modality values are min-max scaled. For 8/16-bit stored values the
+    whole chain is evaluated once per possible stored value and applied as a
+    single lookup table; other data is processed in float32. Color images are
+    min-max scaled per channel.
+
+    Args:
+        ds: pydicom Dataset (its pixel data is used unless ``pixels`` is given)
+        pixels: Optional stored-value array, e.g. a single frame
+        voi: Apply the VOI window / VOI LUT if present
+        window_index: Which window to use when several are given
+        target_size: Optional minimum output size; the stored values are
+            area-averaged towards it before the lookup
+
+    Returns:
+        np.ndarray: uint8 array of shape ``(H, W)`` for grayscale or ``(H, W, 3)`` for color
+    """
+    arr = ds.pixel_array if pixels is None else pixels
+    if target_size is not None:
+        arr = downsample_array(arr, target_size)
+
+    if int(ds.get("SamplesPerPixel", 1)) > 1:
+        return to_8bit_rgb(arr)
+
+    invert = str(ds.get("PhotometricInterpretation", "")).upper() == "MONOCHROME1"
+    window = _window_params(ds, window_index) if voi else None
+    voi_lut = voi and window is None and "VOILUTSequence" in ds
+
+    def _mapping(values):
+        # Modality LUT then VOI; returns (mapped values, windowed)
+        if "ModalityLUTSequence" in ds:
+            values = apply_modality_lut(values, ds)
+        else:
+            slope, intercept = _rescale_params(ds)
+            if slope != 1 or intercept != 0:
+                values = values.astype(np.float32) * np.float32(slope) + np.float32(intercept)
+        if window is not None:
+            return apply_window(values, *window), True
+        if voi_lut:
+            return apply_voi_lut(values, ds, index=window_index), False
+        return values, False
+
+    if arr.dtype.kind in "ui" and arr.dtype.itemsize <= 2:
+        # Evaluate the chain for every stored value in the image's range, then look up once
+        lo, hi = int(arr.min()), int(arr.max())
+        values = np.arange(lo, hi + 1, dtype=np.int64).astype(arr.dtype)
+        mapped, windowed = _mapping(values)
+        lut = _to_8bit(np.asarray(mapped), np.min(mapped), np.max(mapped), windowed, invert)
+        # Place the LUT at the unsigned bit pattern of each stored value and index without temporaries
+        unsigned = np.dtype(f"u{arr.dtype.itemsize}")
+        full_lut = np.zeros(1 << (8 * arr.dtype.itemsize), dtype=np.uint8)
+        full_lut[values.view(unsigned)] = lut
+        return full_lut[arr.view(unsigned)]
+
+    mapped, windowed = _mapping(arr)
+    return _to_8bit(np.asarray(mapped), np.min(mapped), np.max(mapped), windowed, invert)
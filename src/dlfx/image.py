@@ -0,0 +1,297 @@
+import numpy as np
+from PIL import Image
+
+
+def _as_nhwc(image, batch):
+    """Return a 4D ``(N, H, W, C)`` view of a single image or a batch, without copying."""
+    arr = np.asarray(image)
+    if arr.dtype == bool:
+        arr = arr.view(np.uint8)
+
+    if not batch:
+        arr = arr[None]
+    if arr.ndim == 3:
+        arr = arr[..., None]
+    if arr.ndim != 4:
+        raise ValueError(f"Unsupported image dimensions: {arr.ndim - 1 if not batch else arr.ndim}")
+
+    # 1 or 2 channels (L, LA) -> grayscale from the first; 3+ (RGB, RGBA) -> first three
+    if arr.shape[-1] < 3:
+        return arr[..., :1]
+    return arr[..., :3]
+
+
+def _target_wh(target_size):
+    if isinstance(target_size, int):
+        return target_size, target_size
+    return tuple(target_size)
+
+
+def _reduce_factor(width, height, target_size):
+    """Largest integer factor that keeps an image at least ``target_size`` in both dimensions."""
+    target_w, target_h = _target_wh(target_size)
+    return max(1, min(width // target_w, height // target_h))
+
+
+def _area_reduce(arr, factor):
+    """Average ``factor x factor`` blocks of an ``(N, H, W, C)`` array, keeping integer dtypes."""
+    if factor == 1:
+        return arr
+    n, h, w, c = arr.shape
+    h, w = h // factor * factor, w // factor * factor
+    blocks = arr[:, :h, :w].reshape(n, h // factor, factor, w // factor, factor, c)
+    area = factor * factor
+    if arr.dtype.kind in "ui" and arr.dtype.itemsize == 8 and blocks.size:
+        # 64-bit block sums can overflow: average in float64 unless every sum fits
+        info = np.iinfo(arr.dtype)
+        if blocks.max() > info.max // area or blocks.min() < info.min // area:
+            mean = np.rint(blocks.mean(axis=(2, 4), dtype=np.float64))
+            # float64(info.max) rounds up past the dtype: clip below it and map the rest to the maximum
+            top = mean >= float(info.max)
+            reduced = np.clip(mean, info.min, np.nextafter(float(info.max), 0)).astype(arr.dtype)
+            reduced[top] = info.max
+            return reduced
+    if arr.dtype.kind in "ui":
+        acc = np.uint64 if arr.dtype.kind == "u" else np.int64
+        summed = blocks.sum(axis=(2, 4), dtype=acc)
+        summed += area // 2
+        summed //= area
+        return summed.astype(arr.dtype)
+    return blocks.mean(axis=(2, 4), dtype=np.float32)
+
+
+def downsample_array(arr, target_size):
+    """
+    Area-average a single ``(H, W)`` or ``(H, W, C)`` array towards ``target_size``.
+
+    The image is reduced by the largest integer factor that keeps it at least
+    ``target_size`` in both dimensions; integer dtypes are preserved.
+
+    Args:
+        arr: Image array
+        target_size: Minimum output size, an int or ``(width, height)``
+
+    Returns:
+        np.ndarray: Downsampled array (``arr`` itself if no reduction is possible)
+    """
+    arr = np.asarray(arr)
+    factor = _reduce_factor(arr.shape[1], arr.shape[0], target_size)
+    if factor == 1:
+        return arr
+    nhwc = arr[None] if arr.ndim == 3 else arr[None, ..., None]
+    reduced = _area_reduce(nhwc, factor)[0]
+    return reduced if arr.ndim == 3 else reduced[..., 0]
+
+
+def draft_to_target(image, target_size, reduce=True):
+    """
+    Shrink a PIL image towards ``target_size`` before its pixels are normalized.
+
+    JPEGs that have not been loaded yet are decoded at a reduced scale with
+    ``draft``, which changes ``image`` in place; other images are unaffected
+    by the draft. With ``reduce=True`` the result is then box-averaged by the
+    largest integer factor that keeps it at least ``target_size``.
+
+    Args:
+        image: PIL Image, not yet loaded for ``draft`` to take effect
+        target_size: Minimum output size, an int or ``(width, height)``
+        reduce: Also reduce with ``Image.reduce`` after drafting
+
+    Returns:
+        PIL.Image.Image: ``image`` itself (drafted), or a reduced copy
+    """
+    image.draft(image.mode, _target_wh(target_size))
+    if not reduce:
+        return image
+    factor = _reduce_factor(image.width, image.height, target_size)
+    if factor > 1:
+        try:
+            return image.reduce(factor)
+        except ValueError:
+            # Mode not supported by Image.reduce (e.g. some 16-bit modes)
+            pass
+    return image
+
+
+def _channel_range(arr):
+    """
+    Per-image, per-channel min and max of an ``(N, H, W, C)`` array as ``(N, C)`` arrays.
+
+    Integer ranges are int64, except that uint64 ranges stay uint64 (their
+    values need not fit int64); float ranges are float64.
+    """
+    lo = arr.min(axis=(1, 2))
+    hi = arr.max(axis=(1, 2))
+    if arr.dtype.kind in "ui":
+        dtype = np.uint64 if arr.dtype.kind == "u" and arr.dtype.itemsize == 8 else np.int64
+        return lo.astype(dtype), hi.astype(dtype)
+    return lo.astype(np.float64), hi.astype(np.float64)
+
+
+def _lut(values, lo, hi):
+    """8-bit lookup table mapping ``values`` linearly from ``[lo, hi]`` to ``[0, 255]``."""
+    span = hi - lo
+    if span <= 0:
+        return np.zeros(len(values), dtype=np.uint8)
+    # Integer floor division matches truncating the float scale exactly
+    return np.clip((values.astype(np.int64) - lo) * 255 // span, 0, 255).astype(np.uint8)
+
+
+def _normalize_into(arr, lo, hi, out):
+    """Write the min-max normalized ``(N, H, W, C)`` array ``arr`` into uint8 ``out``."""
+    n_images, n_channels = lo.shape
+    dtype = arr.dtype
+
+    if dtype.kind in "ui" and dtype.itemsize <= 2:
+        # 8/16-bit: index a per-channel LUT with the raw values, no float temporaries
+        n_values = 1 << (8 * dtype.itemsize)
+        if dtype.kind == "u":
+            values = np.arange(n_values)
+            unsigned = arr
+        else:
+            # Reinterpret signed values as unsigned indices; the LUT is built in that order
+            unsigned_dtype = np.dtype(f"{dtype.byteorder}u{dtype.itemsize}")
+            values = np.arange(n_values, dtype=unsigned_dtype.newbyteorder("=")).view(dtype.newbyteorder("="))
+            unsigned = arr.view(unsigned_dtype)
+        for n in range(n_images):
+            for c in range(n_channels):
+                np.take(_lut(values, lo[n, c], hi[n, c]), unsigned[n, :, :, c], out=out[n, :, :, c], mode="clip")
+        return out
+
+    if dtype.kind in "ui":
+        # Python ints: hi - lo can overflow int64 (and uint64 minus int64 would be float)
+        spans = [[h - l for l, h in zip(lo_row, hi_row)] for lo_row, hi_row in zip(lo.tolist(), hi.tolist())]
+
+    if dtype.kind in "ui" and max(max(row) for row in spans) < 1 << 16:
+        # Wider integers with a narrow range (e.g. PIL mode "I"): offset into a 16-bit LUT
+        values = np.arange(1 << 16)
+        offset = np.empty(arr.shape[1:3], dtype=np.uint16)
+        for n in range(n_images):
+            for c in range(n_channels):
+                np.subtract(arr[n, :, :, c], lo[n, c], out=offset, casting="unsafe")
+                np.take(_lut(values, 0, spans[n][c]), offset, out=out[n, :, :, c], mode="clip")
+        return out
+
+    if dtype.kind in "ui" and dtype.itemsize <= 4:
+        # 32-bit integers with a wide range: exact integer arithmetic on blocks of rows,
+        # so the int64 temporaries stay small
+        rows = max(1, (1 << 20) // max(arr.shape[2], 1))
+        for n in range(n_images):
+            for c in range(n_channels):
+                span = int(hi[n, c] - lo[n, c])
+                for start in range(0, arr.shape[1], rows):
+                    block = arr[n, start:start + rows, :, c].astype(np.int64)
+                    block -= lo[n, c]
+                    block *= 255
+                    block //= max(span, 1)
+                    np.copyto(out[n, start:start + rows, :, c], block, casting="unsafe")
+        return out
+
+    if dtype.kind in "ui":
+        # 64-bit integers with a wide range: offsets from the minimum are exact in uint64
+        # (wrap-around subtraction also covers int64 ranges wider than 2**63), then
+        # scaled in float64 on blocks of rows
+        rows = max(1, (1 << 20) // max(arr.shape[2], 1))
+        for n in range(n_images):
+            for c in range(n_channels):
+                low = np.uint64(int(lo[n, c]) % (1 << 64))
+                span = float(max(spans[n][c], 1))
+                for start in range(0, arr.shape[1], rows):
+                    block = arr[n, start:start + rows, :, c].astype(np.uint64)
+                    block -= low
+                    scaled = block.astype(np.float64)
+                    # Divide first so the maximum maps to exactly 255
+                    scaled /= span
+                    scaled *= 255
+                    np.clip(scaled, 0, 255, out=scaled)
+                    np.copyto(out[n, start:start + rows, :, c], scaled, casting="unsafe")
+        return out
+
+    # Everything else: one float32 working copy, scaled in place
+    span = (hi - lo).astype(np.float64)
+    scale = np.divide(255.0, span, out=np.zeros_like(span), where=span > 0)
+    work = arr.astype(np.float32)
+    work -= lo[:, None, None, :].astype(np.float32)
+    work *= scale[:, None, None, :].astype(np.float32)
+    np.clip(work, 0, 255, out=work)
+    np.copyto(out, work, casting="unsafe")
+    return out
+
+
+def to_8bit_rgb(image, batch: bool = False, broadcast: bool = False, target_size=None, minmax: str = "after") -> np.ndarray:
+    """
+    Convert an image, or a batch of images, to 8-bit 3-channel RGB while preserving dynamic range.
+
+    Each channel of each image is min-max scaled to 0-255 independently. 8- and
+    16-bit inputs go through a lookup table, 32-bit integers through exact
+    integer arithmetic on row blocks, 64-bit integers (including uint64)
+    through exact offsets scaled in float64 on row blocks, and other dtypes
+    through a single float32 working copy, so no float64 copy of the image is
+    ever made.
+    Grayscale and 2-channel (LA) inputs use their first channel; RGBA and other
+    inputs with more than three channels use the first three.
+
+    With ``target_size``, the image is first downsampled by the largest integer
+    factor that keeps it at least ``target_size`` (so a model processor can do
+    the final resize) and only the small image is normalized. Unloaded JPEGs
+    are decoded at reduced scale with PIL ``draft``, other PIL images are
+    reduced with ``Image.reduce`` and arrays are area-averaged. ``draft``
+    reconfigures the given image in place, so a JPEG passed in unloaded is
+    left at the reduced size; pass ``image.copy()`` to keep the original.
+
+    Args:
+        image: PIL Image or array of shape ``(H, W)`` / ``(H, W, C)``, or with
+            ``batch=True`` an array of shape ``(N, H, W)`` / ``(N, H, W, C)``
+        batch: Whether the first axis of ``image`` is a batch axis
+        broadcast: For grayscale input, return a read-only broadcast view of the
+            single 8-bit channel instead of writing three copies
+        target_size: Optional minimum output size, an int or ``(width, height)``
+        minmax: Compute the normalization range ``"after"`` (default) or
+            ``"before"`` downsampling. ``"before"`` matches full-resolution
+            normalization exactly: it decodes the full-resolution pixels (JPEGs
+            are not drafted) and area-averages them in NumPy.
+
+    Returns:
+        np.ndarray: uint8 array of shape ``(H, W, 3)``, or ``(N, H, W, 3)`` with ``batch=True``
+    """
+    if minmax not in ("before", "after"):
+        raise ValueError(f"minmax must be 'before' or 'after', got {minmax!r}")
+
+    if target_size is not None and isinstance(image, Image.Image) and minmax == "after":
+        # With "before" the range must come from the full-resolution pixels, so reduce in NumPy below
+        image = draft_to_target(image, target_size)
+
+    arr = _as_nhwc(image, batch)
+    if target_size is not None and minmax == "before":
+        lo, hi = _channel_range(arr)
+    arr = _area_reduce(arr, 1 if target_size is None else _reduce_factor(arr.shape[2], arr.shape[1], target_size))
+    if target_size is None or minmax == "after":
+        lo, hi = _channel_range(arr)
+
+    out = np.empty(arr.shape, dtype=np.uint8)
+    _normalize_into(arr, lo, hi, out)
+    if out.shape[-1] == 1:
+        out = np.broadcast_to(out, out.shape[:-1] + (3,))
+        if not broadcast:
+            out = np.ascontiguousarray(out)
+
+    return out if batch else out[0]
+
+
+def to_8bit_rgb_image(image, target_size=None, minmax: str = "after") -> Image.Image:
+    """
+    Convert a single image to an 8-bit RGB PIL image (see ``to_8bit_rgb``).
+
+    Args:
+        image: PIL Image or array of shape ``(H, W)`` / ``(H, W, C)``
+        target_size: Optional minimum output size, an int or ``(width, height)``
+        minmax: Compute the normalization range ``"after"`` or ``"before"`` downsampling
+
+    Returns:
+        PIL Image object in RGB mode with 8-bit depth
+    """
+    rgb = to_8bit_rgb(image, broadcast=True, target_size=target_size, minmax=minmax)
+    if rgb.strides[-1] == 0:
+        # Grayscale: let PIL expand the single channel instead of copying three planes
+        return Image.fromarray(np.ascontiguousarray(rgb[..., 0]), mode="L").convert("RGB")
+    return Image.fromarray(rgb, mode="RGB")
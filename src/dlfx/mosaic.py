@@ -0,0 +1,237 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil, sqrt
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .image import to_8bit_rgb
+from .thumbnails import read_thumbnail
+
+LAYOUT_COLUMNS = ['index', 'file', 'row', 'col', 'x', 'y', 'width', 'height', 'title']
+
+
+def _as_tile(item, tile_size: int) -> np.ndarray:
+    """8-bit RGB array of at most ``tile_size`` x ``tile_size`` from a path or an image array."""
+    if isinstance(item, (str, os.PathLike)):
+        arr = read_thumbnail(os.fspath(item), max_size=tile_size, to_8bit=True)
+    else:
+        arr = np.asarray(item)
+    if arr.dtype != np.uint8:
+        arr = to_8bit_rgb(arr, target_size=tile_size)
+    if arr.ndim == 2:
+        arr = np.repeat(arr[..., None], 3, axis=2)
+    elif arr.shape[2] != 3:
+        arr = to_8bit_rgb(arr)
+    if max(arr.shape[:2]) > tile_size:
+        image = Image.fromarray(np.ascontiguousarray(arr))
+        image.thumbnail((tile_size, tile_size), resample=Image.BILINEAR)
+        arr = np.asarray(image)
+    return arr
+
+
+class _TextRenderer:
+    """
+    Draw text into uint8 arrays from cached glyph bitmaps.
+
+    Rendering every title with ``ImageDraw.text`` costs about a millisecond
+    per line; pasting cached per-character bitmaps is much cheaper for
+    thousands of tiles (kerning is ignored).
+    """
+
+    def __init__(self):
+        self.font = ImageFont.load_default()
+        self.line_height = self.font.getbbox("Ag")[3] + 2
+        self._glyphs = {}
+
+    def _glyph(self, char: str) -> np.ndarray:
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            image = Image.new("L", (max(1, ceil(self.font.getlength(char))), self.line_height))
+            ImageDraw.Draw(image).text((0, 0), char, fill=255, font=self.font)
+            glyph = self._glyphs[char] = np.asarray(image)
+        return glyph
+
+    def _line(self, line: str, width: int) -> np.ndarray:
+        """Bitmap of one line, truncated with an ellipsis to ``width`` pixels."""
+        glyphs = [self._glyph(char) for char in line]
+        widths = np.cumsum([g.shape[1] for g in glyphs])
+        if len(widths) and widths[-1] > width:
+            ellipsis = self._glyph("...")
+            keep = int(np.searchsorted(widths, width - ellipsis.shape[1], side="right"))
+            glyphs = glyphs[:keep] + [ellipsis]
+        if not glyphs:
+            return np.zeros((self.line_height, 0), dtype=np.uint8)
+        return np.concatenate(glyphs, axis=1)[:, :width]
+
+    def draw(self, canvas: np.ndarray, x: int, y: int, text, width: int):
+        """Draw (multi-line) ``text`` in white into ``canvas`` with its top left corner at ``(x, y)``."""
+        for line in str(text).splitlines():
+            mask = self._line(line, width)
+            h, w = mask.shape
+            region = canvas[y:y + h, x:x + w]
+            np.maximum(region, mask[:region.shape[0], :region.shape[1], None], out=region)
+            y += h
+
+
+def grid_shape(n: int, cols=None):
+    """``(rows, cols)`` of a grid for ``n`` tiles (square-ish by default)."""
+    cols = cols or max(1, ceil(sqrt(n)))
+    return max(1, ceil(n / cols)), cols
+
+
+def build_mosaic(images, titles=None, tile_size: int = 256, cols=None, padding: int = 4,
+                 background: int = 0, num_threads: int = 8, start: int = 0):
+    """
+    Paste images as tiles into one preallocated 8-bit RGB canvas.
+
+    Every tile is resized to fit ``tile_size`` x ``tile_size`` (keeping the
+    aspect ratio) and centered in its cell. Titles are drawn into a text band
+    above each tile from cached glyph bitmaps; no matplotlib artists are created.
+
+    Args:
+        images: Image arrays (any dtype; non-uint8 arrays are min-max scaled to 8 bits)
+            or image file paths (loaded as thumbnails)
+        titles: Optional title per image (may contain newlines)
+        tile_size: Cell size in pixels
+        cols: Number of columns (default: square-ish grid)
+        padding: Pixels between cells
+        background: Canvas gray value
+        num_threads: Threads for loading and resizing tiles
+        start: Index of the first image, recorded in the layout (used for pages)
+
+    Returns:
+        tuple: ``(canvas, layout)`` with the uint8 ``(H, W, 3)`` canvas and a DataFrame
+        with one row per tile (index, file, row, col, x, y, width, height, title)
+    """
+    import pandas as pd
+
+    images = list(images)
+    n = len(images)
+    rows, cols = grid_shape(n, cols)
+
+    text = _TextRenderer()
+    title_lines = max((len(str(t).splitlines()) for t in titles), default=0) if titles is not None else 0
+    band = title_lines * text.line_height
+    cell_w, cell_h = tile_size + padding, tile_size + band + padding
+
+    canvas = np.full((rows * cell_h + padding, cols * cell_w + padding, 3), background, dtype=np.uint8)
+
+    def convert(item):
+        return _as_tile(item, tile_size)
+
+    if num_threads > 1 and n > 1:
+        with ThreadPoolExecutor(min(num_threads, n)) as pool:
+            tiles = list(pool.map(convert, images))
+    else:
+        tiles = [convert(item) for item in images]
+
+    layout = []
+    for i, tile in enumerate(tiles):
+        row, col = divmod(i, cols)
+        h, w = tile.shape[:2]
+        x = padding + col * cell_w + (tile_size - w) // 2
+        y = padding + row * cell_h + band + (tile_size - h) // 2
+        canvas[y:y + h, x:x + w] = tile
+        title = titles[i] if titles is not None and i < len(titles) else None
+        layout.append((start + i, None, row, col, x, y, w, h, title))
+
+    for _, _, row, col, _, _, _, _, title in layout:
+        if title is not None:
+            text.draw(canvas, padding + col * cell_w, padding + row * cell_h, title, tile_size)
+
+    return canvas, pd.DataFrame(layout, columns=LAYOUT_COLUMNS)
+
+
+def write_mosaic(canvas: np.ndarray, layout, path: str):
+    """
+    Write a canvas from ``build_mosaic`` to ``path`` (PNG) and its layout to the sidecar ``<stem>.csv``.
+
+    Returns:
+        pd.DataFrame: ``layout`` with the ``file`` column set
+    """
+    Image.fromarray(canvas).save(path)
+    layout = layout.assign(file=os.path.basename(path))
+    layout.to_csv(os.path.splitext(path)[0] + ".csv", index=False)
+    return layout
+
+
+def save_mosaic(images, path: str, titles=None, tile_size: int = 256, cols=None, rows_per_page=None,
+                padding: int = 4, background: int = 0, num_threads: int = 8):
+    """
+    Render images into mosaic PNG file(s) and a sidecar CSV table, without matplotlib.
+
+    With ``rows_per_page``, the grid is split into pages of that many rows
+    written as ``<stem>_000.png``, ``<stem>_001.png``, ...; only one page is
+    held in memory at a time, so thousands of images (given as paths) can be
+    rendered with bounded memory. The sidecar ``<stem>.csv`` lists the file,
+    grid position, pixel box and title of every image.
+
+    Args:
+        images: Image arrays or image file paths
+        path: Output PNG path
+        titles: Optional title per image
+        tile_size: Cell size in pixels
+        cols: Number of columns (default: square-ish grid, or 16 with ``rows_per_page``)
+        rows_per_page: Optional number of grid rows per output file
+        padding: Pixels between cells
+        background: Canvas gray value
+        num_threads: Threads for loading and resizing tiles
+
+    Returns:
+        pd.DataFrame: Layout of all tiles (see ``build_mosaic``), also written to the sidecar CSV
+    """
+    import pandas as pd
+
+    images = list(images)
+    stem, _ = os.path.splitext(path)
+    if rows_per_page is None:
+        pages = [(0, len(images), path)]
+    else:
+        cols = cols or 16
+        per_page = rows_per_page * cols
+        pages = [(start, min(start + per_page, len(images)), f"{stem}_{page:03d}.png")
+                 for page, start in enumerate(range(0, len(images), per_page))]
+
+    layouts = []
+    for start, end, page_path in pages:
+        canvas, layout = build_mosaic(
+            images[start:end], titles=None if titles is None else list(titles[start:end]),
+            tile_size=tile_size, cols=cols, padding=padding, background=background,
+            num_threads=num_threads, start=start,
+        )
+        Image.fromarray(canvas).save(page_path)
+        layout['file'] = os.path.basename(page_path)
+        layouts.append(layout)
+
+    layout = pd.concat(layouts, ignore_index=True) if layouts else pd.DataFrame(columns=LAYOUT_COLUMNS)
+    layout.to_csv(stem + ".csv", index=False)
+    return layout
+
+
+def show_mosaic(canvas: np.ndarray, figsize=None, dpi: int = 100, suptitle=None):
+    """
+    Draw a mosaic canvas with a single ``imshow``.
+
+    Args:
+        canvas: uint8 canvas from ``build_mosaic``
+        figsize: Figure size (default: the canvas at ``dpi``, capped at 20 inches wide)
+        dpi: Figure resolution
+        suptitle: Optional figure title
+
+    Returns:
+        fig, ax: matplotlib figure and axes
+    """
+    import matplotlib.pyplot as plt
+
+    if figsize is None:
+        height, width = canvas.shape[:2]
+        scale = min(1.0, 20 * dpi / width)
+        figsize = (width * scale / dpi, height * scale / dpi)
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    ax.imshow(canvas, interpolation="nearest")
+    ax.axis('off')
+    if suptitle:
+        ax.set_title(suptitle, fontsize=16)
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=0.95 if suptitle else 1)
+    return fig, ax
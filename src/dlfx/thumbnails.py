@@ -0,0 +1,236 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from .image import downsample_array, to_8bit_rgb
+
+DICOM_SUFFIXES = (".dcm", ".dicom")
+
+
+def _fit(arr: np.ndarray, max_size: int) -> np.ndarray:
+    """Resize an array so that its longer side is at most ``max_size``, keeping its dtype."""
+    if max(arr.shape[:2]) <= max_size:
+        return arr
+    if arr.dtype == np.uint8:
+        image = Image.fromarray(arr)
+        image.thumbnail((max_size, max_size))
+        return np.asarray(image)
+
+    # Other dtypes: area-average by an integer factor, then resize each channel as float32
+    arr = downsample_array(arr, max_size)
+    height, width = arr.shape[:2]
+    scale = max_size / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    channels = arr if arr.ndim == 3 else arr[..., None]
+    resized = np.stack([
+        np.asarray(Image.fromarray(np.ascontiguousarray(channels[..., c], dtype=np.float32)).resize(size, Image.BILINEAR))
+        for c in range(channels.shape[2])
+    ], axis=-1)
+    if arr.dtype.kind in "ui":
+        info = np.iinfo(arr.dtype)
+        resized = np.clip(np.rint(resized), info.min, info.max)
+    resized = resized.astype(arr.dtype)
+    return resized if arr.ndim == 3 else resized[..., 0]
+
+
+def _read_dicom(path: str, max_size: Optional[int]) -> np.ndarray:
+    from .dicom_frames import DicomFrameReader
+    from .dicom_pixels import dicom_to_8bit
+
+    # Only the first frame is mapped and decoded
+    with DicomFrameReader(path) as reader:
+        return dicom_to_8bit(reader.dataset, pixels=reader[0], target_size=max_size)
+
+
+def _read_pil(path: str, max_size: Optional[int], to_8bit: bool) -> np.ndarray:
+    with Image.open(path) as image:
+        if to_8bit:
+            arr = to_8bit_rgb(image, target_size=max_size)
+            return arr if max_size is None else _fit(arr, max_size)
+        if max_size is None:
+            return np.array(image)
+        image.draft(image.mode, (max_size, max_size))
+        try:
+            image.thumbnail((max_size, max_size))
+        except ValueError:
+            # Modes PIL cannot resample (e.g. some 16-bit modes): resize in NumPy
+            return _fit(np.array(image), max_size)
+        return np.array(image)
+
+
+def _read_matplotlib(path: str, max_size: Optional[int], to_8bit: bool) -> np.ndarray:
+    import matplotlib.image as mpimg
+
+    arr = mpimg.imread(path)
+    if to_8bit:
+        arr = to_8bit_rgb(arr, target_size=max_size)
+        return arr if max_size is None else _fit(arr, max_size)
+    return arr if max_size is None else _fit(arr, max_size)
+
+
+def read_thumbnail(path: str, max_size: Optional[int] = 512, to_8bit: bool = False) -> np.ndarray:
+    """
+    Decode an image file directly to thumbnail size.
+
+    JPEGs are decoded at reduced scale with PIL ``draft`` and other formats are
+    shrunk with ``Image.thumbnail`` right after decoding, so the full-size
+    pixels are never kept. Files PIL cannot read fall back to
+    ``matplotlib.image.imread``. DICOM files (``.dcm``/``.dicom``) go through
+    ``dicom_to_8bit`` and are always 8-bit.
+
+    Args:
+        path: Image file path
+        max_size: Bound on the longer side of the result; None keeps the full resolution
+        to_8bit: Convert to 8-bit RGB with ``to_8bit_rgb`` (per-image min-max scaling)
+
+    Returns:
+        np.ndarray: Image array (``(H, W)`` or ``(H, W, C)``)
+    """
+    if path.lower().endswith(DICOM_SUFFIXES):
+        arr = _read_dicom(path, max_size)
+        return arr if max_size is None else _fit(arr, max_size)
+
+    try:
+        return _read_pil(path, max_size, to_8bit)
+    except FileNotFoundError:
+        raise
+    except Exception:
+        # Fallback to matplotlib
+        return _read_matplotlib(path, max_size, to_8bit)
+
+
+class ThumbnailLoader:
+    """
+    Load images as thumbnails on a thread pool, with an in-memory LRU cache.
+
+    Decoding (zlib, JPEG) releases the GIL, so loading a grid of images on
+    ``num_threads`` threads overlaps file I/O and decoding. Thumbnails are
+    cached by path, file modification time and size and the loading options,
+    up to ``max_items`` entries and ``max_bytes``, so plotting the same paths
+    again does not touch the files.
+    """
+
+    def __init__(self, max_size: Optional[int] = 512, to_8bit: bool = False, num_threads: int = 8,
+                 max_items: int = 1024, max_bytes: int = 512 * 2**20):
+        """
+        Args:
+            max_size: Bound on the longer side of the thumbnails; None keeps the full resolution
+            to_8bit: Convert images to 8-bit RGB with ``to_8bit_rgb``
+            num_threads: Loader threads
+            max_items: Maximum number of cached thumbnails
+            max_bytes: Maximum total size of cached thumbnails
+        """
+        self.max_size = max_size
+        self.to_8bit = to_8bit
+        self.num_threads = num_threads
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def _key(self, path: str, max_size, to_8bit):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size, max_size, to_8bit
+
+    def _cache_get(self, key):
+        with self._lock:
+            arr = self._cache.get(key)
+            if arr is not None:
+                self._cache.move_to_end(key)
+            return arr
+
+    def _cache_put(self, key, arr):
+        if arr.nbytes > self.max_bytes or self.max_items <= 0:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = arr
+            self._cached_bytes += arr.nbytes
+            while len(self._cache) > self.max_items or self._cached_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+
+    def load(self, path: str, max_size=..., to_8bit=None) -> np.ndarray:
+        """
+        Load a single thumbnail (from the cache if possible).
+
+        Args:
+            path: Image file path
+            max_size: Override the loader's ``max_size``
+            to_8bit: Override the loader's ``to_8bit``
+
+        Returns:
+            np.ndarray: Read-only image array
+
+        Raises:
+            FileNotFoundError: If ``path`` does not exist
+        """
+        max_size = self.max_size if max_size is ... else max_size
+        to_8bit = self.to_8bit if to_8bit is None else to_8bit
+        key = self._key(path, max_size, to_8bit)
+        arr = self._cache_get(key)
+        if arr is None:
+            arr = read_thumbnail(path, max_size=max_size, to_8bit=to_8bit)
+            # Cached arrays are shared between callers
+            arr.setflags(write=False)
+            self._cache_put(key, arr)
+        return arr
+
+    def load_many(self, paths, max_size=..., to_8bit=None, errors: str = "warn") -> list:
+        """
+        Load thumbnails of ``paths`` in parallel, keeping their order.
+
+        Args:
+            paths: Image file paths
+            max_size: Override the loader's ``max_size``
+            to_8bit: Override the loader's ``to_8bit``
+            errors: ``"warn"`` to print a warning and return None for files that cannot
+                be loaded, ``"raise"`` to raise the first error
+
+        Returns:
+            list: One array (or None) per path
+        """
+        if errors not in ("warn", "raise"):
+            raise ValueError(f"errors must be 'warn' or 'raise', got {errors!r}")
+        paths = list(paths)
+
+        def load(path):
+            try:
+                return self.load(path, max_size=max_size, to_8bit=to_8bit)
+            except Exception as e:
+                if errors == "raise":
+                    raise
+                if isinstance(e, FileNotFoundError):
+                    print(f"Warning: File not found: {path}")
+                else:
+                    print(f"Error loading {path}: {e}")
+                return None
+
+        if self.num_threads <= 1 or len(paths) <= 1:
+            return [load(path) for path in paths]
+        with ThreadPoolExecutor(min(self.num_threads, len(paths))) as pool:
+            return list(pool.map(load, paths))
+
+    def clear(self):
+        """Drop all cached thumbnails."""
+        with self._lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+
+
+_default_loader = None
+
+
+def default_thumbnail_loader() -> ThumbnailLoader:
+    """Process-wide loader shared by the plotting functions, so their thumbnails are cached across calls."""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = ThumbnailLoader()
+    return _default_loader
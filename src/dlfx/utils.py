@@ -1,9 +1,8 @@
 import os
 import datetime
 import getpass
-from IPython.display import display, Markdown
 
-def stamp_notebook(created_date, notebook_path=None, author=getpass.getuser()):
+def stamp_notebook(created_date, notebook_path=None, author=None):
     """
     Displays a formatted info block to track notebook creation and modification.
     Distinct from DICOM/Image metadata.
@@ -11,8 +10,13 @@ def stamp_notebook(created_date, notebook_path=None, author=getpass.getuser()):
     Args:
         created_date (str): The date the notebook was created (e.g., "2025-08-15").
         notebook_path (str): The filename of the .ipynb file to pull 'Last Modified' stats.
-        author (str): Author name.
+        author (str): Author name (default: the current user).
     """
+    from IPython.display import display, Markdown
+
+    if author is None:
+        author = getpass.getuser()
+
     info_lines = [
         "**Notebook Session Info:**",
         f"* **Created:** {created_date}",
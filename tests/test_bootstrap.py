@@ -0,0 +1,51 @@
+"""Subgroup handling of `bootstrap_metrics`."""
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from dlfx.MedGemma.bootstrap import OVERALL, bootstrap_metrics
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    n = 300
+    references = rng.integers(0, 2, n)
+    predictions = np.where(rng.random(n) < 0.8, references, 1 - references)
+    predictions[:10] = -1
+    meta = pd.DataFrame({
+        'site': rng.choice(np.array(['a', 'b', None], dtype=object), n),
+        'vendor': np.where(rng.random(n) < 0.5, 'x', None),
+    })
+    return predictions, references, meta
+
+
+def accuracy(predictions, references):
+    valid = predictions != -1
+    return (predictions[valid] == references[valid]).mean()
+
+
+def test_missing_group_values_form_their_own_subgroup(data):
+    predictions, references, meta = data
+    df = bootstrap_metrics(predictions, references, meta=meta, by='site', n_boot=50)
+    acc = df[df['metric'] == 'accuracy'].set_index('site', drop=False)
+
+    assert len(acc) == 4
+    missing = acc[acc['site'].isna()].iloc[0]
+    mask = meta['site'].isna().to_numpy()
+    assert missing['n'] == mask.sum()
+    assert missing['estimate'] == pytest.approx(accuracy(predictions[mask], references[mask]))
+    assert acc.loc['a', 'n'] == (meta['site'] == 'a').sum()
+    assert acc.loc[OVERALL, 'n'] == len(meta)
+
+
+def test_missing_values_in_several_columns(data):
+    predictions, references, meta = data
+    df = bootstrap_metrics(predictions, references, meta=meta, by=['site', 'vendor'], n_boot=50)
+    acc = df[(df['metric'] == 'accuracy') & (df['site'] != OVERALL)]
+
+    expected = meta.groupby(['site', 'vendor'], dropna=False).size()
+    assert len(acc) == len(expected)
+    assert acc['n'].sum() == len(meta)
+    both_missing = acc[acc['site'].isna() & acc['vendor'].isna()].iloc[0]
+    assert both_missing['n'] == (meta['site'].isna() & meta['vendor'].isna()).sum()
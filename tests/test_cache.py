@@ -0,0 +1,104 @@
+"""Entries, eviction and temporary files of `PixelValuesCache`."""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dlfx.MedSigLip.cache import PixelValuesCache
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"img{i}.png"
+        path.write_bytes(bytes([i]))
+        paths.append(str(path))
+    return paths
+
+
+def test_put_and_get(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"))
+    assert cache.get(sources[0]) is None
+    stored = cache.put(sources[0], np.linspace(0, 1, 12, dtype=np.float32).reshape(3, 4))
+    assert stored.dtype == np.float16 and not isinstance(stored, np.memmap)
+    cached = cache.get(sources[0])
+    assert isinstance(cached, np.memmap)
+    np.testing.assert_array_equal(cached, stored)
+    # Keys and configurations are separate entries
+    assert cache.get(sources[0], key="frame1") is None
+    assert PixelValuesCache(cache.cache_dir, config="other").get(sources[0]) is None
+    assert cache.put(str(tmp_path / "missing.png"), stored) is None
+
+
+def test_changed_source_invalidates_entry(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"))
+    cache.put(sources[0], np.zeros(4))
+    with open(sources[0], "ab") as f:
+        f.write(b"more")
+    assert cache.get(sources[0]) is None
+
+
+def test_integer_cache_rejects_inexact_arrays(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"), dtype="uint8")
+    assert cache.put(sources[0], np.array([0.0, 255.0])).dtype == np.uint8
+    with pytest.raises(ValueError, match="exactly"):
+        cache.put(sources[1], np.array([0.5]))
+
+
+def test_evicts_least_recently_used(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"), dtype="uint8")
+    for i, source in enumerate(sources):
+        cache.put(source, np.zeros(1000, dtype=np.uint8))
+        # Distinct mtimes, oldest first
+        entry = cache._entry_path(source)
+        os.utime(entry, (1000 + i, 1000 + i))
+    entry_size = os.path.getsize(cache._entry_path(sources[0]))
+    assert cache.size() == 6 * entry_size
+
+    # Reading an entry makes it the most recently used
+    cache.get(sources[0])
+    cache.evict(max_bytes=4 * entry_size)
+    # Below 90% of the bound: three entries remain
+    assert [cache.get(source) is not None for source in sources] == [True, False, False, False, True, True]
+
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_stale_temporary_files_are_counted_and_swept(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"), dtype="uint8")
+    cache.put(sources[0], np.zeros(1000, dtype=np.uint8))
+    entry = cache._entry_path(sources[0])
+    entry_size = os.path.getsize(entry)
+
+    # Left behind by a writer that crashed, and one still being written
+    stale = f"{entry}.123.dead.tmp"
+    fresh = f"{entry}.456.live.tmp"
+    for tmp in (stale, fresh):
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * 5000)
+    old = time.time() - 2 * PixelValuesCache.STALE_TMP_SECONDS
+    os.utime(stale, (old, old))
+    assert cache.size() == entry_size + 10000
+
+    # The fresh file counts towards the bound but is left to its writer
+    cache.evict(max_bytes=5000)
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+    assert cache.get(sources[0]) is None
+    assert cache.size() == 5000
+
+    # Sweeping does not need a size bound
+    os.utime(fresh, (old, old))
+    cache.evict()
+    assert cache.size() == 0
+
+
+def test_put_evicts_when_over_budget(tmp_path, sources):
+    cache = PixelValuesCache(str(tmp_path / "cache"), dtype="uint8", max_bytes=3000)
+    for source in sources:
+        cache.put(source, np.zeros(1000, dtype=np.uint8))
+    assert cache.size() <= 3000
+    assert cache.get(sources[-1]) is not None
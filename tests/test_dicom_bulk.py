@@ -0,0 +1,68 @@
+"""Writing and reading flattened headers as a Parquet part-file directory."""
+import os
+
+import pytest
+
+pytest.importorskip("pydicom")
+pytest.importorskip("pyarrow")
+pytest.importorskip("pandas")
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from dlfx.dicom_bulk import read_flattened_parquet, write_flattened_parquet
+
+
+def write_dicom(path, **elements):
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.7"
+    ds.file_meta.MediaStorageSOPInstanceUID = ds.SOPInstanceUID = generate_uid()
+    ds.SOPClassUID = ds.file_meta.MediaStorageSOPClassUID
+    for keyword, value in elements.items():
+        setattr(ds, keyword, value)
+    ds.save_as(str(path), enforce_file_format=True)
+    return str(path)
+
+
+def make_files(directory, n, **elements):
+    directory.mkdir()
+    return [write_dicom(directory / f"{i}.dcm", PatientID=f"p{i}", **elements) for i in range(n)]
+
+
+def test_round_trip_with_differing_keys(tmp_path):
+    paths = make_files(tmp_path / "a", 3) + [write_dicom(tmp_path / "x.dcm", PatientID="x",
+                                                         ImageType=["ORIGINAL", "PRIMARY"])]
+    output = str(tmp_path / "out")
+    assert write_flattened_parquet(paths, output, chunk_size=2, max_workers=1) == 4
+    assert sorted(os.listdir(output)) == ["_common_metadata", "part-00000.parquet", "part-00001.parquet"]
+
+    df = read_flattened_parquet(output)
+    assert sorted(df["PatientID"]) == ["p0", "p1", "p2", "x"]
+    assert df.set_index("PatientID").loc["x", "ImageType"] == "ORIGINAL\\PRIMARY"
+    assert df["ImageType"].isna().sum() == 3
+    assert list(read_flattened_parquet(output, columns=["PatientID"]).columns) == ["PatientID"]
+
+
+def test_rewrite_removes_parts_of_a_larger_previous_run(tmp_path):
+    output = str(tmp_path / "out")
+    write_flattened_parquet(make_files(tmp_path / "big", 5, Modality="CT"), output, chunk_size=1, max_workers=1)
+    with open(os.path.join(output, "notes.txt"), "w") as f:
+        f.write("kept")
+
+    assert write_flattened_parquet(make_files(tmp_path / "small", 2), output, chunk_size=1, max_workers=1) == 2
+    assert sorted(os.listdir(output)) == ["_common_metadata", "notes.txt", "part-00000.parquet",
+                                          "part-00001.parquet"]
+    df = read_flattened_parquet(output)
+    assert len(df) == 2
+    assert "Modality" not in df.columns
+
+
+def test_read_ignores_other_parquet_files(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output = str(tmp_path / "out")
+    write_flattened_parquet(make_files(tmp_path / "a", 2), output, max_workers=1)
+    pq.write_table(pa.table({"PatientID": ["other"]}), os.path.join(output, "summary.parquet"))
+    assert sorted(read_flattened_parquet(output)["PatientID"]) == ["p0", "p1"]
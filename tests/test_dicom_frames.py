@@ -0,0 +1,137 @@
+"""Parity of `DicomFrameReader` frames with pydicom's ``pixel_array``, and `frame_counts`."""
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pydicom")
+from pydicom import dcmread
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import (ExplicitVRBigEndian, ExplicitVRLittleEndian, ImplicitVRLittleEndian, RLELossless,
+                         generate_uid)
+
+from dlfx.dicom_frames import DicomFrameReader, frame_counts
+
+
+def write_dicom(path, pixels, transfer_syntax=ExplicitVRLittleEndian, bits_stored=None, planar=0,
+                frames=True, raw=None):
+    """Write ``pixels`` of shape ``(frames, rows, columns[, samples])`` as an uncompressed DICOM file."""
+    pixels = np.asarray(pixels)
+    color = pixels.ndim == 4
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = transfer_syntax
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.7"
+    ds.file_meta.MediaStorageSOPInstanceUID = ds.SOPInstanceUID = generate_uid()
+    ds.SOPClassUID = ds.file_meta.MediaStorageSOPClassUID
+    ds.PatientID = "p1"
+    ds.Rows, ds.Columns = pixels.shape[1:3]
+    if frames:
+        ds.NumberOfFrames = pixels.shape[0]
+    ds.SamplesPerPixel = pixels.shape[3] if color else 1
+    ds.PhotometricInterpretation = "RGB" if color else "MONOCHROME2"
+    if color:
+        ds.PlanarConfiguration = planar
+        if planar:
+            pixels = pixels.transpose(0, 3, 1, 2)
+    ds.BitsAllocated = pixels.dtype.itemsize * 8
+    ds.BitsStored = bits_stored or ds.BitsAllocated
+    ds.HighBit = ds.BitsStored - 1
+    ds.PixelRepresentation = int(pixels.dtype.kind == "i")
+    byteorder = ">" if transfer_syntax == ExplicitVRBigEndian else "<"
+    data = np.ascontiguousarray(pixels if raw is None else raw).astype(pixels.dtype.newbyteorder(byteorder))
+    ds.PixelData = data.tobytes()
+    ds["PixelData"].VR = "OB" if ds.BitsAllocated == 8 else "OW"
+    ds.save_as(str(path), implicit_vr=transfer_syntax == ImplicitVRLittleEndian,
+               little_endian=transfer_syntax != ExplicitVRBigEndian, enforce_file_format=True)
+    return str(path)
+
+
+def assert_matches_pixel_array(path, mapped=True):
+    expected = dcmread(path).pixel_array
+    with DicomFrameReader(path) as reader:
+        assert reader.is_mapped == mapped
+        if reader.num_frames == 1:
+            expected = expected[None]
+        assert len(reader) == len(expected)
+        for index, frame in enumerate(reader):
+            # Big endian data is returned in native byte order
+            assert frame.dtype == expected.dtype.newbyteorder("=")
+            np.testing.assert_array_equal(frame, expected[index])
+        np.testing.assert_array_equal(reader[-1], expected[-1])
+
+
+rng = np.random.default_rng(0)
+
+
+@pytest.mark.parametrize("transfer_syntax", [ExplicitVRLittleEndian, ImplicitVRLittleEndian, ExplicitVRBigEndian])
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16, np.uint32])
+def test_uncompressed_frames_match_pixel_array(tmp_path, transfer_syntax, dtype):
+    info = np.iinfo(dtype)
+    pixels = rng.integers(info.min, info.max, (3, 5, 7), dtype=dtype, endpoint=True)
+    assert_matches_pixel_array(write_dicom(tmp_path / "x.dcm", pixels, transfer_syntax))
+
+
+@pytest.mark.parametrize("transfer_syntax", [ExplicitVRLittleEndian, ImplicitVRLittleEndian])
+def test_signed_12_bit_data_is_sign_extended(tmp_path, transfer_syntax):
+    values = rng.integers(-2048, 2048, (4, 6, 8), dtype=np.int16)
+    # Stored as 12-bit two's complement with garbage in the unused high bits
+    raw = (values & 0x0FFF) | (rng.integers(0, 16, values.shape, dtype=np.int16) << 12)
+    path = write_dicom(tmp_path / "x.dcm", values, transfer_syntax, bits_stored=12, raw=raw)
+    assert_matches_pixel_array(path)
+    with DicomFrameReader(path) as reader:
+        np.testing.assert_array_equal(np.stack(list(reader)), values)
+
+
+@pytest.mark.parametrize("planar", [0, 1])
+def test_color_frames(tmp_path, planar):
+    pixels = rng.integers(0, 256, (2, 4, 6, 3), dtype=np.uint8)
+    path = write_dicom(tmp_path / "rgb.dcm", pixels, planar=planar)
+    assert_matches_pixel_array(path)
+    with DicomFrameReader(path) as reader:
+        assert reader[1].shape == (4, 6, 3)
+
+
+def test_single_frame_without_number_of_frames(tmp_path):
+    pixels = rng.integers(0, 4096, (1, 5, 5), dtype=np.uint16)
+    path = write_dicom(tmp_path / "x.dcm", pixels, frames=False)
+    assert_matches_pixel_array(path)
+    with DicomFrameReader(path) as reader:
+        assert reader[0].shape == (5, 5)
+        with pytest.raises(IndexError):
+            reader[1]
+
+
+def test_mapped_frames_are_views(tmp_path):
+    pixels = rng.integers(0, 4096, (3, 5, 5), dtype=np.uint16)
+    with DicomFrameReader(write_dicom(tmp_path / "x.dcm", pixels)) as reader:
+        frame = reader[1]
+        assert isinstance(frame.base, np.memmap) or isinstance(frame, np.memmap)
+        assert not frame.flags.writeable
+
+
+def test_compressed_files_are_decoded_per_frame(tmp_path):
+    pixels = rng.integers(0, 4096, (3, 5, 5), dtype=np.uint16)
+    path = write_dicom(tmp_path / "x.dcm", pixels)
+    ds = dcmread(path)
+    ds.compress(RLELossless)
+    ds.save_as(path)
+    assert_matches_pixel_array(path, mapped=False)
+
+
+def test_reader_pickles_and_remaps(tmp_path):
+    pixels = rng.integers(0, 4096, (3, 5, 5), dtype=np.uint16)
+    reader = DicomFrameReader(write_dicom(tmp_path / "x.dcm", pixels))
+    copy = pickle.loads(pickle.dumps(reader))
+    assert copy.is_mapped
+    np.testing.assert_array_equal(copy[2], pixels[2])
+
+
+def test_frame_counts(tmp_path):
+    paths = [
+        write_dicom(tmp_path / "a.dcm", np.zeros((4, 2, 2), dtype=np.uint8)),
+        write_dicom(tmp_path / "b.dcm", np.zeros((1, 2, 2), dtype=np.uint8), frames=False),
+        write_dicom(tmp_path / "c.dcm", np.zeros((2, 2, 2), dtype=np.uint16), ImplicitVRLittleEndian),
+    ]
+    assert frame_counts(paths) == [4, 1, 2]
+    assert frame_counts([]) == []
@@ -0,0 +1,143 @@
+"""Incremental updates, deletions and filtering of `DicomIndex`."""
+import os
+
+import pytest
+
+pytest.importorskip("pydicom")
+pytest.importorskip("pandas")
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from dlfx.dicom_index import DicomIndex
+
+
+def write_dicom(path, **elements):
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.7"
+    ds.file_meta.MediaStorageSOPInstanceUID = ds.SOPInstanceUID = generate_uid()
+    ds.SOPClassUID = ds.file_meta.MediaStorageSOPClassUID
+    for keyword, value in elements.items():
+        setattr(ds, keyword, value)
+    ds.save_as(str(path), enforce_file_format=True)
+    return str(path)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    root = tmp_path / "archive"
+    root.mkdir()
+    paths = {
+        "a": write_dicom(root / "a.dcm", PatientID="p1", Modality="MG", StudyDate="20200105",
+                         SliceThickness="1.0", ImageType=["ORIGINAL", "PRIMARY"]),
+        "b": write_dicom(root / "b.dcm", PatientID="p1", Modality="CT", StudyDate="20201231",
+                         SliceThickness="2.5", ImageType=["DERIVED", "SECONDARY"]),
+        "c": write_dicom(root / "c.dcm", PatientID="p2", Modality="MG", StudyDate="20210301",
+                         SliceThickness="10", ImageType="ORIGINAL"),
+    }
+    return root, paths
+
+
+@pytest.fixture
+def index(tmp_path, archive):
+    # ImageType is an indexed column here, SliceThickness only lives in the JSON header
+    with DicomIndex(str(tmp_path / "index.sqlite"), indexed_keys=("PatientID", "Modality", "StudyDate",
+                                                                   "ImageType")) as index:
+        yield index
+
+
+def names(df):
+    return sorted(os.path.splitext(os.path.basename(p))[0] for p in df["FilePath"])
+
+
+def test_incremental_update(index, archive):
+    root, paths = archive
+    assert index.update(str(root), max_workers=1) == {"scanned": 3, "updated": 3, "unreadable": 0, "removed": 0}
+    assert len(index) == 3
+    # Nothing changed: nothing is read again
+    assert index.update(str(root), max_workers=1)["updated"] == 0
+
+    # A rewritten file (new size) and a touched file (new mtime) are re-read
+    write_dicom(paths["a"], PatientID="p3", Modality="MG", StudyDate="20200105")
+    st = os.stat(paths["b"])
+    os.utime(paths["b"], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert index.update(str(root), max_workers=1)["updated"] == 2
+    assert names(index.query(PatientID="p3")) == ["a"]
+    assert names(index.query(PatientID="p1")) == ["b"]
+
+    # Unreadable files are recorded once and not retried until they change
+    with open(root / "broken.dcm", "wb") as f:
+        f.write(b"not a dicom file")
+    assert index.update(str(root), max_workers=1)["unreadable"] == 1
+    assert index.update(str(root), max_workers=1)["unreadable"] == 0
+    assert len(index) == 3
+
+
+def test_deleted_files(index, archive):
+    root, paths = archive
+    index.update(str(root), max_workers=1)
+    os.remove(paths["c"])
+
+    # Entries of deleted files are kept unless asked otherwise
+    assert index.update(str(root), max_workers=1)["removed"] == 0
+    assert len(index) == 3
+    assert index.update(str(root), max_workers=1, remove_missing=True)["removed"] == 1
+    assert len(index) == 2
+    assert names(index.query()) == ["a", "b"]
+
+
+def test_index_reopens_with_its_keys(tmp_path, index, archive):
+    index.update(str(archive[0]), max_workers=1)
+    index.close()
+    with DicomIndex(index.db_path, indexed_keys=("SOPInstanceUID",)) as reopened:
+        assert reopened.indexed_keys == ("PatientID", "Modality", "StudyDate", "ImageType")
+        assert len(reopened) == 3
+
+
+@pytest.mark.parametrize("filters, expected", [
+    # Indexed columns
+    ({"Modality": "MG"}, ["a", "c"]),
+    ({"Modality": ["CT", "US"]}, ["b"]),
+    ({"StudyDate": ("20200101", "20201231")}, ["a", "b"]),
+    ({"StudyDate": ("20201231", None)}, ["b", "c"]),
+    ({"ImageType": "ORIGINAL\\PRIMARY"}, ["a"]),
+    ({"ImageType": ["ORIGINAL", ("DERIVED", "SECONDARY")]}, ["b", "c"]),
+    # JSON header
+    ({"SliceThickness": "1.0"}, ["a"]),
+    ({"SliceThickness": 2.5}, ["b"]),
+    ({"SliceThickness": [10, "1.0"]}, ["a", "c"]),
+    ({"SliceThickness": (2, None)}, ["b", "c"]),
+    ({"SliceThickness": (None, 2.5)}, ["a", "b"]),
+    ({"PatientName": None}, ["a", "b", "c"]),
+    # Both
+    ({"Modality": "MG", "SliceThickness": (5, None)}, ["c"]),
+    ({"Modality": "MG", "SliceThickness": ("5", None)}, []),
+])
+def test_query_filters(index, archive, filters, expected):
+    index.update(str(archive[0]), max_workers=1)
+    assert names(index.query(**filters)) == expected
+
+
+def test_indexed_and_json_paths_agree(tmp_path, archive):
+    # The same filters give the same files whether a key is indexed or read from the JSON header
+    results = []
+    for i, keys in enumerate([("ImageType", "SliceThickness"), ()]):
+        with DicomIndex(str(tmp_path / f"index{i}.sqlite"), indexed_keys=keys) as index:
+            index.update(str(archive[0]), max_workers=1)
+            results.append([names(index.query(**filters)) for filters in [
+                {"ImageType": "ORIGINAL\\PRIMARY"}, {"ImageType": "ORIGINAL"}, {"SliceThickness": "2.5"},
+                {"SliceThickness": (1.5, 10)},
+            ]])
+    assert results[0] == results[1] == [["a"], ["c"], ["b"], ["b", "c"]]
+
+
+def test_query_values_and_columns(index, archive):
+    index.update(str(archive[0]), max_workers=1)
+    full = index.query(Modality="CT")
+    assert full.loc[0, "ImageType"] == "DERIVED\\SECONDARY"
+    assert full.loc[0, "SliceThickness"] == "2.5"
+
+    selected = index.query(columns=["ImageType", "SliceThickness"], PatientID="p2")
+    assert list(selected.columns) == ["FilePath", "ImageType", "SliceThickness"]
+    assert selected.iloc[0].tolist()[1:] == ["ORIGINAL", "10"]
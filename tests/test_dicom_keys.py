@@ -0,0 +1,74 @@
+"""Parsing of flattened keys, `unflatten_dicom_dict` and `flattened_to_long`."""
+import re
+
+import pytest
+
+from dlfx.dicom import flattened_to_long, parse_flattened_keys, unflatten_dicom_dict
+
+KEYS = [
+    "PatientID",
+    "ReferencedSeriesSequence[0].SeriesInstanceUID",
+    "ReferencedSeriesSequence[12].ReferencedInstanceSequence[3].ReferencedSOPInstanceUID",
+    "(0009,1010)",
+    "Seq[0].(0009,1010)",
+]
+
+
+def reference_parse(keys):
+    """One regex per component, the straightforward equivalent of the vectorized parser."""
+    rows = []
+    for k, key in enumerate(keys):
+        for level, component in enumerate(key.split(".")):
+            name, index = re.fullmatch(r"(.*?)(?:\[(\d+)\])?", component).groups()
+            rows.append((k, level, name, -1 if index is None else int(index)))
+    return rows
+
+
+def test_parse_matches_reference():
+    assert parse_flattened_keys(KEYS).tolist() == reference_parse(KEYS)
+
+
+def test_parse_single_key_and_empty_input():
+    assert parse_flattened_keys("A[2].B").tolist() == [(0, 0, "A", 2), (0, 1, "B", -1)]
+    assert len(parse_flattened_keys([])) == 0
+
+
+@pytest.mark.parametrize("key", ["A[x].B", "A[-1]", "A[]", "A[1][2].B", "A[1", "A]", "A[1]x.B", ""])
+def test_parse_rejects_malformed_keys(key):
+    with pytest.raises(ValueError):
+        parse_flattened_keys(["PatientID", key])
+
+
+def test_unflatten():
+    flattened = {
+        "PatientID": "p1",
+        "A[1].B": 5,
+        "A[1].C[0].D": "x",
+        "A[2].B": 6,
+    }
+    assert unflatten_dicom_dict(flattened) == {
+        "PatientID": "p1",
+        "A": [{}, {"B": 5, "C": [{"D": "x"}]}, {"B": 6}],
+    }
+
+
+def test_flattened_to_long():
+    pytest.importorskip("pandas")
+    rows = [
+        {"PatientID": "p1", "A[0].B": 1, "A[1].B": 2, "A[1].C[3].D": "x"},
+        {"PatientID": "p2", "A[0].B": 3},
+    ]
+    long = flattened_to_long(rows)
+    assert list(long.columns) == ["row", "key", "sequence", "item", "attribute", "value"]
+    records = sorted(long.drop(columns="key").itertuples(index=False, name=None), key=str)
+    assert records == sorted([
+        (0, "", -1, "PatientID", "p1"),
+        (0, "A", 0, "B", 1),
+        (0, "A", 1, "B", 2),
+        (0, "A[1].C", 3, "D", "x"),
+        (1, "", -1, "PatientID", "p2"),
+        (1, "A", 0, "B", 3),
+    ], key=str)
+
+    items = long[long["sequence"] == "A"].pivot(index=["row", "item"], columns="attribute", values="value")
+    assert items["B"].tolist() == [1, 2, 3]
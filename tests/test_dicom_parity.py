@@ -0,0 +1,118 @@
+"""Parity of `flatten_dicom_dataset` with the original recursive flattener."""
+import pytest
+
+pytest.importorskip("pydicom")
+from pydicom.dataset import Dataset
+from pydicom.sequence import Sequence
+from pydicom.tag import Tag
+
+from dlfx.dicom import _compile_patterns, flatten_dicom_dataset
+
+
+def reference_flatten(dataset):
+    """The original implementation, kept as the reference for the default output."""
+    flattened = {}
+
+    def _flatten_element(ds, prefix=""):
+        for elem in ds:
+            if elem.tag == Tag("PixelData"):
+                continue
+            if elem.keyword:
+                key = f"{prefix}{elem.keyword}"
+            else:
+                key = f"{prefix}{elem.tag}"
+            if elem.VR == "SQ":
+                for i, item in enumerate(elem.value):
+                    _flatten_element(item, prefix=f"{key}[{i}].")
+            else:
+                flattened[key] = elem.value
+
+    _flatten_element(dataset)
+    return flattened
+
+
+def add_unusual_elements(ds):
+    # Retired tags with a blank keyword
+    ds.add_new(0x00180061, "DS", "1")
+    ds.add_new(0x00280020, "OB", b"ab")
+    # Private creator and private element
+    ds.add_new(0x00090010, "LO", "VENDOR")
+    ds.add_new(0x00091010, "LO", "private")
+    # Repeater tags (overlay and curve groups)
+    ds.add_new(0x60000010, "US", 512)
+    ds.add_new(0x60023000, "OW", b"\x00\x01")
+    ds.add_new(0x50000005, "US", 2)
+    # Group length tags
+    ds.add_new(0x00080000, "UL", 42)
+    ds.add_new(0x00100000, "UL", 7)
+    return ds
+
+
+@pytest.fixture
+def dataset():
+    ds = add_unusual_elements(Dataset())
+    ds.PatientName = "x"
+    ds.PatientID = "1"
+    ds.PixelData = b"\x00" * 8
+    item = add_unusual_elements(Dataset())
+    item.SeriesInstanceUID = "1.2.3"
+    ds.ReferencedSeriesSequence = Sequence([item, Dataset()])
+    return ds
+
+
+def test_default_output_matches_reference(dataset):
+    assert flatten_dicom_dataset(dataset) == reference_flatten(dataset)
+
+
+def test_blank_keyword_tags_do_not_collide(dataset):
+    flattened = flatten_dicom_dataset(dataset)
+    assert "" not in flattened
+    assert flattened["(0018,0061)"] == "1"
+    assert flattened["(0028,0020)"] == b"ab"
+
+
+@pytest.mark.parametrize("pattern, key", [
+    ("(0018,0061)", "(0018,0061)"),
+    (0x00180061, "(0018,0061)"),
+    ("(0009,1010)", "(0009,1010)"),
+    ("(6002,3000)", "(6002,3000)"),
+    ("(0008,0000)", "(0008,0000)"),
+])
+def test_include_tag_selects_that_element_only(dataset, pattern, key):
+    assert flatten_dicom_dataset(dataset, include=[pattern]) == {key: reference_flatten(dataset)[key]}
+
+
+def test_exclude_blank_keyword_tag(dataset):
+    expected = {k: v for k, v in reference_flatten(dataset).items() if k != "(0018,0061)"}
+    assert flatten_dicom_dataset(dataset, exclude=["(0018,0061)"]) == expected
+
+
+@pytest.mark.parametrize("include", [
+    "PatientID",
+    0x00100020,
+    Tag("PatientID"),
+    (0x0010, 0x0020),
+    [(0x0010, 0x0020)],
+    [[0x0010, 0x0020]],
+    ["(0010,0020)"],
+])
+def test_single_entries_and_unhashable_tags(dataset, include):
+    assert flatten_dicom_dataset(dataset, include=include) == {"PatientID": "1"}
+
+
+def test_tuple_of_two_tags_is_two_patterns(dataset):
+    assert flatten_dicom_dataset(dataset, include=(0x00100010, 0x00100020)) == {"PatientName": "x", "PatientID": "1"}
+    assert flatten_dicom_dataset(dataset, include=("PatientName", "PatientID")) == {"PatientName": "x", "PatientID": "1"}
+
+
+def test_bare_tag_tuple_exclude(dataset):
+    expected = {k: v for k, v in reference_flatten(dataset).items() if k != "PatientID"}
+    assert flatten_dicom_dataset(dataset, exclude=(0x0010, 0x0020)) == expected
+    assert flatten_dicom_dataset(dataset, exclude=[]) == reference_flatten(dataset)
+
+
+def test_equivalent_tag_spellings_share_compiled_patterns(dataset):
+    _compile_patterns.cache_clear()
+    for include in ([(0x0010, 0x0020)], [0x00100020], [[0x0010, 0x0020]], [Tag(0x0010, 0x0020)]):
+        flatten_dicom_dataset(dataset, include=include)
+    assert _compile_patterns.cache_info().misses == 1
@@ -0,0 +1,31 @@
+"""`LabelLookup` against the dict lookup it replaces."""
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from dlfx.MedSigLip.embeddings import LabelLookup
+
+
+@pytest.fixture
+def labels():
+    return pd.DataFrame({
+        'AccessionNumber_anon': ['a1', 'a2', 'a1', 3, 'a2'],
+        'pathology': ['benign', 'malignant', 'normal', 'benign', 'normal'],
+    })
+
+
+def test_duplicate_keys_keep_last_row_like_to_dict(labels):
+    expected = labels.set_index('AccessionNumber_anon').to_dict()['pathology']
+    lookup = LabelLookup(labels)
+
+    for key, value in expected.items():
+        assert lookup[str(key)] == value
+    paths = ['/data/a1.png', 'x/a2.dcm', '3.jpg', 'missing.png']
+    result = lookup(paths)
+    assert list(result[:3]) == [expected['a1'], expected['a2'], expected[3]]
+    assert pd.isna(result[3])
+
+
+def test_unique_keys(labels):
+    labels = labels.drop_duplicates('AccessionNumber_anon')
+    np.testing.assert_array_equal(LabelLookup(labels)(['a1.png', 'a2.png']), ['benign', 'malignant'])
@@ -0,0 +1,137 @@
+"""`run_evaluation` with a stubbed generation callable, and `AnswerParser`."""
+import threading
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from PIL import Image
+
+from dlfx.MedGemma.evaluate import AnswerParser, run_evaluation
+from dlfx.MedGemma.results_store import ResultsStore
+
+CLASSES = {'benign': ['benign', 'non-cancerous'], 'malignant': ['malignant', 'cancerous']}
+
+
+@pytest.fixture
+def df(tmp_path):
+    rows = []
+    for i in range(10):
+        name = f"img{i}.png"
+        Image.fromarray(np.full((8, 8), i * 20, dtype=np.uint8)).save(tmp_path / name)
+        rows.append({'ImagePath': name, 'Pathology': 'benign' if i % 2 else 'malignant', 'n': i})
+    return pd.DataFrame(rows, index=range(100, 110))
+
+
+class StubGenerate:
+    """Answers with the reference label of every prompt and records the batches it saw."""
+
+    def __init__(self, fail_on_call=None):
+        self.batches = []
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, messages):
+        if len(self.batches) == self.fail_on_call:
+            raise RuntimeError("GPU fell over")
+        prompts = [m[1]['content'][0]['text'] for m in messages]
+        self.batches.append(prompts)
+        # Mix the result formats generate may return
+        answers = [prompt.split("|")[1] for prompt in prompts]
+        return [answer if i % 3 == 0 else {'generated_text': answer} if i % 3 == 1 else [{'generated_text': answer}]
+                for i, answer in enumerate(answers)]
+
+
+def question(row):
+    return f"{row['n']}|The lesion looks {row['Pathology']}."
+
+
+def evaluate(df, tmp_path, generate, **kwargs):
+    return run_evaluation(generate, df, question, AnswerParser(CLASSES), img_base_path=f"{tmp_path}/", **kwargs)
+
+
+def test_batches_in_order_with_prefetch(df, tmp_path):
+    prepared = []
+    lock = threading.Lock()
+
+    def recording_question(row):
+        with lock:
+            prepared.append(row['n'])
+        return question(row)
+
+    seen_at_call = []
+
+    def generate(messages):
+        with lock:
+            seen_at_call.append(max(prepared))
+        return StubGenerate()(messages)
+
+    result = run_evaluation(generate, df, recording_question, AnswerParser(CLASSES), img_base_path=f"{tmp_path}/",
+                            batch_size=3, prefetch_batches=1, num_threads=2)
+    # Batches of 3, 3, 3 and 1; never more than one batch prepared ahead of the one being generated
+    assert len(seen_at_call) == 4
+    for n, seen in enumerate(seen_at_call):
+        assert seen < (n + 2) * 3
+    assert [o[0]['generated_text'] for o in result['outputs']] == [
+        f"The lesion looks {p}." for p in df['Pathology']]
+    assert result['predictions'].tolist() == df['Pathology'].tolist()
+    assert result['references'].tolist() == df['Pathology'].tolist()
+    assert result['meta']['n'].tolist() == list(range(10))
+
+
+def test_resume_from_store_after_failure(df, tmp_path):
+    store = ResultsStore(str(tmp_path / "results"), config="c")
+    with pytest.raises(RuntimeError, match="GPU fell over"):
+        evaluate(df, tmp_path, StubGenerate(fail_on_call=2), batch_size=4, store=store)
+    # The two batches before the failure are stored
+    assert store.done_ids() == {f"img{i}.png" for i in range(8)}
+
+    generate = StubGenerate()
+    result = evaluate(df, tmp_path, generate, batch_size=4, store=store)
+    assert [int(p.split("|")[0]) for batch in generate.batches for p in batch] == [8, 9]
+    assert result['meta']['n'].tolist() == [8, 9]
+
+    stored = store.results()
+    assert sorted(stored['meta']['id']) == sorted(df['ImagePath'])
+    assert list(stored['predictions']) == list(stored['references'])
+
+
+def test_parses_each_text_once_with_a_store(df, tmp_path):
+    calls = []
+    parser = AnswerParser(CLASSES)
+
+    def counting_parser(text):
+        calls.append(text)
+        return parser(text)
+
+    store = ResultsStore(str(tmp_path / "results"))
+    result = run_evaluation(StubGenerate(), df, question, counting_parser, img_base_path=f"{tmp_path}/",
+                            batch_size=4, store=store)
+    assert len(calls) == len(df)
+    assert result['predictions'].tolist() == df['Pathology'].tolist()
+
+
+def test_wrong_number_of_results_raises(df, tmp_path):
+    with pytest.raises(ValueError, match="returned 1 results for 3 prompts"):
+        evaluate(df, tmp_path, lambda messages: ["benign"], batch_size=3)
+
+
+@pytest.mark.parametrize("text, label", [
+    ("The lesion is non-cancerous.", 'benign'),
+    ("The lesion is cancerous.", 'malignant'),
+    ("NON-CANCEROUS", 'benign'),
+    ("Benign. Definitely benign.", 'benign'),
+    ("It could be benign or malignant.", -1),
+    ("Benign, although cancerous cells cannot be excluded.", -1),
+    ("Precancerous changes.", -1),
+    ("", -1),
+    (None, -1),
+])
+def test_answer_parser(text, label):
+    assert AnswerParser(CLASSES)(text) == label
+
+
+def test_answer_parser_integer_classes_and_duplicate_aliases():
+    parser = AnswerParser({0: ['no', 'normal'], 1: ['yes', 'abnormal']})
+    assert parser.parse(["Yes.", "abnormal", "normal", "yes and no"]).tolist() == [1, 1, 0, -1]
+    with pytest.raises(ValueError, match="more than one class"):
+        AnswerParser({'a': ['x'], 'b': ['X']})
@@ -0,0 +1,143 @@
+"""Parity of the shared 8-bit conversion with the original per-channel float implementation."""
+import numpy as np
+import pytest
+from PIL import Image
+
+from dlfx.image import draft_to_target, to_8bit_rgb
+from dlfx.MedGemma.preprocess import preprocess
+from dlfx.MedSigLip.preprocess import convert_to_8bit_3channel
+
+
+def reference_preprocess(pil_image):
+    """The original implementation (grayscale, single- and 3-channel inputs), kept as the reference."""
+    img_array = np.array(pil_image).astype(float)
+    if img_array.ndim == 2:
+        img_array = img_array[:, :, None]
+    channels = []
+    for i in range(img_array.shape[2]):
+        channel = img_array[:, :, i]
+        min_val, max_val = channel.min(), channel.max()
+        if max_val > min_val:
+            channels.append(((channel - min_val) * 255.0 / (max_val - min_val)).astype(np.uint8))
+        else:
+            channels.append(np.zeros_like(channel, dtype=np.uint8))
+    if len(channels) == 1:
+        channels = channels * 3
+    return Image.fromarray(np.stack(channels, axis=-1), mode='RGB')
+
+
+def make_image(mode, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (37, 53)
+    if mode == "L":
+        return Image.fromarray(rng.integers(20, 230, shape, dtype=np.uint8))
+    if mode == "RGB":
+        return Image.fromarray(rng.integers(0, 256, shape + (3,), dtype=np.uint8))
+    if mode == "I;16":
+        return Image.fromarray(rng.integers(100, 4096, shape, dtype=np.uint16))
+    if mode == "I":
+        return Image.fromarray(rng.integers(-70000, 70000, shape, dtype=np.int32))
+    if mode == "F":
+        return Image.fromarray(rng.normal(0, 1000, shape).astype(np.float32))
+    if mode == "constant":
+        return Image.fromarray(np.full(shape, 7, dtype=np.uint16))
+    raise ValueError(mode)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "I;16", "I", "constant"])
+@pytest.mark.parametrize("convert", [preprocess, convert_to_8bit_3channel])
+def test_integer_images_match_reference_exactly(mode, convert):
+    image = make_image(mode)
+    expected = np.asarray(reference_preprocess(image))
+    result = convert(image)
+    assert result.mode == "RGB"
+    np.testing.assert_array_equal(np.asarray(result), expected)
+
+
+def test_float_images_match_reference_within_rounding():
+    # Floats are scaled in float32 instead of float64, which can flip a truncation by one level
+    image = make_image("F")
+    expected = np.asarray(reference_preprocess(image)).astype(int)
+    result = np.asarray(preprocess(image)).astype(int)
+    assert np.abs(result - expected).max() <= 1
+    assert (result != expected).mean() < 0.01
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16, np.int32, np.float64])
+def test_batches_match_reference_per_image(dtype):
+    rng = np.random.default_rng(1)
+    low = 0 if np.dtype(dtype).kind == "u" else -200
+    batch = rng.uniform(low, 250, (4, 16, 24, 3)).astype(dtype)
+    result = to_8bit_rgb(batch, batch=True).astype(int)
+    tolerance = 1 if np.dtype(dtype).kind == "f" else 0
+    for n in range(len(batch)):
+        # The reference also accepts arrays
+        expected = np.asarray(reference_preprocess(batch[n])).astype(int)
+        assert np.abs(result[n] - expected).max() <= tolerance
+
+
+def test_minmax_before_uses_full_resolution_jpeg(tmp_path):
+    path = str(tmp_path / "large.jpg")
+    rng = np.random.default_rng(2)
+    Image.fromarray(rng.integers(0, 256, (2000, 3000), dtype=np.uint8)).save(path)
+    with Image.open(path) as image:
+        full = np.asarray(image)
+    with Image.open(path) as image:
+        result = to_8bit_rgb(image, target_size=448, minmax="before")
+        # Not drafted: the caller's image keeps its size
+        assert image.size == (3000, 2000)
+    np.testing.assert_array_equal(result, to_8bit_rgb(full, target_size=448, minmax="before"))
+    assert result.shape == (500, 750, 3)
+
+
+def test_draft_to_target(tmp_path):
+    path = str(tmp_path / "large.jpg")
+    Image.fromarray(np.zeros((2000, 3000), dtype=np.uint8)).save(path)
+    with Image.open(path) as image:
+        drafted = draft_to_target(image, 448, reduce=False)
+        # draft picks the smallest JPEG scale that stays at least the target size, in place
+        assert drafted is image and image.size == (750, 500)
+    with Image.open(path) as image:
+        # Drafted to 1/8 (375 x 250), then reduced by 2 to stay at least 100 px
+        assert draft_to_target(image, 100).size == (188, 125)
+    # Loaded images are only reduced
+    reduced = draft_to_target(Image.fromarray(np.zeros((400, 600), dtype=np.uint8)), (100, 100))
+    assert reduced.size == (150, 100)
+
+
+def exact_8bit(arr):
+    """Truncating min-max scaling of one channel in Python integers, free of overflow and rounding."""
+    values = arr.astype(object)
+    lo, hi = int(arr.min()), int(arr.max())
+    span = max(hi - lo, 1)
+    return np.array([[(int(v) - lo) * 255 // span for v in row] for row in values], dtype=np.int64)
+
+
+@pytest.mark.parametrize("dtype, low, high", [
+    (np.uint64, 0, 2**64 - 1),
+    (np.uint64, 2**64 - 50_000, 2**64 - 1),
+    (np.uint64, 2**63, 2**63 + 10**12),
+    (np.int64, -2**63, 2**63 - 1),
+    (np.int64, 2**62, 2**62 + 40_000),
+])
+def test_64_bit_images_scale_without_overflow(dtype, low, high):
+    rng = np.random.default_rng(3)
+    arr = np.array([[int(v) for v in row] for row in rng.integers(0, 2**62, (12, 16))], dtype=object)
+    arr = np.array(low + arr % (high - low + 1), dtype=dtype)
+    arr.flat[0], arr.flat[1] = low, high
+    expected = exact_8bit(arr)
+    result = to_8bit_rgb(arr)[..., 0].astype(np.int64)
+    assert result.flat[0] == 0 and result.flat[1] == 255
+    # Narrow ranges go through the exact lookup table, wide ones through float64
+    tolerance = 0 if high - low < 1 << 16 else 1
+    assert np.abs(result - expected).max() <= tolerance
+
+
+def test_64_bit_downsampling_does_not_wrap():
+    arr = np.full((8, 8), 2**64 - 1, dtype=np.uint64)
+    arr[:2, :2] = 0
+    for minmax in ("before", "after"):
+        result = to_8bit_rgb(arr, target_size=4, minmax=minmax)[..., 0]
+        assert result.shape == (4, 4)
+        assert (result[1:, :] == 255).all() and (result[:, 1:] == 255).all()
+    assert to_8bit_rgb(arr, target_size=4, minmax="before")[0, 0, 0] == 0
@@ -0,0 +1,79 @@
+"""Import-time regression tests: `import dlfx` must not load heavy optional dependencies."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+HEAVY = ("matplotlib", "pandas", "torch", "transformers", "IPython", "PIL", "pydicom")
+
+
+def loaded_after(code: str) -> list:
+    """Heavy modules present in ``sys.modules`` after running ``code`` in a fresh interpreter."""
+    script = f"import sys\n{code}\nimport json\nprint(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative import time of ``module`` in microseconds, from ``python -X importtime``."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, check=True)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+@pytest.mark.parametrize("code", [
+    "import dlfx",
+    "import dlfx.MedGemma",
+    "import dlfx.MedSigLip",
+    "import dlfx, dlfx.MedGemma, dlfx.MedSigLip; dir(dlfx); dlfx.__version__",
+])
+def test_package_import_is_lazy(code):
+    assert loaded_after(code) == []
+
+
+def test_dicom_flattening_does_not_load_plotting_or_ml_dependencies():
+    loaded = loaded_after("from dlfx import flatten_dicom_dataset, extract_index")
+    assert not {"matplotlib", "pandas", "torch", "transformers", "IPython"} & set(loaded)
+
+
+def test_metrics_do_not_load_matplotlib():
+    loaded = loaded_after("from dlfx.MedGemma import compute_accuracy, bootstrap_metrics, ResultsStore")
+    assert "matplotlib" not in loaded
+
+
+def test_plot_images_grid_does_not_load_pandas():
+    pytest.importorskip("matplotlib")
+    loaded = loaded_after("from dlfx.MedGemma import plot_images_grid; plot_images_grid.__doc__")
+    assert "pandas" not in loaded
+
+
+def test_import_time_budget():
+    # Generous bound; eager imports of matplotlib/pandas alone take several hundred ms
+    assert import_time_us("dlfx") < 200_000
+
+
+def test_exports_resolve_to_objects_not_submodules():
+    # compute_accuracy, plot_images_grid and preprocess are also submodule names
+    code = (
+        "import dlfx.MedGemma.evaluate\n"
+        "from dlfx.MedGemma import compute_accuracy, plot_images_grid, preprocess\n"
+        "import dlfx.MedGemma as m\n"
+        "assert callable(compute_accuracy) and callable(plot_images_grid) and callable(preprocess)\n"
+        "assert m.compute_accuracy is compute_accuracy"
+    )
+    loaded_after(code)
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(subprocess.CalledProcessError):
+        loaded_after("import dlfx; dlfx.does_not_exist")
@@ -0,0 +1,59 @@
+"""Header fields and cache settings of `MedSigLIPDicomDataset`."""
+import json
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from pydicom.dataset import Dataset
+from pydicom.sequence import Sequence
+
+from dlfx.MedSigLip.MedSigLIPDicomDataset import MedSigLIPDicomDataset
+
+
+def make_dataset():
+    ds = Dataset()
+    ds.PatientID = "p1"
+    ds.ImageType = ["ORIGINAL", "PRIMARY"]
+    items = []
+    for uid in ("1.2.3", "1.2.4"):
+        item = Dataset()
+        item.SeriesInstanceUID = uid
+        items.append(item)
+    ds.ReferencedSeriesSequence = Sequence(items)
+    return ds
+
+
+def dataset(header_fields, **kwargs):
+    # Any non-None processor avoids loading one from the hub
+    return MedSigLIPDicomDataset([], header_fields=header_fields, processor=object(), **kwargs)
+
+
+def test_header_exact_keys_tags_and_patterns():
+    fields = [
+        "PatientID",
+        "ImageType",
+        "(0010,0020)",
+        "ReferencedSeriesSequence[1].SeriesInstanceUID",
+        "ReferencedSeriesSequence[*].SeriesInstanceUID",
+        "Patient*",
+        "PatientName",
+    ]
+    header = dataset(fields)._header(make_dataset())
+    assert header == {
+        "PatientID": "p1",
+        "ImageType": "ORIGINAL\\PRIMARY",
+        "(0010,0020)": "p1",
+        "ReferencedSeriesSequence[1].SeriesInstanceUID": "1.2.4",
+        "ReferencedSeriesSequence[*].SeriesInstanceUID": "1.2.3\\1.2.4",
+        "Patient*": "p1",
+        "PatientName": "",
+    }
+
+
+def test_cache_config_includes_voi_settings(tmp_path):
+    default = dataset(None, cache_dir=str(tmp_path))
+    windowed = dataset(None, cache_dir=str(tmp_path), voi=False, window_index=1)
+    assert json.loads(windowed.cache.config)["voi"] is False
+    assert json.loads(windowed.cache.config)["window_index"] == 1
+    assert default.cache.config != windowed.cache.config
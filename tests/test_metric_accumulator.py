@@ -0,0 +1,127 @@
+"""Parity of `MetricAccumulator` with `compute_accuracy` on the same samples."""
+import json
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from dlfx.MedGemma.compute_accuracy import compute_accuracy
+from dlfx.MedGemma.metric_accumulator import MetricAccumulator
+
+
+def make_data(kind, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    classes = {'int': np.array([0, 1, 2, 5]), 'str': np.array(['benign', 'malignant', 'normal'])}[kind]
+    references = classes[rng.integers(0, len(classes), n)]
+    predictions = np.where(rng.random(n) < 0.7, references, classes[rng.integers(0, len(classes), n)])
+    predictions = predictions.astype(object)
+    predictions[rng.random(n) < 0.1] = -1
+    meta = pd.DataFrame({'site': rng.choice(['a', 'b', 'c'], n), 'Pathology': references})
+    return list(predictions), list(references), meta
+
+
+def batches(n, sizes=(1, 7, 64, 100)):
+    start, i = 0, 0
+    while start < n:
+        stop = min(n, start + sizes[i % len(sizes)])
+        yield slice(start, stop)
+        start, i = stop, i + 1
+
+
+def accumulate(predictions, references, meta, rows=None):
+    acc = MetricAccumulator()
+    for s in batches(len(predictions)) if rows is None else rows:
+        acc.update(predictions[s], references[s], groups=meta.iloc[s])
+    return acc
+
+
+def assert_matches_compute_accuracy(acc, predictions, references):
+    expected = compute_accuracy(predictions, references, per_class=True)
+    result = acc.compute()
+    for key in ('accuracy', 'valid_predictions', 'total_samples', 'correct_predictions', 'invalid_rate'):
+        assert result[key] == pytest.approx(expected[key])
+    assert list(result['classes']) == list(expected['classes'])
+    np.testing.assert_array_equal(result['confusion_matrix'], expected['confusion_matrix'])
+    pd.testing.assert_frame_equal(result['per_class'], expected['per_class'])
+
+
+def expected_subgroups(predictions, references, meta):
+    predictions = pd.Series(predictions, dtype=object)
+    invalid = predictions.astype(str) == "-1"
+    frame = meta.assign(valid=~invalid, correct=~invalid & (predictions == pd.Series(references, dtype=object)),
+                        invalid=invalid)
+    rows = {}
+    for column in meta.columns:
+        for value, group in frame.groupby(column):
+            rows[(column, value)] = [len(group), group['valid'].sum(), group['correct'].sum(), group['invalid'].sum()]
+    return rows
+
+
+@pytest.mark.parametrize("kind", ["int", "str"])
+def test_batch_updates_match_compute_accuracy(kind):
+    predictions, references, meta = make_data(kind)
+    acc = accumulate(predictions, references, meta)
+    assert_matches_compute_accuracy(acc, predictions, references)
+    assert acc.total == len(predictions)
+    assert acc.accuracy == pytest.approx(compute_accuracy(predictions, references)['accuracy'])
+
+
+@pytest.mark.parametrize("kind", ["int", "str"])
+def test_subgroups(kind):
+    predictions, references, meta = make_data(kind)
+    df = accumulate(predictions, references, meta).subgroup_metrics()
+    expected = expected_subgroups(predictions, references, meta)
+    assert sorted(df.index) == sorted(expected)
+    for key, (total, valid, correct, invalid) in expected.items():
+        row = df.loc[key]
+        assert (row['total'], row['valid'], row['correct'], row['invalid']) == (total, valid, correct, invalid)
+        assert row['accuracy'] == pytest.approx(correct / total)
+        assert row['invalid_rate'] == pytest.approx(invalid / total)
+
+
+def test_merge_of_shards_matches_single_pass():
+    predictions, references, meta = make_data("str")
+    # Shards see the classes in different orders, and one shard misses a class entirely
+    order = np.argsort(references, kind="stable")
+    shard_rows = [order[:50], order[50:250], order[250:]]
+    shards = [MetricAccumulator() for _ in shard_rows]
+    for shard, rows in zip(shards, shard_rows):
+        shard.update([predictions[i] for i in rows], [references[i] for i in rows], groups=meta.iloc[rows])
+
+    merged = MetricAccumulator()
+    for shard in shards:
+        merged.merge(shard)
+    assert_matches_compute_accuracy(merged, predictions, references)
+    single = accumulate(predictions, references, meta).subgroup_metrics().sort_index()
+    pd.testing.assert_frame_equal(merged.subgroup_metrics().sort_index(), single)
+
+
+@pytest.mark.parametrize("kind", ["int", "str"])
+def test_dict_round_trip(kind, tmp_path):
+    predictions, references, meta = make_data(kind)
+    acc = accumulate(predictions, references, meta)
+    restored = MetricAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))
+    assert_matches_compute_accuracy(restored, predictions, references)
+    pd.testing.assert_frame_equal(restored.subgroup_metrics(), acc.subgroup_metrics())
+
+    path = str(tmp_path / "acc.json")
+    acc.save(path)
+    loaded = MetricAccumulator.load(path)
+    # A restored accumulator keeps accumulating
+    loaded.update(predictions, references, groups=meta)
+    assert_matches_compute_accuracy(loaded, predictions * 2, references * 2)
+
+
+def test_empty_accumulator():
+    result = MetricAccumulator().compute()
+    assert result['total_samples'] == 0
+    assert result['accuracy'] == 0.0
+    assert MetricAccumulator().subgroup_metrics().empty
+
+
+def test_missing_references_raise_without_changing_state():
+    acc = MetricAccumulator().update(['a', 'b'], ['a', 'a'])
+    with pytest.raises(ValueError, match="missing"):
+        acc.update(['a', 'b'], ['a', None])
+    assert acc.total == 2
+    assert list(acc.compute()['classes']) == ['a', 'b']
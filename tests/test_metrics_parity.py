@@ -0,0 +1,148 @@
+"""Parity of the vectorized metric functions with the original per-sample loops."""
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from dlfx.MedGemma.compute_accuracy import analyze_errors, compute_accuracy
+
+
+def reference_compute_accuracy(predictions, references):
+    """The original implementation, kept as the reference."""
+    valid_indices = [i for i, pred in enumerate(predictions) if pred != -1]
+    if not valid_indices:
+        return {'accuracy': 0.0, 'valid_predictions': 0, 'total_samples': len(predictions),
+                'correct_predictions': 0}
+    valid_predictions = [predictions[i] for i in valid_indices]
+    valid_references = [references[i] for i in valid_indices]
+    correct = sum(1 for p, r in zip(valid_predictions, valid_references) if p == r)
+    return {'accuracy': correct / len(valid_predictions), 'valid_predictions': len(valid_predictions),
+            'total_samples': len(predictions), 'correct_predictions': correct}
+
+
+def reference_analyze_errors(predictions, references, all_outputs=None, meta=None, max_mistakes=200,
+                             max_invalid_examples=3):
+    """The original implementation, kept as the reference."""
+    correct_predictions, incorrect_predictions, invalid_predictions = [], [], []
+    for i, (pred, ref) in enumerate(zip(predictions, references)):
+        if pred == -1:
+            invalid_predictions.append(i)
+        elif pred == ref:
+            correct_predictions.append(i)
+        else:
+            incorrect_predictions.append(i)
+
+    print("🔍 Error Analysis:")
+    print("=" * 30)
+    print(f"Correct predictions: {len(correct_predictions)}")
+    print(f"Incorrect predictions: {len(incorrect_predictions)}")
+    print(f"Invalid predictions: {len(invalid_predictions)}")
+
+    mistake_count = {}
+    if incorrect_predictions:
+        print("\n❌ Common mistakes:")
+        for idx in incorrect_predictions[:max_mistakes]:
+            true_class = references[idx]
+            pred_class = predictions[idx] if predictions[idx] != -1 else "Invalid"
+            mistake = f"{true_class} → {pred_class}"
+            mistake_count[mistake] = mistake_count.get(mistake, 0) + 1
+        for mistake, count in sorted(mistake_count.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {mistake}: {count} times")
+
+    if invalid_predictions:
+        print("\n⚠️ Examples of invalid predictions:")
+        for idx in invalid_predictions[:max_invalid_examples]:
+            raw_output = all_outputs[idx]["generated_text"] if all_outputs else "N/A"
+            print(f"  True: {references[idx]}")
+            print(f"  Raw output: '{raw_output}'")
+
+    prediction_df = pd.DataFrame({'predictions': predictions, 'references': references})
+    subgroup_acc = prediction_df.groupby('references').predictions.value_counts(normalize=True)
+
+    print("\n📊 Subgroup Accuracies:")
+    print("=" * 30)
+    groups = meta.Pathology.unique() if meta is not None else pd.Series(references).unique()
+    for i in groups:
+        try:
+            print(f'{i} Accuracy: {subgroup_acc.loc[i, i]:.2f}')
+        except KeyError:
+            print(f'{i} Accuracy: 0.00 (no correct predictions)')
+
+    return {
+        'correct_predictions': correct_predictions,
+        'incorrect_predictions': incorrect_predictions,
+        'invalid_predictions': invalid_predictions,
+        'mistake_patterns': mistake_count,
+        'prediction_df': prediction_df,
+        'subgroup_acc': subgroup_acc,
+    }
+
+
+def make_labels(kind, n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    classes = {'int': [0, 1, 2, 5], 'str': ['benign', 'malignant', 'normal']}[kind]
+    references = [classes[i] for i in rng.integers(0, len(classes), n)]
+    predictions = [r if rng.random() < 0.7 else classes[rng.integers(len(classes))] for r in references]
+    predictions = [-1 if rng.random() < 0.1 else p for p in predictions]
+    return predictions, references
+
+
+CASES = {
+    'int': make_labels('int'),
+    'str': make_labels('str'),
+    'all_invalid': ([-1, -1, -1], [0, 1, 1]),
+    'all_correct': ([1, 0, 1], [1, 0, 1]),
+    # A class that is only ever predicted wrongly, and one that is never predicted
+    'no_correct': ([0, 0, -1, 0], [1, 1, 2, 0]),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_compute_accuracy_matches_reference(case):
+    predictions, references = CASES[case]
+    result = compute_accuracy(predictions, references)
+    expected = reference_compute_accuracy(predictions, references)
+    for key, value in expected.items():
+        assert result[key] == pytest.approx(value)
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("with_meta", [False, True])
+def test_analyze_errors_matches_reference(case, with_meta, capsys):
+    predictions, references = CASES[case]
+    outputs = [{'generated_text': f"answer {i}"} for i in range(len(predictions))]
+    meta = pd.DataFrame({'Pathology': references}) if with_meta else None
+
+    expected = reference_analyze_errors(predictions, references, outputs, meta)
+    expected_output = capsys.readouterr().out
+    result = analyze_errors(predictions, references, outputs, meta)
+    output = capsys.readouterr().out
+
+    for key in ('correct_predictions', 'incorrect_predictions', 'invalid_predictions'):
+        assert list(result[key]) == expected[key]
+    assert result['mistake_patterns'] == expected['mistake_patterns']
+    pd.testing.assert_frame_equal(result['prediction_df'], expected['prediction_df'])
+    assert result['subgroup_acc'].to_dict() == pytest.approx(expected['subgroup_acc'].to_dict())
+    # Mistakes with equal counts may be listed in a different order
+    assert sorted(output.splitlines()) == sorted(expected_output.splitlines())
+
+
+@pytest.mark.parametrize("max_mistakes", [0, 2, 20])
+def test_max_mistakes_limits_the_analyzed_mistakes(max_mistakes, capsys):
+    predictions, references = CASES['int']
+    expected = reference_analyze_errors(predictions, references, max_mistakes=max_mistakes)
+    expected_output = capsys.readouterr().out
+    result = analyze_errors(predictions, references, max_mistakes=max_mistakes)
+    assert result['mistake_patterns'] == expected['mistake_patterns']
+    assert sorted(capsys.readouterr().out.splitlines()) == sorted(expected_output.splitlines())
+
+    everything = analyze_errors(predictions, references, max_mistakes=None, verbose=False)
+    assert sum(everything['mistake_patterns'].values()) == len(everything['incorrect_predictions'])
+
+
+@pytest.mark.parametrize("missing", [np.nan, None])
+def test_missing_references_raise(missing):
+    predictions = [0.0, 1.0, -1, 1.0]
+    references = [0.0, missing, 1.0, 1.0]
+    for metric in (compute_accuracy, analyze_errors):
+        with pytest.raises(ValueError, match="1 references are missing"):
+            metric(predictions, references)
@@ -0,0 +1,111 @@
+"""Canvas geometry, tile placement, paging and layout of `build_mosaic` / `save_mosaic`."""
+import os
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from PIL import Image
+
+from dlfx.mosaic import LAYOUT_COLUMNS, build_mosaic, grid_shape, save_mosaic, write_mosaic
+
+
+def test_grid_shape():
+    assert grid_shape(1) == (1, 1)
+    assert grid_shape(5) == (2, 3)
+    assert grid_shape(16) == (4, 4)
+    assert grid_shape(5, cols=2) == (3, 2)
+    assert grid_shape(0) == (1, 1)
+
+
+def test_canvas_shape_and_tile_placement():
+    # A wide and a tall 8-bit tile, a 16-bit gray tile and a float RGB tile
+    images = [
+        np.full((10, 20, 3), (255, 0, 0), dtype=np.uint8),
+        np.full((20, 10, 3), (0, 255, 0), dtype=np.uint8),
+        np.arange(400, dtype=np.uint16).reshape(20, 20) * 100,
+        np.ones((40, 40, 3), dtype=np.float32),
+    ]
+    canvas, layout = build_mosaic(images, tile_size=20, cols=3, padding=2, background=7, num_threads=1)
+
+    assert canvas.dtype == np.uint8
+    # 2 rows x 3 columns of (20 + 2) px cells, plus the outer padding
+    assert canvas.shape == (2 * 22 + 2, 3 * 22 + 2, 3)
+    assert list(layout.columns) == LAYOUT_COLUMNS
+    assert layout['index'].tolist() == [0, 1, 2, 3]
+    assert layout[['row', 'col']].values.tolist() == [[0, 0], [0, 1], [0, 2], [1, 0]]
+    # Tiles keep their aspect ratio and are centered in their cell; larger images are shrunk
+    assert layout[['x', 'y', 'width', 'height']].values.tolist() == [
+        [2, 7, 20, 10], [29, 2, 10, 20], [46, 2, 20, 20], [2, 24, 20, 20]]
+    assert layout['title'].isna().all()
+
+    for (_, tile), image in zip(layout.iterrows(), images):
+        box = canvas[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width]
+        if image.dtype == np.uint8:
+            assert (box == image[0, 0]).all()
+    gray = canvas[2:22, 46:66]
+    assert gray[0, 0].tolist() == [0, 0, 0] and gray[-1, -1].tolist() == [255, 255, 255]
+    # Cells without a tile and the gaps between cells keep the background
+    assert (canvas[24:44, 24:] == 7).all()
+    assert (canvas[:2] == 7).all()
+    assert (canvas[2:7, 2:22] == 7).all()
+
+
+def test_titles_are_drawn_in_a_band_above_the_tiles():
+    images = [np.zeros((16, 16), dtype=np.uint8)] * 2
+    plain, _ = build_mosaic(images, tile_size=16, padding=0, num_threads=1)
+    canvas, layout = build_mosaic(images, titles=["a\nb", "c"], tile_size=16, padding=0, num_threads=1)
+
+    band = canvas.shape[0] - plain.shape[0]
+    assert band > 0
+    assert layout['y'].tolist() == [band, band]
+    assert layout['title'].tolist() == ["a\nb", "c"]
+    # Both lines of the first title are rendered; the tiles themselves stay black
+    half = band // 2
+    assert canvas[:half, :16].any() and canvas[half:band, :16].any()
+    assert canvas[:half, 16:].any() and not canvas[half:band, 16:].any()
+    assert not canvas[band:].any()
+
+
+def test_paths_are_read_as_thumbnails(tmp_path):
+    path = str(tmp_path / "big.png")
+    Image.fromarray(np.repeat(np.arange(64, dtype=np.uint8)[:, None] * 4, 32, axis=1)).save(path)
+    canvas, layout = build_mosaic([path], tile_size=16, padding=0, background=7)
+    assert canvas.shape == (16, 16, 3)
+    assert layout[['x', 'width', 'height']].values.tolist() == [[4, 8, 16]]
+    tile = canvas[:, 4:12, 0].astype(int)
+    assert (np.diff(tile, axis=0) > 0).all()
+    assert (canvas[:, :4] == 7).all() and (canvas[:, 12:] == 7).all()
+
+
+def test_save_mosaic_pages(tmp_path):
+    images = [np.full((8, 8, 3), (i, 10 * i, 255 - i), dtype=np.uint8) for i in range(7)]
+    titles = [f"image {i}" for i in range(7)]
+    layout = save_mosaic(images, str(tmp_path / "grid.png"), titles=titles, tile_size=8, cols=2,
+                         rows_per_page=2, num_threads=1)
+
+    assert sorted(os.listdir(tmp_path)) == ["grid.csv", "grid_000.png", "grid_001.png"]
+    assert layout['index'].tolist() == list(range(7))
+    assert layout['file'].tolist() == ["grid_000.png"] * 4 + ["grid_001.png"] * 3
+    # Grid positions restart on each page
+    assert layout['row'].tolist() == [0, 0, 1, 1, 0, 0, 1]
+    assert layout['title'].tolist() == titles
+    assert Image.open(tmp_path / "grid_001.png").size == Image.open(tmp_path / "grid_000.png").size
+
+    csv = pd.read_csv(tmp_path / "grid.csv")
+    pd.testing.assert_frame_equal(csv, layout, check_dtype=False)
+
+    # Every tile is where the layout says on its page
+    for tile in layout.itertuples():
+        page = np.asarray(Image.open(tmp_path / tile.file))
+        box = page[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width]
+        np.testing.assert_array_equal(box, images[tile.index])
+
+
+def test_write_mosaic(tmp_path):
+    canvas, layout = build_mosaic([np.zeros((4, 4), dtype=np.uint8)], tile_size=4, num_threads=1)
+    written = write_mosaic(canvas, layout, str(tmp_path / "m.png"))
+    assert written['file'].tolist() == ["m.png"]
+    assert layout['file'].isna().all()
+    np.testing.assert_array_equal(np.asarray(Image.open(tmp_path / "m.png")), canvas)
+    assert pd.read_csv(tmp_path / "m.csv")['file'].tolist() == ["m.png"]
@@ -0,0 +1,120 @@
+"""Crash safety, resuming, merging and compaction of `ResultsStore`."""
+import os
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+from dlfx.MedGemma.compute_accuracy import analyze_errors, compute_accuracy
+from dlfx.MedGemma.results_store import ResultsStore
+
+CONFIG = {"prompt": "Which class?", "model": "m"}
+
+
+def fill(store, ids, prediction=1, reference=1):
+    store.add_many(ids, [f"text {i}" for i in ids], [prediction] * len(ids), [reference] * len(ids),
+                   [{'Pathology': reference} for _ in ids])
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    with ResultsStore(str(tmp_path), config=CONFIG) as store:
+        fill(store, ["a", "b"])
+        segment = store.segments()[0]
+    # A crash in the middle of a write leaves a partial line at the end
+    with open(segment, "a") as f:
+        f.write('{"id": "c", "config": "')
+
+    store = ResultsStore(str(tmp_path), config=CONFIG)
+    assert store.done_ids() == {"a", "b"}
+    assert store.load()['id'].tolist() == ["a", "b"]
+    # Appending after the crash starts a new segment and is read normally
+    fill(store, ["c"])
+    store.close()
+    assert ResultsStore(str(tmp_path), config=CONFIG).done_ids() == {"a", "b", "c"}
+
+
+def test_done_ids_are_per_config(tmp_path):
+    with ResultsStore(str(tmp_path), config=CONFIG) as store:
+        fill(store, ["a", "b"])
+    with ResultsStore(str(tmp_path), config=dict(CONFIG, model="other")) as other:
+        fill(other, ["b", "c"])
+
+    assert ResultsStore(str(tmp_path), config=CONFIG).done_ids() == {"a", "b"}
+    assert ResultsStore(str(tmp_path), config=dict(CONFIG, model="other")).done_ids() == {"b", "c"}
+    # Key order does not change the configuration hash
+    assert ResultsStore(str(tmp_path), config={"model": "m", "prompt": "Which class?"}).done_ids() == {"a", "b"}
+    assert len(list(store.records(all_configs=True))) == 4
+
+
+def test_latest_record_per_id_wins(tmp_path):
+    with ResultsStore(str(tmp_path), config=CONFIG) as store:
+        fill(store, ["a"], prediction=0)
+        fill(store, ["a"], prediction=1)
+        assert store.load()['prediction'].tolist() == [1]
+
+
+def test_merge_shards_and_grown_segments(tmp_path):
+    shards = [str(tmp_path / "shard0"), str(tmp_path / "shard1")]
+    writers = [ResultsStore(shard, config=CONFIG) for shard in shards]
+    fill(writers[0], ["a", "b"])
+    fill(writers[1], ["c"])
+
+    target = ResultsStore(str(tmp_path / "merged"), config=CONFIG)
+    assert sum(target.merge(shard) for shard in shards) == 2
+    assert target.done_ids() == {"a", "b", "c"}
+    # Nothing changed: nothing to copy
+    assert target.merge(shards[0]) == 0
+
+    # A still running shard appends to its segment: merging again picks up the new lines
+    fill(writers[0], ["d"])
+    assert target.merge(shards[0]) == 1
+    assert target.done_ids() == {"a", "b", "c", "d"}
+    assert len(target.segments()) == 2
+    for writer in writers:
+        writer.close()
+
+
+def test_compact_keeps_latest_record_per_config_and_id(tmp_path):
+    other_config = dict(CONFIG, model="other")
+    for config, prediction in [(CONFIG, 0), (other_config, 0), (CONFIG, 1)]:
+        # Each store writes its own segment
+        with ResultsStore(str(tmp_path), config=config) as store:
+            fill(store, ["a", "b"], prediction=prediction)
+    assert len(store.segments()) == 3
+
+    store = ResultsStore(str(tmp_path), config=CONFIG)
+    store.compact()
+    assert len(store.segments()) == 1
+    records = list(store.records(all_configs=True))
+    assert len(records) == 4
+    assert store.load()['prediction'].tolist() == [1, 1]
+    assert ResultsStore(str(tmp_path), config=other_config).load()['prediction'].tolist() == [0, 0]
+
+
+def test_metrics_accept_a_store(tmp_path, capsys):
+    predictions = [0, 1, -1, 1, 0]
+    references = [0, 1, 1, 0, 0]
+    with ResultsStore(str(tmp_path), config=CONFIG) as store:
+        store.add_many(list(range(5)), [f"answer {i}" for i in range(5)], predictions, references,
+                       [{'Pathology': r} for r in references])
+
+    assert compute_accuracy(store) == compute_accuracy(predictions, references)
+    result = analyze_errors(store)
+    expected = analyze_errors(predictions, references)
+    np.testing.assert_array_equal(result['invalid_predictions'], expected['invalid_predictions'])
+    assert result['mistake_patterns'] == expected['mistake_patterns']
+    # The stored generated text is shown for invalid predictions
+    assert "Raw output: 'answer 2'" in capsys.readouterr().out
+
+
+def test_store_pickles_without_its_open_file(tmp_path):
+    import pickle
+
+    store = ResultsStore(str(tmp_path), config=CONFIG)
+    fill(store, ["a"])
+    copy = pickle.loads(pickle.dumps(store))
+    fill(copy, ["b"])
+    copy.close()
+    store.close()
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".jsonl")]) == 2
+    assert store.done_ids() == {"a", "b"}
@@ -0,0 +1,77 @@
+"""Per-rank sample counts and coverage of `ShardedMedSigLIPDataset`."""
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from PIL import Image
+
+from dlfx.MedSigLip import shards as shards_module
+from dlfx.MedSigLip.shards import ShardedMedSigLIPDataset, write_shards
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    rows = []
+    for i in range(10):
+        name = f"img{i}.png"
+        Image.fromarray(np.full((4, 4), i, dtype=np.uint8)).save(tmp_path / name)
+        rows.append({'ImagePath': name, 'a': i % 2, 'b': 1 - i % 2, 'Split': 'Train'})
+    config = SimpleNamespace(img_base_path=f"{tmp_path}/", labels=['a', 'b'])
+    output_dir = str(tmp_path / "shards")
+    # Uneven shards of 3, 3, 3 and 1 samples
+    index = write_shards(pd.DataFrame(rows), config, output_dir, samples_per_shard=3)
+    assert [shard['count'] for shard in index['splits']['Train']] == [3, 3, 3, 1]
+    return output_dir
+
+
+def rank_paths(shard_dir, monkeypatch, world_size, num_workers, **kwargs):
+    """Paths yielded by every rank, reading each rank with ``num_workers`` simulated DataLoader workers."""
+    result = []
+    for rank in range(world_size):
+        dataset = ShardedMedSigLIPDataset(shard_dir, return_raw=True, rank=rank, world_size=world_size, **kwargs)
+        paths = []
+        for worker_id in range(num_workers):
+            info = SimpleNamespace(id=worker_id, num_workers=num_workers)
+            monkeypatch.setattr(shards_module, "get_worker_info", lambda: info)
+            paths.extend(item['path'] for item in dataset)
+        assert len(paths) == len(dataset)
+        result.append(paths)
+    return result
+
+
+@pytest.mark.parametrize("world_size", [1, 3, 4, 12])
+@pytest.mark.parametrize("num_workers", [1, 2, 3])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_ranks_yield_equal_counts_and_cover_every_sample(shard_dir, monkeypatch, world_size, num_workers, shuffle):
+    per_rank = rank_paths(shard_dir, monkeypatch, world_size, num_workers, shuffle=shuffle, shuffle_buffer=4)
+    expected = -(-10 // world_size)
+    assert [len(paths) for paths in per_rank] == [expected] * world_size
+
+    counts = Counter(path for paths in per_rank for path in paths)
+    assert len(counts) == 10
+    # Padding repeats as few samples as needed
+    assert sum(counts.values()) - 10 == expected * world_size - 10
+    assert max(counts.values()) <= -(-expected * world_size // 10)
+
+
+@pytest.mark.parametrize("world_size", [3, 4])
+def test_drop_last_truncates_without_repeats(shard_dir, monkeypatch, world_size):
+    per_rank = rank_paths(shard_dir, monkeypatch, world_size, 2, drop_last=True)
+    assert [len(paths) for paths in per_rank] == [10 // world_size] * world_size
+    all_paths = [path for paths in per_rank for path in paths]
+    assert len(set(all_paths)) == len(all_paths)
+
+
+def test_epochs_reorder_shards(shard_dir, monkeypatch):
+    dataset = ShardedMedSigLIPDataset(shard_dir, return_raw=True, shuffle_buffer=1)
+    orders = []
+    for epoch in range(4):
+        dataset.set_epoch(epoch)
+        orders.append([item['path'] for item in dataset])
+    assert all(sorted(order) == sorted(orders[0]) for order in orders)
+    assert len({tuple(order) for order in orders}) > 1
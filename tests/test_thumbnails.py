@@ -0,0 +1,56 @@
+"""Fallbacks of `read_thumbnail`."""
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+from PIL import Image
+
+from dlfx import thumbnails
+from dlfx.thumbnails import ThumbnailLoader, read_thumbnail
+
+
+@pytest.fixture
+def png(tmp_path):
+    path = str(tmp_path / "image.png")
+    Image.fromarray(np.arange(64 * 48, dtype=np.uint8).reshape(48, 64)).save(path)
+    return path
+
+
+@pytest.fixture
+def pil_fails(monkeypatch):
+    def unreadable(path, max_size, to_8bit):
+        raise OSError("cannot identify image file")
+    monkeypatch.setattr(thumbnails, "_read_pil", unreadable)
+
+
+def test_falls_back_to_matplotlib(png, pil_fails):
+    arr = read_thumbnail(png, max_size=None)
+    assert arr.shape == (48, 64)
+    small = read_thumbnail(png, max_size=16)
+    assert max(small.shape[:2]) <= 16
+    assert small.dtype == arr.dtype
+    assert read_thumbnail(png, max_size=16, to_8bit=True).dtype == np.uint8
+
+
+def test_loader_reports_files_neither_reader_can_open(tmp_path, capsys):
+    path = str(tmp_path / "broken.png")
+    with open(path, "wb") as f:
+        f.write(b"not an image")
+    assert ThumbnailLoader(num_threads=1).load_many([path]) == [None]
+    assert f"Error loading {path}" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("dtype", [np.uint16, np.int32, np.float32])
+@pytest.mark.parametrize("shape", [(48, 64), (40, 300, 3), (301, 17)])
+def test_fit_bounds_the_longer_side_for_any_dtype(dtype, shape):
+    arr = np.random.default_rng(0).uniform(0, 1000, shape).astype(dtype)
+    small = thumbnails._fit(arr, 16)
+    assert max(small.shape[:2]) == 16
+    assert small.shape[2:] == shape[2:]
+    assert small.dtype == arr.dtype
+
+
+def test_16_bit_images_respect_max_size(tmp_path):
+    path = str(tmp_path / "image16.png")
+    Image.fromarray(np.arange(90 * 120, dtype=np.uint16).reshape(90, 120)).save(path)
+    assert max(read_thumbnail(path, max_size=25).shape[:2]) <= 25